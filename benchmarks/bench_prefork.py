@@ -0,0 +1,133 @@
+"""
+Benchmark de escala: vazão de redirecionamentos com 1..N workers (redirect_prefork)
+
+Sobe o supervisor numa porta livre com uma base SQLite temporária, gera carga
+com conexões keep-alive a partir de vários processos clientes por alguns
+segundos e repete para cada quantidade de workers. Em máquinas com poucos
+núcleos os clientes disputam CPU com os workers, então a escala medida é um
+limite inferior.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_prefork.py [workers ...]   # padrão: 1 e um por CPU
+"""
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import SRC_DIR, populate, setup_path
+
+setup_path()
+
+LINKS = 10000
+DURATION = 5.0
+CONNECTIONS_PER_CLIENT = 50
+
+
+def available_cpus() -> int:
+    return len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+async def _client_loop(port: int, deadline: float, codes) -> int:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    done = 0
+    rng = random.Random()
+    while time.monotonic() < deadline:
+        writer.write(f"GET /{rng.choice(codes)} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+        head = await reader.readuntil(b'\r\n\r\n')
+        for line in head.split(b'\r\n'):
+            if line.lower().startswith(b'content-length:'):
+                await reader.readexactly(int(line.split(b':')[1]))
+        done += 1
+    writer.close()
+    return done
+
+
+def client_process(port: int, deadline: float, results):
+    codes = [f"bench{index:x}" for index in range(LINKS)]
+
+    async def run():
+        counts = await asyncio.gather(*[_client_loop(port, deadline, codes) for _ in range(CONNECTIONS_PER_CLIENT)])
+        results.put(sum(counts))
+    asyncio.run(run())
+
+
+def wait_ready(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('servidor não subiu')
+
+
+def measure(workers: int, clients: int, env: dict) -> float:
+    port = free_port()
+    supervisor = subprocess.Popen(
+        [sys.executable, os.path.join(SRC_DIR, 'redirect_prefork.py'), '--workers', str(workers), '--port', str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(port)
+        time.sleep(1.0) # Todos os workers prontos
+        results = multiprocessing.Queue()
+        deadline = time.monotonic() + DURATION
+        processes = [multiprocessing.Process(target=client_process, args=(port, deadline, results))
+                     for _ in range(clients)]
+        for process in processes:
+            process.start()
+        total = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+    finally:
+        supervisor.send_signal(signal.SIGTERM)
+        supervisor.wait(timeout=30)
+    return total / DURATION
+
+
+def run(worker_counts):
+    from backend.storage.sqlite import SQLiteStorage
+
+    directory = tempfile.mkdtemp(prefix='bench-prefork-')
+    path = os.path.join(directory, 'bench.db')
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            storage = SQLiteStorage(path)
+            storage.connect()
+            populate(storage, LINKS)
+            storage.disconnect()
+
+        env = dict(os.environ, PYTHONPATH=SRC_DIR, STORAGE_BACKEND='sqlite', SQLITE_PATH=path,
+                   REDIRECT_SNAPSHOT_PATH='', BLOOM_PATH='', REDIRECT_WORKER_APP='asgi')
+        cpus = available_cpus()
+        print(f"Vazão do redirect_prefork (asgi, {LINKS} links, {DURATION:.0f}s por medição, {cpus} CPU(s)):")
+        baseline = None
+        for workers in worker_counts:
+            clients = max(1, min(workers, cpus))
+            rate = measure(workers, clients, env)
+            baseline = baseline or rate
+            print(f"  {workers:>3} worker(s): {rate:10.0f} req/s  ({rate / baseline:.2f}x)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    counts = [int(value) for value in sys.argv[1:]] or sorted({1, available_cpus()})
+    run(counts)
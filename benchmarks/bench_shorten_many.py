@@ -0,0 +1,67 @@
+"""
+Benchmark: shorten_url em laço vs. shorten_many em lote
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_shorten_many.py [quantidade_de_urls]
+
+Usa o backend de STORAGE_BACKEND. No MongoDB, grava numa collection separada
+(MONGODB_COLLECTION=urls_benchmark por padrão), que é apagada ao final; no
+SQLite, num arquivo temporário.
+"""
+import os
+import sys
+import tempfile
+import time
+from dotenv import load_dotenv
+
+os.environ.setdefault('MONGODB_COLLECTION', 'urls_benchmark')
+os.environ.setdefault('SQLITE_PATH', os.path.join(tempfile.mkdtemp(), 'bench.db'))
+load_dotenv('config.env')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from backend.url_shortener import URLShortener  # noqa: E402
+
+
+def run(total: int):
+    shortener = URLShortener()
+    storage = shortener.storage
+    if not storage.connect():
+        print("❌ Não foi possível conectar ao banco de dados.")
+        sys.exit(1)
+
+    if storage.name == 'mongo':
+        from backend.database import db_manager
+        db_manager.get_collection().delete_many({})
+
+    try:
+        loop_urls = [f"https://bench.example.com/loop/{i}" for i in range(total)]
+        start = time.perf_counter()
+        for url in loop_urls:
+            shortener.shorten_url(url)
+        loop_elapsed = time.perf_counter() - start
+
+        batch_urls = [f"https://bench.example.com/batch/{i}" for i in range(total)]
+        start = time.perf_counter()
+        results = shortener.shorten_many(batch_urls)
+        batch_elapsed = time.perf_counter() - start
+        failures = sum(1 for result in results if not result['success'])
+
+        # Segunda passada: todas já existem, mede só a deduplicação via $in
+        start = time.perf_counter()
+        shortener.shorten_many(batch_urls)
+        dedup_elapsed = time.perf_counter() - start
+
+        print(f"Backend:                    {storage.name}")
+        print(f"URLs por execução:          {total}")
+        print(f"shorten_url em laço:        {total / loop_elapsed:10.0f} URLs/s ({loop_elapsed:.2f}s)")
+        print(f"shorten_many (novas):       {total / batch_elapsed:10.0f} URLs/s ({batch_elapsed:.2f}s, {failures} falhas)")
+        print(f"shorten_many (existentes):  {total / dedup_elapsed:10.0f} URLs/s ({dedup_elapsed:.2f}s)")
+    finally:
+        if storage.name == 'mongo':
+            from backend.database import db_manager
+            db_manager.get_collection().drop()
+        storage.disconnect()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark: validação de URLs com a biblioteca 'validators' vs. URLValidator
+
+Compara o caminho anterior (validators.url + verificações de prefixo +
+normalize_url) com validate_and_normalize (sem e com memorização) e com
+validate_many, e confere se as duas implementações aceitam e rejeitam as
+mesmas URLs de um corpus sintético.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_validation.py [quantidade_de_urls]
+"""
+import random
+import sys
+import time
+
+from common import setup_path
+
+setup_path()
+
+import validators  # noqa: E402
+from backend.validators import URLValidator, _validate_cached  # noqa: E402
+
+
+def legacy_validate_and_normalize(url: str):
+    """Implementação anterior: validators.url e prefixos verificados duas vezes"""
+    stripped = url.strip()
+    if not stripped:
+        return False, "URL não pode estar vazia", stripped
+    if not validators.url(stripped):
+        return False, "Formato de URL inválido", stripped
+    if not stripped.lower().startswith(('http://', 'https://')):
+        return False, "URL deve começar com http:// ou https://", stripped
+    return True, "", URLValidator.normalize_url(url)
+
+
+def synthetic_corpus(total: int, seed: int = 42):
+    """URLs variadas (válidas e inválidas) montadas a partir de partes típicas"""
+    rng = random.Random(seed)
+    # Pesos puxados para URLs válidas, como numa importação real
+    schemes = ['https://'] * 6 + ['http://'] * 3 + ['ftp://', 'HTTP://', '', 'https:/']
+    auths = [''] * 8 + ['user@', 'user:pass@', 'us er@']
+    hosts = ['example.com', 'www.site.co.uk', 'sub.domain.com', 'shop.example.com.br', '192.168.0.1'] * 3 + [
+        'a.b', 'localhost', '256.1.1.1', '[::1]', '日本語.jp', '-bad.com', 'ex_ample.com', 'example.123']
+    ports = [''] * 6 + [':8080', ':65536']
+    paths = ['', '/', '/path/to/page', '/item/{}', '/item/{}', '/ü', '/a b', '/<x>']
+    queries = [''] * 4 + ['?x=1&y=2', '?x', '?utm_source=mail&id={}']
+    fragments = [''] * 5 + ['#top', '#a b']
+    corpus = []
+    for index in range(total):
+        parts = (rng.choice(schemes), rng.choice(auths), rng.choice(hosts), rng.choice(ports),
+                 rng.choice(paths), rng.choice(queries), rng.choice(fragments))
+        corpus.append(''.join(parts).replace('{}', str(index)))
+    return corpus
+
+
+def measure(name: str, function, urls) -> float:
+    started = time.perf_counter()
+    function(urls)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<40} {len(urls) / elapsed:12.0f} URLs/s ({elapsed:.3f}s)")
+    return elapsed
+
+
+def run(total: int):
+    urls = synthetic_corpus(total)
+    # Importações em massa costumam repetir URLs: metade do lote são repetições
+    repeated = urls + random.Random(7).sample(urls, len(urls))
+
+    # Compara aceitação e mensagem (a forma canônica é a mesma nas duas: normalize_url)
+    mismatches = [
+        url for url in urls
+        if legacy_validate_and_normalize(url) != URLValidator.validate_and_normalize(url)
+    ]
+    print(f"Corpus: {len(urls)} URLs, {sum(1 for url in urls if URLValidator.validate_url(url)[0])} válidas")
+    print(f"Divergências com a biblioteca validators: {len(mismatches)}")
+    for url in mismatches[:10]:
+        print(f"   {url!r}: {legacy_validate_and_normalize(url)[:2]} vs {URLValidator.validate_and_normalize(url)[:2]}")
+    print()
+
+    legacy = measure('validators.url (anterior)', lambda batch: [legacy_validate_and_normalize(u) for u in batch], repeated)
+    _validate_cached.cache_clear()
+    measure('validate_and_normalize (cache frio)', lambda batch: [URLValidator.validate_and_normalize(u) for u in batch], repeated)
+    # Conjunto pequeno de URLs que se repetem (cabe no cache de memorização)
+    hot = urls[:1000] * 20
+    measure('validate_and_normalize (cache quente)', lambda batch: [URLValidator.validate_and_normalize(u) for u in batch], hot)
+    batch = measure('validate_many', URLValidator.validate_many, repeated)
+    print()
+    print(f"Ganho de validate_many sobre o anterior: {legacy / batch:.1f}x")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
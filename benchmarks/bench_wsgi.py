@@ -0,0 +1,120 @@
+"""
+Micro-benchmark: app Flask (redirect_server) vs. aplicação WSGI mínima (redirect_wsgi)
+
+Chama as duas aplicações diretamente como WSGI (sem servidor nem rede), com
+a mesma base em memória e a mesma distribuição de códigos, e mede
+requisições/s e latência. Mede também o tempo de partida a frio de cada uma
+num processo novo: importação e importação + primeira requisição.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_wsgi.py [quantidade_de_requisicoes]
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from common import SRC_DIR, percentiles, populate, setup_path
+
+# Backend em memória, sem snapshot: as duas aplicações leem a mesma base do processo
+os.environ['STORAGE_BACKEND'] = 'memory'
+os.environ['REDIRECT_SNAPSHOT_PATH'] = ''
+setup_path()
+
+LINKS = 10000
+
+COLD_START = """
+import time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+environ = {{'REQUEST_METHOD': 'GET', 'PATH_INFO': '/naoexiste', 'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+           'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http', 'wsgi.input': __import__('io').BytesIO(),
+           'wsgi.errors': __import__('sys').stderr, 'wsgi.multithread': False, 'wsgi.multiprocess': False,
+           'wsgi.run_once': False, 'wsgi.version': (1, 0)}}
+b''.join({module}.{callable}(environ, lambda status, headers, exc_info=None: None))
+print(__import__('json').dumps({{'import_ms': (imported - started) * 1000,
+                                 'first_request_ms': (time.perf_counter() - started) * 1000}}))
+"""
+
+
+def environ_for(path: str) -> dict:
+    return {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_HOST': 'localhost', 'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.multithread': True,
+        'wsgi.multiprocess': False, 'wsgi.run_once': False, 'wsgi.version': (1, 0),
+    }
+
+
+def measure(name: str, application, paths) -> dict:
+    statuses = {}
+
+    def start_response(status, headers, exc_info=None):
+        statuses[status[:3]] = statuses.get(status[:3], 0) + 1
+
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        for path in paths:
+            request_start = time.perf_counter()
+            body = application(environ_for(path), start_response)
+            b''.join(body)
+            if hasattr(body, 'close'):
+                body.close()
+            samples.append(time.perf_counter() - request_start)
+        elapsed = time.perf_counter() - started
+    result = dict(percentiles(samples), requests_per_second=len(paths) / elapsed, statuses=statuses)
+    print(f"{name:<28} {result['requests_per_second']:10.0f} req/s  "
+          f"p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms  {statuses}")
+    return result
+
+
+def cold_start(module: str, callable_name: str, runs: int = 5) -> dict:
+    """Mediana de importação e de importação + primeira requisição, cada uma num processo novo"""
+    env = dict(os.environ, CACHE_ENABLED='true', BLOOM_ENABLED='false', CLICK_TRACKING_ENABLED='false')
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', COLD_START.format(module=module, callable=callable_name)],
+            cwd=os.path.dirname(SRC_DIR), env=dict(env, PYTHONPATH=SRC_DIR), stderr=subprocess.DEVNULL,
+        )
+        samples.append(json.loads(output.decode().strip().splitlines()[-1]))
+    middle = len(samples) // 2
+    result = {key: sorted(sample[key] for sample in samples)[middle] for key in ('import_ms', 'first_request_ms')}
+    print(f"{module:<28} importação {result['import_ms']:7.1f}ms  primeira requisição {result['first_request_ms']:7.1f}ms")
+    return result
+
+
+def run(total: int):
+    import redirect_server
+    import redirect_wsgi
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        redirect_server.storage.connect()
+    populate(redirect_server.storage, LINKS)
+
+    rng = random.Random(42)
+    codes = [f"bench{index:x}" for index in range(LINKS)]
+    weights = [1 / (rank + 1) for rank in range(LINKS)]
+    hot = [f"/{code}" for code in rng.choices(codes, weights=weights, k=total)]
+    missing = [f"/missing{rng.getrandbits(40):x}" for _ in range(total // 4)]
+
+    print(f"Vazão ({total} requisições, {LINKS} links, cache ligado):")
+    for name, application in (('Flask (redirect_server)', redirect_server.app),
+                              ('WSGI (redirect_wsgi)', redirect_wsgi.application)):
+        measure(f"{name} 302", application, hot)
+        measure(f"{name} 404", application, missing)
+
+    print()
+    print("Partida a frio (processo novo, backend em memória):")
+    cold_start('redirect_server', 'app')
+    cold_start('redirect_wsgi', 'application')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,122 @@
+"""
+Utilitários compartilhados pelos benchmarks
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from dotenv import load_dotenv
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+RESULTS_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+
+
+def setup_path():
+    """Coloca 'src' no sys.path, usa a raiz do projeto como diretório atual e carrega o config.env"""
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    os.chdir(ROOT_DIR)
+    load_dotenv('config.env')
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """
+    Resume latências (em segundos) em milissegundos
+
+    Args:
+        samples (List[float]): Latências medidas
+
+    Returns:
+        Dict[str, float]: p50, p95, p99, média e máximo em ms
+    """
+    if not samples:
+        return {'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'mean_ms': 0.0, 'max_ms': 0.0}
+    ordered = sorted(samples)
+
+    def at(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] * 1000
+
+    return {
+        'p50_ms': at(0.50),
+        'p95_ms': at(0.95),
+        'p99_ms': at(0.99),
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def synthetic_documents(count: int, start: int = 0, prefix: str = 'bench') -> List[Dict[str, Any]]:
+    """
+    Gera documentos prontos para gravação, sem passar pela validação (para popular a base)
+
+    Args:
+        count (int): Quantidade de documentos
+        start (int): Primeiro índice (para gerar lotes sem colisão)
+        prefix (str): Prefixo dos códigos gerados
+
+    Returns:
+        List[Dict[str, Any]]: Documentos no formato do URLShortener
+    """
+    from backend.validators import url_digest
+
+    base = datetime(2024, 1, 1)
+    documents = []
+    for index in range(start, start + count):
+        created_at = base + timedelta(seconds=index)
+        original_url = f"https://bench.example.com/item/{index}"
+        documents.append({
+            'original_url': original_url,
+            'url_hash': url_digest(original_url),
+            'short_url': f"{prefix}{index:x}",
+            'created_at': created_at,
+            'created_timestamp': int(created_at.timestamp()),
+        })
+    return documents
+
+
+def populate(storage, count: int, batch_size: int = 10000, prefix: str = 'bench'):
+    """Grava 'count' documentos sintéticos no armazenamento, em lotes"""
+    for start in range(0, count, batch_size):
+        storage.insert_many(synthetic_documents(min(batch_size, count - start), start, prefix))
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return 'desconhecida'
+
+
+def write_results(name: str, results: Dict[str, Any], output: str = None) -> str:
+    """
+    Grava os resultados em JSON, com metadados para comparar execuções
+
+    Args:
+        name (str): Nome do conjunto de benchmarks
+        results (Dict[str, Any]): Resultados por cenário
+        output (str): Caminho do arquivo (padrão: benchmarks/results/<nome>-<data>.json)
+
+    Returns:
+        str: Caminho do arquivo gravado
+    """
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    payload = {
+        'suite': name,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(output, 'w', encoding='utf-8') as results_file:
+        json.dump(payload, results_file, indent=2, ensure_ascii=False)
+    return output
@@ -0,0 +1,318 @@
+"""
+Suíte de benchmarks dos caminhos de redirecionamento, encurtamento e histórico
+
+Roda sem rede nem MongoDB, sobre o backend embutido (memória ou SQLite), e
+grava os resultados em JSON para comparar execuções.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/run_benchmarks.py [--backend memory|sqlite] [--only redirect,shorten,history,warmup]
+                                        [--sizes 10000,100000,1000000] [--requests 20000] [--output arquivo.json]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import itertools
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from common import percentiles, populate, setup_path, write_results
+
+setup_path()
+
+TEMP_DIR = tempfile.mkdtemp(prefix='encurtador-bench-')
+
+
+def fresh_storage(backend: str):
+    """Cria e conecta um armazenamento vazio do backend escolhido"""
+    from backend.storage import create_storage
+    os.environ['SQLITE_PATH'] = os.path.join(TEMP_DIR, f"bench-{time.perf_counter_ns()}.db")
+    storage = create_storage(backend)
+    with contextlib.redirect_stdout(io.StringIO()):
+        storage.connect()
+    return storage
+
+
+def bench_redirect(args) -> dict:
+    """Vazão e latência de /<codigo> pelo test client do Flask, com e sem cache"""
+    import redirect_server
+    from backend.cache import LRUCache
+
+    storage = redirect_server.storage
+    with contextlib.redirect_stdout(io.StringIO()):
+        storage.connect()
+    links = args.redirect_links
+    populate(storage, links)
+    codes = [f"bench{index:x}" for index in range(links)]
+
+    # Distribuição com links "quentes" (Zipf), como no tráfego real
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(links)]
+    hot_requests = rng.choices(codes, weights=weights, k=args.requests)
+    missing_requests = [f"missing{rng.getrandbits(40):x}" for _ in range(args.requests // 4)]
+
+    client = redirect_server.app.test_client()
+    results = {'links': links}
+    scenarios = [
+        ('uncached', None, hot_requests, 302),
+        ('cached', LRUCache.from_env() or LRUCache(), hot_requests, 302),
+        ('not_found', LRUCache.from_env() or LRUCache(), missing_requests, 404),
+    ]
+    for name, cache, requests, expected_status in scenarios:
+        redirect_server.url_lookup.cache = cache
+        samples = []
+        errors = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            for code in requests:
+                request_start = time.perf_counter()
+                response = client.get(f"/{code}")
+                samples.append(time.perf_counter() - request_start)
+                if response.status_code != expected_status:
+                    errors += 1
+            elapsed = time.perf_counter() - started
+        results[name] = dict(
+            percentiles(samples),
+            requests=len(requests),
+            requests_per_second=len(requests) / elapsed,
+            unexpected_status=errors,
+        )
+        if cache is not None:
+            results[name]['cache'] = cache.stats()
+        print(f"  redirect {name:<10} {len(requests) / elapsed:10.0f} req/s  "
+              f"p50={results[name]['p50_ms']:.3f}ms p99={results[name]['p99_ms']:.3f}ms")
+    return results
+
+
+def bench_shorten(args) -> dict:
+    """Operações por segundo de shorten_url conforme a base cresce, e de shorten_many"""
+    from backend.url_shortener import URLShortener
+
+    results = {'shorten_url': [], 'shorten_many': {}}
+    for size in args.shorten_sizes:
+        storage = fresh_storage(args.backend)
+        populate(storage, size)
+        shortener = URLShortener(storage)
+        urls = [f"https://shorten.example.com/{size}/{index}" for index in range(args.shorten_ops)]
+
+        samples = []
+        started = time.perf_counter()
+        for url in urls:
+            operation_start = time.perf_counter()
+            shortener.shorten_url(url)
+            samples.append(time.perf_counter() - operation_start)
+        elapsed = time.perf_counter() - started
+        results['shorten_url'].append(dict(
+            percentiles(samples), collection_size=size, operations=len(urls), ops_per_second=len(urls) / elapsed
+        ))
+        print(f"  shorten_url com {size:>8} links: {len(urls) / elapsed:10.0f} ops/s")
+        with contextlib.redirect_stdout(io.StringIO()):
+            storage.disconnect()
+
+    storage = fresh_storage(args.backend)
+    shortener = URLShortener(storage)
+    urls = [f"https://batch.example.com/{index}" for index in range(args.shorten_ops * 5)]
+    started = time.perf_counter()
+    shortener.shorten_many(urls)
+    elapsed = time.perf_counter() - started
+    results['shorten_many'] = {'operations': len(urls), 'ops_per_second': len(urls) / elapsed}
+    print(f"  shorten_many ({len(urls)} URLs): {len(urls) / elapsed:10.0f} ops/s")
+    with contextlib.redirect_stdout(io.StringIO()):
+        storage.disconnect()
+    return results
+
+
+def bench_history(args) -> dict:
+    """Tempo e memória de get_all_urls e da primeira página do histórico"""
+    from backend.url_shortener import URLShortener
+
+    results = []
+    for size in args.sizes:
+        storage = fresh_storage(args.backend)
+        populate(storage, size)
+        shortener = URLShortener(storage)
+
+        started = time.perf_counter()
+        page, _ = shortener.get_urls_page(500)
+        first_page_seconds = time.perf_counter() - started
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        documents = shortener.get_all_urls()
+        get_all_seconds = time.perf_counter() - started
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append({
+            'collection_size': size,
+            'returned': len(documents),
+            'get_all_urls_seconds': get_all_seconds,
+            'get_all_urls_peak_mb': peak_bytes / (1024 * 1024),
+            'first_page_ms': first_page_seconds * 1000,
+            'first_page_items': len(page),
+        })
+        print(f"  history {size:>8} links: get_all_urls {get_all_seconds:.2f}s "
+              f"(pico {peak_bytes / (1024 * 1024):.1f} MB), primeira página {first_page_seconds * 1000:.2f}ms")
+        del documents
+        with contextlib.redirect_stdout(io.StringIO()):
+            storage.disconnect()
+    return results
+
+
+def add_latency(storage, seconds: float, calls: list):
+    """Simula a ida e volta ao MongoDB nas buscas por código, registrando cada chamada em 'calls'"""
+    for operation in ('get_by_code', 'get_many_by_code'):
+        method = getattr(storage, operation)
+
+        def delayed(*args, _method=method, _operation=operation, **kwargs):
+            calls.append(_operation)
+            time.sleep(seconds)
+            return _method(*args, **kwargs)
+
+        setattr(storage, operation, delayed)
+
+
+def bench_warmup(args) -> dict:
+    """Latência logo após a partida, com o cache frio e aquecido pelo hot set, e tempo até estabilizar"""
+    from backend.cache import CachedURLLookup, LRUCache
+    from backend.hotset import HotSet
+    from backend.resolver import RedirectResolver
+    from backend.url_shortener import URLShortener
+
+    storage = fresh_storage(args.backend)
+    links = args.redirect_links
+    populate(storage, links)
+    calls = []
+    add_latency(storage, args.db_latency_ms / 1000, calls)
+
+    rng = random.Random(42)
+    codes = [f"bench{index:x}" for index in range(links)]
+    weights = [1 / (rank + 1) for rank in range(links)]
+    requests = rng.choices(codes, weights=weights, k=args.requests)
+
+    # Execução anterior: o mesmo perfil de tráfego gera o ranking gravado em disco
+    hotset_path = os.path.join(TEMP_DIR, 'hotset.json')
+    previous = HotSet(hotset_path, size=args.hotset_size)
+    for code in rng.choices(codes, weights=weights, k=args.requests):
+        previous.record(code)
+    previous.save()
+
+    window = max(1, len(requests) // 20)
+    results = {'links': links, 'threads': args.threads, 'db_latency_ms': args.db_latency_ms,
+               'hotset_size': args.hotset_size, 'window_requests': window}
+    for name, warm in (('cold', False), ('warm', True)):
+        lookup = CachedURLLookup(URLShortener(storage), LRUCache(max_entries=links))
+        resolver = RedirectResolver(storage, lookup, hot_set=HotSet(hotset_path, size=args.hotset_size))
+        del calls[:]
+
+        samples = []
+        positions = itertools.count()
+
+        def client():
+            # Cada thread pega a próxima requisição da lista, como clientes simultâneos
+            for position in positions:
+                if position >= len(requests):
+                    return
+                request_start = time.perf_counter()
+                resolver.resolve(requests[position])
+                finished = time.perf_counter()
+                samples.append((finished, finished - request_start))
+
+        gc.collect() # Lixo do cenário anterior não entra na medição
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            warmed = resolver.warm_up() if warm else 0
+            warm_seconds = time.perf_counter() - started
+            warmup_queries = len(calls)
+            clients = [threading.Thread(target=client) for _ in range(args.threads)]
+            for thread in clients:
+                thread.start()
+            for thread in clients:
+                thread.join()
+        samples.sort()
+
+        # Média por janela de requisições, na ordem em que terminaram
+        windows = []
+        for start in range(0, len(samples), window):
+            chunk = samples[start:start + window]
+            windows.append((chunk[-1][0] - started, sum(latency for _, latency in chunk) / len(chunk)))
+        steady_mean = sum(mean for _, mean in windows[-5:]) / len(windows[-5:])
+        time_to_steady = next(elapsed for elapsed, mean in windows if mean <= steady_mean * 1.25)
+
+        results[name] = dict(
+            percentiles([latency for _, latency in samples]),
+            warmed=warmed,
+            warmup_seconds=warm_seconds,
+            warmup_queries=warmup_queries,
+            db_lookups=len(calls) - warmup_queries,
+            coalesced=lookup.coalesced,
+            first_window_mean_ms=windows[0][1] * 1000,
+            steady_mean_ms=steady_mean * 1000,
+            time_to_steady_state_s=time_to_steady,
+            window_mean_ms=[mean * 1000 for _, mean in windows],
+        )
+        print(f"  warmup {name:<5} primeira janela {windows[0][1] * 1000:7.3f}ms  estável {steady_mean * 1000:7.3f}ms  "
+              f"tempo até estabilizar {time_to_steady:.2f}s  consultas ao banco {len(calls)} "
+              f"(aquecidos {warmed}, agrupadas {lookup.coalesced})")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        storage.disconnect()
+    return results
+
+
+BENCHMARKS = {
+    'redirect': bench_redirect,
+    'shorten': bench_shorten,
+    'history': bench_history,
+    'warmup': bench_warmup,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmarks do Encurtador de Links')
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='memory')
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help='Cenários separados por vírgula')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Tamanhos da base para o histórico')
+    parser.add_argument('--shorten-sizes', default='0,10000,100000', help='Tamanhos da base para shorten_url')
+    parser.add_argument('--shorten-ops', type=int, default=2000)
+    parser.add_argument('--redirect-links', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=16, help='Requisições simultâneas no cenário warmup')
+    parser.add_argument('--db-latency-ms', type=float, default=2.0, help='Latência simulada do banco no warmup')
+    parser.add_argument('--hotset-size', type=int, default=1000)
+    parser.add_argument('--output', default=None, help='Arquivo JSON de saída')
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(',') if size]
+    args.shorten_sizes = [int(size) for size in args.shorten_sizes.split(',') if size]
+    args.only = [name.strip() for name in args.only.split(',') if name.strip()]
+    return args
+
+
+def main():
+    args = parse_args()
+    # O servidor de redirecionamento usa o backend global do processo
+    os.environ['STORAGE_BACKEND'] = args.backend
+    os.environ['SQLITE_PATH'] = os.path.join(TEMP_DIR, 'redirect.db')
+    # Logs e linhas de acesso iriam para o terminal, misturados aos resultados
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('ACCESS_LOG_ENABLED', 'false')
+
+    results = {'backend': args.backend}
+    try:
+        for name in args.only:
+            print(f"▶ {name}")
+            results[name] = BENCHMARKS[name](args)
+    finally:
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    output = write_results('benchmarks', results, args.output)
+    print(f"📄 Resultados gravados em {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Módulo de contagem de cliques com escrita adiada (write-behind)
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ClickCounter:
+    """
+    Agrega cliques em memória e grava no banco em lote, numa thread de fundo
+
+    record() apenas incrementa um contador local; o envio ao banco acontece a
+    cada 'flush_interval' segundos, ou antes disso quando 'batch_size' códigos
+    distintos estiverem pendentes. O redirecionamento nunca espera pela gravação.
+    """
+
+    def __init__(self, storage, flush_interval: float = 5.0, batch_size: int = 1000):
+        self.storage = storage
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self._pending: Counter = Counter()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+        self.flushed_clicks = 0
+        self.flush_errors = 0
+
+    @classmethod
+    def from_env(cls, storage) -> Optional['ClickCounter']:
+        """
+        Cria o contador a partir das variáveis de ambiente
+
+        Args:
+            storage (StorageBackend): Armazenamento onde os cliques são somados
+
+        Returns:
+            Optional[ClickCounter]: Contador configurado ou None se estiver desativado
+        """
+        if os.getenv('CLICK_TRACKING_ENABLED', 'true').strip().lower() not in ('1', 'true', 'yes', 'on'):
+            return None
+        return cls(
+            storage,
+            flush_interval=float(os.getenv('CLICK_FLUSH_INTERVAL_SECONDS', 5)),
+            batch_size=int(os.getenv('CLICK_FLUSH_BATCH_SIZE', 1000)),
+        )
+
+    def _ensure_started(self):
+        # Também reinicia a thread em processos filhos criados por fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Contagens herdadas do processo pai são gravadas por ele
+                self._pending = Counter()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='click-flusher', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+
+    def record(self, short_code: str):
+        """
+        Registra um clique (sem I/O)
+
+        Args:
+            short_code (str): Código curto acessado
+        """
+        self._ensure_started()
+        with self._lock:
+            self._pending[short_code] += 1
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Grava no banco os cliques pendentes, em lotes de até 'batch_size' códigos"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return
+
+        items = list(pending.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = dict(items[start:start + self.batch_size])
+            try:
+                self.storage.increment_clicks(batch)
+                self.flushed_clicks += sum(batch.values())
+            except Exception as e:
+                # Devolve as contagens para a próxima tentativa
+                self.flush_errors += 1
+                logger.error("Erro ao gravar cliques: %s", e)
+                with self._lock:
+                    self._pending.update(dict(items[start:]))
+                return
+
+    def stop(self):
+        """Encerra a thread de fundo e grava os cliques que ainda estiverem pendentes"""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna os contadores do agregador de cliques"""
+        with self._lock:
+            pending_codes = len(self._pending)
+            pending_clicks = sum(self._pending.values())
+        return {
+            'enabled': True,
+            'pending_codes': pending_codes,
+            'pending_clicks': pending_clicks,
+            'flushed_clicks': self.flushed_clicks,
+            'flush_errors': self.flush_errors,
+            'flush_interval_seconds': self.flush_interval,
+            'batch_size': self.batch_size,
+        }
@@ -0,0 +1,331 @@
+"""
+Servidor HTTP/1.1 mínimo em asyncio para aplicações ASGI
+
+Feito para o servidor de redirecionamento (requisições pequenas, respostas
+sem corpo relevante): conexões keep-alive com tempo máximo de ociosidade,
+limite de tamanho do cabeçalho, protocolo 'lifespan' e encerramento gracioso
+(SIGTERM/SIGINT): para de aceitar conexões, fecha as ociosas, deixa as
+requisições em andamento terminarem (com 'Connection: close') dentro do
+prazo e só então executa o 'shutdown' da aplicação. Não há suporte a
+corpo 'chunked', TLS nem HTTP/2 (use um servidor ASGI completo para isso).
+"""
+import asyncio
+import logging
+import os
+import signal
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+# Maior corpo de requisição aceito (o redirecionamento não usa corpo)
+MAX_BODY_BYTES = 64 * 1024
+
+# Intervalo entre batimentos enviados ao supervisor de processos (segundos)
+HEARTBEAT_INTERVAL = 1.0
+
+
+class ServerConfig:
+    """Limites do servidor (config.env)"""
+
+    def __init__(self, keepalive_timeout: float = 5.0, shutdown_timeout: float = 10.0,
+                 backlog: int = 2048, max_header_bytes: int = 16384):
+        self.keepalive_timeout = keepalive_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.backlog = backlog
+        self.max_header_bytes = max_header_bytes
+
+    @classmethod
+    def from_env(cls) -> 'ServerConfig':
+        return cls(
+            keepalive_timeout=float(os.getenv('ASYNC_KEEPALIVE_TIMEOUT_SECONDS', 5)),
+            shutdown_timeout=float(os.getenv('ASYNC_SHUTDOWN_TIMEOUT_SECONDS', 10)),
+            backlog=int(os.getenv('ASYNC_BACKLOG', 2048)),
+            max_header_bytes=int(os.getenv('ASYNC_MAX_HEADER_BYTES', 16384)),
+        )
+
+
+class Lifespan:
+    """Executa o protocolo 'lifespan' do ASGI (startup/shutdown da aplicação)"""
+
+    def __init__(self, app):
+        self.app = app
+        self.supported = True
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._done: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _receive(self) -> Dict[str, Any]:
+        return await self._events.get()
+
+    async def _send(self, message: Dict[str, Any]):
+        # 'lifespan.startup.complete', 'lifespan.shutdown.failed' etc.
+        _, phase, outcome = message['type'].split('.')
+        future = self._done.get(phase)
+        if future is not None and not future.done():
+            future.set_result((outcome, message.get('message', '')))
+
+    async def _run(self):
+        try:
+            await self.app({'type': 'lifespan', 'asgi': {'version': '3.0'}, 'state': {}}, self._receive, self._send)
+        except Exception as e:
+            # Aplicações sem suporte a 'lifespan' podem simplesmente levantar exceção
+            self.supported = False
+            for future in self._done.values():
+                if not future.done():
+                    future.set_result(('unsupported', str(e)))
+
+    async def _step(self, phase: str) -> bool:
+        if not self.supported:
+            return True
+        future = asyncio.get_running_loop().create_future()
+        self._done[phase] = future
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        await self._events.put({'type': f'lifespan.{phase}'})
+        outcome, message = await future
+        if outcome == 'failed':
+            logger.error("Falha no %s da aplicação: %s", phase, message)
+            return False
+        return True
+
+    async def startup(self) -> bool:
+        return await self._step('startup')
+
+    async def shutdown(self):
+        await self._step('shutdown')
+        if self._task is not None:
+            await asyncio.wait([self._task], timeout=1)
+
+
+class _Connection:
+    __slots__ = ('task', 'idle')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.idle = True
+
+
+class HTTPServer:
+    """Servidor asyncio que entrega cada requisição à aplicação ASGI"""
+
+    def __init__(self, app, config: Optional[ServerConfig] = None):
+        self.app = app
+        self.config = config or ServerConfig.from_env()
+        self.closing = False
+        self.connections: Set[_Connection] = set()
+        self.requests = 0
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = _Connection(asyncio.current_task())
+        self.connections.add(connection)
+        try:
+            while not self.closing:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.config.keepalive_timeout)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                        ConnectionError):
+                    break
+                connection.idle = False
+                keep_alive = await self._request(head, reader, writer)
+                connection.idle = True
+                if not keep_alive:
+                    break
+        except asyncio.CancelledError:
+            pass # Conexão ociosa fechada no encerramento
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.discard(connection)
+            writer.close()
+
+    async def _request(self, head: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        # Retorna se a conexão continua aberta após a resposta
+        lines = head[:-4].decode('latin-1').split('\r\n')
+        parts = lines[0].split(' ')
+        if len(parts) != 3 or not parts[2].startswith('HTTP/1.'):
+            await self._write(writer, 400, [], b'Bad Request', False)
+            return False
+        method, target, version = parts
+
+        headers: List[Tuple[bytes, bytes]] = []
+        connection_header = ''
+        content_length = 0
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            name = name.strip().lower()
+            value = value.strip()
+            if name == 'connection':
+                connection_header = value.lower()
+            elif name == 'content-length':
+                content_length = int(value) if value.isdigit() else -1
+            elif name == 'transfer-encoding':
+                await self._write(writer, 501, [], b'Not Implemented', False)
+                return False
+            headers.append((name.encode('latin-1'), value.encode('latin-1')))
+
+        if content_length < 0 or content_length > MAX_BODY_BYTES:
+            await self._write(writer, 413, [], b'Payload Too Large', False)
+            return False
+        body = await reader.readexactly(content_length) if content_length else b''
+
+        if version == 'HTTP/1.1':
+            keep_alive = connection_header != 'close'
+        else:
+            keep_alive = connection_header == 'keep-alive'
+
+        raw_path, _, query = target.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0', 'spec_version': '2.3'},
+            'http_version': version[5:],
+            'method': method,
+            'scheme': 'http',
+            'path': unquote(raw_path),
+            'raw_path': raw_path.encode('latin-1'),
+            'query_string': query.encode('latin-1'),
+            'root_path': '',
+            'headers': headers,
+            'client': writer.get_extra_info('peername'),
+            'server': writer.get_extra_info('sockname'),
+        }
+        status, response_headers, response_body = await self._call_app(scope, body)
+        self.requests += 1
+        # Decidido depois da aplicação: um encerramento pode ter começado durante a requisição
+        keep_alive = keep_alive and not self.closing
+        await self._write(writer, status, response_headers, response_body, keep_alive,
+                          send_body=method != 'HEAD')
+        return keep_alive
+
+    async def _call_app(self, scope: Dict[str, Any], body: bytes) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+        response: Dict[str, Any] = {'status': None, 'headers': [], 'body': []}
+        finished = asyncio.Event()
+        request_sent = False
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message: Dict[str, Any]):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                response['headers'] = list(message.get('headers', []))
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+                if not message.get('more_body', False):
+                    finished.set()
+
+        try:
+            await self.app(scope, receive, send)
+        except Exception as e:
+            logger.exception("Erro na aplicação ASGI: %s", e)
+            if response['status'] is None:
+                return 500, [], b'Internal Server Error'
+        finally:
+            finished.set()
+        if response['status'] is None:
+            return 500, [], b'Internal Server Error'
+        return response['status'], response['headers'], b''.join(response['body'])
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, status: int, headers, body: bytes, keep_alive: bool,
+                     send_body: bool = True):
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ''
+        head = [f"HTTP/1.1 {status} {reason}".encode('latin-1')]
+        has_length = False
+        for name, value in headers:
+            if name.lower() == b'content-length':
+                has_length = True
+            head.append(name + b': ' + value)
+        if not has_length and status != 304:
+            head.append(b'content-length: ' + str(len(body)).encode())
+        if not keep_alive:
+            head.append(b'connection: close')
+        writer.write(b'\r\n'.join(head) + b'\r\n\r\n' + (body if send_body else b''))
+        await writer.drain()
+
+    async def serve(self, host: str, port: int, reuse_port: bool = False,
+                    heartbeat: Optional[Callable[[], None]] = None):
+        """
+        Atende até receber SIGTERM/SIGINT e então encerra de forma graciosa
+
+        Args:
+            host (str): Endereço de escuta
+            port (int): Porta de escuta
+            reuse_port (bool): Abre o socket com SO_REUSEPORT (vários processos na mesma porta)
+            heartbeat (Optional[Callable[[], None]]): Chamado a cada HEARTBEAT_INTERVAL enquanto
+                o loop atende (verificação de saúde do supervisor de processos)
+        """
+        lifespan = Lifespan(self.app)
+        if not await lifespan.startup():
+            return
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass # Fora da thread principal ou sem suporte (Windows): encerra pelo KeyboardInterrupt
+
+        server = await asyncio.start_server(self._handle, host, port, backlog=self.config.backlog,
+                                            limit=self.config.max_header_bytes, reuse_port=reuse_port or None)
+        logger.info("Servidor asyncio de redirecionamento em http://%s:%d (pid %d)", host, port, os.getpid())
+        beating = asyncio.create_task(self._beat(heartbeat)) if heartbeat is not None else None
+        try:
+            await stop.wait()
+        finally:
+            if beating is not None:
+                beating.cancel()
+            await self.shutdown(server)
+            await lifespan.shutdown()
+
+    @staticmethod
+    async def _beat(heartbeat: Callable[[], None]):
+        # Um loop travado deixa de bater, e o supervisor substitui o processo
+        while True:
+            heartbeat()
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    async def shutdown(self, server: asyncio.AbstractServer):
+        """Para de aceitar conexões, fecha as ociosas e espera as requisições em andamento"""
+        self.closing = True
+        server.close()
+        busy = 0
+        for connection in list(self.connections):
+            if connection.idle:
+                connection.task.cancel()
+            else:
+                busy += 1
+        pending = [connection.task for connection in self.connections]
+        if busy:
+            logger.info("Aguardando %d requisição(ões) em andamento...", busy)
+        if pending:
+            _, still_running = await asyncio.wait(pending, timeout=self.config.shutdown_timeout)
+            for task in still_running:
+                task.cancel()
+        logger.info("Servidor encerrado após %d requisição(ões)", self.requests)
+
+
+def run(app, host: str = '0.0.0.0', port: int = 5000, config: Optional[ServerConfig] = None):
+    """
+    Executa a aplicação ASGI no servidor embutido até SIGTERM/SIGINT
+
+    Args:
+        app: Aplicação ASGI
+        host (str): Endereço de escuta
+        port (int): Porta de escuta
+        config (Optional[ServerConfig]): Limites do servidor (padrão: config.env)
+    """
+    try:
+        asyncio.run(HTTPServer(app, config).serve(host, port))
+    except KeyboardInterrupt:
+        pass
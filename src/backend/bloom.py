@@ -0,0 +1,421 @@
+"""
+Módulo de filtro de Bloom dos códigos curtos existentes
+
+O servidor de redirecionamento consulta o filtro antes do banco: se o filtro
+diz que um código não existe, a resposta é 404 sem nenhuma consulta. Falsos
+positivos (códigos inexistentes que passam pelo filtro) apenas seguem o
+caminho normal até o banco.
+
+Formato do arquivo (little-endian):
+    cabeçalho : magic (8 bytes), bits (uint64), funções de hash (uint32),
+                códigos (uint64), capacidade (uint64), marca d'água (double)
+    corpo     : vetor de bits
+
+A marca d'água é o momento de gravação do código mais novo já incluído (não
+a data de criação do link, que uma importação preserva).
+"""
+import atexit
+import hashlib
+import logging
+import math
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'LLBLOOM1'
+HEADER = struct.Struct('<8sQIQQd')
+
+# Margem ao buscar códigos novos: cobre relógios levemente dessincronizados entre quem grava e o servidor
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+# Espera máxima por uma atualização em andamento antes de deixar a consulta seguir para o banco
+RECHECK_WAIT = 1.0
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre um bytearray, com hash duplo derivado de um único blake2b
+
+    Args:
+        size_bits (int): Tamanho do vetor de bits
+        hash_count (int): Quantidade de posições verificadas por código
+        bits (Optional[bytearray]): Vetor já preenchido (ao carregar do disco)
+    """
+
+    def __init__(self, size_bits: int, hash_count: int, bits: Optional[bytearray] = None):
+        self.size_bits = max(8, size_bits)
+        self.hash_count = max(1, hash_count)
+        self.bits = bits if bits is not None else bytearray((self.size_bits + 7) // 8)
+        self.count = 0  # Códigos distintos adicionados (aproximado: colisões totais não contam)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float, max_bytes: Optional[int] = None) -> 'BloomFilter':
+        """
+        Dimensiona o filtro para 'capacity' códigos com a taxa de falsos positivos desejada
+
+        Args:
+            capacity (int): Quantidade esperada de códigos
+            error_rate (float): Taxa de falsos positivos alvo (ex.: 0.01)
+            max_bytes (Optional[int]): Limite de memória; se atingido, a taxa real fica acima do alvo
+
+        Returns:
+            BloomFilter: Filtro vazio
+        """
+        capacity = max(1, capacity)
+        size_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        if max_bytes:
+            size_bits = min(size_bits, max_bytes * 8)
+        hash_count = max(1, round(size_bits / capacity * math.log(2)))
+        return cls(size_bits, hash_count)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size_bits
+        return [(first + i * second) % size for i in range(self.hash_count)]
+
+    def add(self, key: str) -> bool:
+        """
+        Adiciona um código ao filtro
+
+        Args:
+            key (str): Código curto
+
+        Returns:
+            bool: True se o código parecia novo (algum bit foi ligado)
+        """
+        bits = self.bits
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def expected_error_rate(self) -> float:
+        """Taxa de falsos positivos estimada para a quantidade atual de códigos"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size_bits)) ** self.hash_count
+
+    def save(self, path: str, capacity: int = 0, watermark: Optional[datetime] = None):
+        """
+        Grava o filtro em disco (escrita em arquivo temporário e troca atômica)
+
+        Args:
+            path (str): Caminho do arquivo
+            capacity (int): Capacidade para a qual o filtro foi dimensionado
+            watermark (Optional[datetime]): Momento de gravação do código mais novo já incluído
+        """
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, 'wb') as filter_file:
+            filter_file.write(HEADER.pack(
+                MAGIC, self.size_bits, self.hash_count, self.count, capacity,
+                watermark.timestamp() if watermark else 0.0
+            ))
+            filter_file.write(self.bits)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Lê um filtro gravado por save()
+
+        Args:
+            path (str): Caminho do arquivo
+
+        Returns:
+            Tuple[BloomFilter, int, Optional[datetime]]: Filtro, capacidade e marca d'água
+
+        Raises:
+            ValueError: Se o arquivo não for um filtro válido
+        """
+        with open(path, 'rb') as filter_file:
+            header = filter_file.read(HEADER.size)
+            if len(header) != HEADER.size:
+                raise ValueError(f"Arquivo de filtro incompleto: {path}")
+            magic, size_bits, hash_count, count, capacity, watermark = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"Arquivo não é um filtro de códigos: {path}")
+            bits = bytearray(filter_file.read())
+        if len(bits) != (size_bits + 7) // 8:
+            raise ValueError(f"Arquivo de filtro truncado: {path}")
+        bloom = cls(size_bits, hash_count, bits)
+        bloom.count = count
+        return bloom, capacity, datetime.fromtimestamp(watermark) if watermark else None
+
+
+class ShortCodeFilter:
+    """
+    Mantém um BloomFilter com todos os códigos do armazenamento
+
+    O filtro é construído numa thread de fundo lendo apenas o código e o
+    momento da gravação em streaming (ou carregado do disco, quando há um
+    arquivo), e depois atualizado a cada 'refresh_interval' segundos só com os
+    códigos gravados desde a última leitura. Enquanto não está pronto, ou se o
+    armazenamento falhar, might_exist() responde True e nada é bloqueado.
+
+    Um código recém-criado por outro processo pode ainda não estar no filtro:
+    antes de responder "não existe", a atualização incremental é antecipada,
+    e só uma leitura iniciada depois da chegada da consulta confirma a
+    ausência. Consultas simultâneas aproveitam a mesma leitura, então uma
+    varredura aleatória gera uma atualização de cada vez, não uma consulta por
+    código. Sem essa confirmação (atualização longa ou com erro), a consulta
+    segue para o banco: um link novo nunca recebe 404.
+
+    Os links são criados por outros processos (aplicativo, importação em
+    lote), então o filtro não é avisado das gravações: ele as encontra pela
+    marca d'água na atualização periódica ou antecipada.
+    """
+
+    def __init__(self, storage, capacity: int = 1_000_000, error_rate: float = 0.01,
+                 max_bytes: Optional[int] = None, path: Optional[str] = None, refresh_interval: float = 5.0):
+        self.storage = storage
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_bytes = max_bytes
+        self.path = path
+        self.refresh_interval = refresh_interval
+
+        self._filter: Optional[BloomFilter] = None
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.Lock()  # Serializa construção/atualização (leituras não usam lock)
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+        self.rejected = 0
+        self.passed = 0
+        self.refresh_errors = 0
+        self.last_refresh: Optional[float] = None
+        self._read_started = 0.0  # time.monotonic() do início da leitura mais recente já incluída
+
+    @classmethod
+    def from_env(cls, storage) -> Optional['ShortCodeFilter']:
+        """
+        Cria o filtro a partir das variáveis de ambiente
+
+        Args:
+            storage (StorageBackend): Armazenamento com os códigos existentes
+
+        Returns:
+            Optional[ShortCodeFilter]: Filtro configurado ou None se estiver desativado
+        """
+        if os.getenv('BLOOM_ENABLED', 'true').strip().lower() not in ('1', 'true', 'yes', 'on'):
+            return None
+        max_bytes = int(os.getenv('BLOOM_MAX_BYTES', 0)) or None
+        return cls(
+            storage,
+            capacity=int(os.getenv('BLOOM_CAPACITY', 1_000_000)),
+            error_rate=float(os.getenv('BLOOM_ERROR_RATE', 0.01)),
+            max_bytes=max_bytes,
+            path=os.getenv('BLOOM_PATH', '').strip() or None,
+            refresh_interval=float(os.getenv('BLOOM_REFRESH_SECONDS', 5)),
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    def might_exist(self, short_code: str, recheck: bool = True) -> bool:
+        """
+        Indica se o código pode existir (False é definitivo)
+
+        Args:
+            short_code (str): Código curto
+            recheck (bool): Antecipa a atualização antes de responder False, o que consulta o
+                banco. Com False, quem chama deve confirmar com recheck()
+
+        Returns:
+            bool: False se o código com certeza não existe (ou, com recheck=False, se não está no filtro)
+        """
+        self._ensure_started()
+        bloom = self._filter
+        if bloom is None or short_code in bloom:
+            self.passed += 1
+            return True
+        return self.recheck(short_code) if recheck else False
+
+    def recheck(self, short_code: str) -> bool:
+        """
+        Confirma um código ausente do filtro, antecipando a atualização incremental (bloqueante)
+
+        Args:
+            short_code (str): Código que might_exist(recheck=False) não encontrou
+
+        Returns:
+            bool: False se o código com certeza não existe
+        """
+        if self._recheck(short_code):
+            self.passed += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def _recheck(self, short_code: str) -> bool:
+        arrived = time.monotonic()
+        if not self._lock.acquire(timeout=RECHECK_WAIT):
+            return True  # Reconstrução demorada em andamento: o banco responde
+        try:
+            # Uma leitura iniciada enquanto esta consulta esperava já vale como confirmação
+            if self._read_started <= arrived:
+                self._refresh_locked()
+        except Exception:
+            # Sem como confirmar, deixa a consulta seguir para o banco
+            self.refresh_errors += 1
+            return True
+        finally:
+            self._lock.release()
+        return short_code in self._filter
+
+    def _ensure_started(self):
+        # Também reinicia a thread em processos filhos criados por fork
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='bloom-refresher', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+
+    def start(self):
+        """Inicia a construção e a atualização periódica do filtro em segundo plano"""
+        self._ensure_started()
+
+    def _run(self):
+        if self._filter is None and self.path and os.path.exists(self.path):
+            self.load()
+        while not self._stop.is_set():
+            try:
+                if not self.storage.is_connected():
+                    pass  # A conexão é (re)estabelecida por quem usa o armazenamento
+                elif self._filter is None:
+                    self.rebuild()
+                else:
+                    self.refresh()
+            except Exception as e:
+                # Armazenamento indisponível: tenta de novo no próximo ciclo
+                self.refresh_errors += 1
+                logger.error("Erro ao atualizar o filtro de códigos: %s", e)
+            self._stop.wait(self.refresh_interval)
+
+    def load(self) -> bool:
+        """
+        Carrega o filtro gravado em 'path' (a atualização seguinte busca só o que mudou)
+
+        Returns:
+            bool: True se carregou, False se o arquivo é inválido
+        """
+        try:
+            bloom, capacity, watermark = BloomFilter.load(self.path)
+        except (OSError, ValueError) as e:
+            logger.warning("Filtro de códigos ignorado: %s", e)
+            return False
+        with self._lock:
+            self.capacity = max(self.capacity, capacity)
+            self._watermark = watermark
+            self._filter = bloom
+        return True
+
+    def rebuild(self):
+        """Constrói um filtro novo com todos os códigos e substitui o atual de uma vez"""
+        with self._lock:
+            started = time.perf_counter()
+            read_started = time.monotonic()
+            bloom, watermark = self._build(None, None)
+            while bloom.count > self.capacity:
+                self.capacity *= 2
+                read_started = time.monotonic()
+                bloom, watermark = self._build(None, None)
+            self._filter, self._watermark = bloom, watermark
+            self.last_refresh = time.time()
+            self._read_started = read_started
+            self._save()
+        logger.info("Filtro de códigos construído: %d códigos em %.2fs", bloom.count, time.perf_counter() - started)
+
+    def refresh(self):
+        """Acrescenta ao filtro os códigos gravados desde a última leitura"""
+        with self._lock:
+            if self._filter is None:
+                return
+            self._refresh_locked()
+        if self._filter.count > self.capacity:
+            # Base maior que a capacidade configurada: redimensiona para manter a taxa de erro
+            self.rebuild()
+
+    def _refresh_locked(self):
+        read_started = time.monotonic()
+        since = self._watermark - REFRESH_OVERLAP if self._watermark else None
+        _, watermark = self._build(self._filter, since)
+        if watermark is not None:
+            self._watermark = watermark
+        self.last_refresh = time.time()
+        self._read_started = read_started
+
+    def _build(self, bloom: Optional[BloomFilter], since: Optional[datetime]):
+        if bloom is None:
+            bloom = BloomFilter.for_capacity(self.capacity, self.error_rate, self.max_bytes)
+        watermark = self._watermark if since is not None else None
+        for short_code, inserted_at in self.storage.iter_codes(since):
+            bloom.add(short_code)
+            if watermark is None or inserted_at > watermark:
+                watermark = inserted_at
+        return bloom, watermark
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            self._filter.save(self.path, self.capacity, self._watermark)
+        except OSError as e:
+            logger.error("Erro ao gravar o filtro de códigos: %s", e)
+
+    def stop(self):
+        """Encerra a thread de atualização e grava o filtro, se houver caminho configurado"""
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.refresh_interval + 5)
+        with self._lock:
+            if self._filter is not None:
+                self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna o estado e os contadores do filtro"""
+        bloom = self._filter
+        stats = {
+            'enabled': True,
+            'ready': bloom is not None,
+            'capacity': self.capacity,
+            'target_error_rate': self.error_rate,
+            'rejected': self.rejected,
+            'passed': self.passed,
+            'refresh_errors': self.refresh_errors,
+            'last_refresh': self.last_refresh,
+            'path': self.path,
+        }
+        if bloom is not None:
+            stats.update(
+                codes=bloom.count,
+                size_bytes=len(bloom.bits),
+                hash_count=bloom.hash_count,
+                expected_error_rate=bloom.expected_error_rate(),
+            )
+        return stats
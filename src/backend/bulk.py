@@ -0,0 +1,398 @@
+"""
+Módulo de importação e exportação em lote dos links (CSV e JSONL)
+
+A importação é um pipeline de geradores: leitura → validação/normalização →
+deduplicação → gravação em lote não ordenada. Só um lote fica em memória por
+vez, então o consumo não depende do tamanho do arquivo. Depois de cada lote
+gravado, a posição no arquivo é salva num checkpoint, e uma importação
+interrompida continua de onde parou.
+
+Registros com 'short_url' mantêm o código (migração de um catálogo
+existente) e são deduplicados pelo código; os demais ganham um código novo e
+são deduplicados pela URL, como em shorten_url (links com expiração sem
+código sempre ganham um código novo, também como em shorten_url).
+"""
+import csv
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .redirects import expiry_timestamp, parse_redirect_status
+from .storage import DuplicateCodeError, StorageBackend
+from .validators import URLValidator, url_digest
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'jsonl')
+EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+# Colunas exportadas (e aceitas na importação)
+EXPORT_FIELDS = ('short_url', 'original_url', 'created_at', 'redirect_status', 'expires_at', 'clicks')
+
+# Nomes aceitos para a coluna da URL original
+URL_FIELDS = ('original_url', 'url')
+
+ERROR_NO_URL = "Registro sem URL ('original_url' ou 'url')"
+
+
+def detect_format(path: str) -> str:
+    """
+    Deduz o formato pela extensão do arquivo
+
+    Args:
+        path (str): Caminho do arquivo
+
+    Returns:
+        str: 'csv' ou 'jsonl'
+
+    Raises:
+        ValueError: Se a extensão não for reconhecida
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXTENSIONS:
+        raise ValueError(f"Formato não reconhecido para '{path}' (use .csv, .jsonl ou informe --format)")
+    return EXTENSIONS[extension]
+
+
+class _LineSource:
+    """Linhas de um arquivo binário, decodificadas, com a posição em bytes após a última lida"""
+
+    def __init__(self, handle: BinaryIO):
+        self.handle = handle
+        self.offset = handle.tell()
+
+    def seek(self, offset: int):
+        self.handle.seek(offset)
+        self.offset = offset
+
+    def __iter__(self) -> Iterator[str]:
+        for line in iter(self.handle.readline, b''):
+            self.offset += len(line)
+            yield line.decode('utf-8-sig' if self.offset == len(line) else 'utf-8')
+
+
+def read_records(handle: BinaryIO, file_format: str, offset: int = 0) -> Iterator[Tuple[Optional[Dict[str, Any]], int]]:
+    """
+    Lê os registros de um arquivo CSV (com cabeçalho) ou JSONL, um por vez
+
+    Args:
+        handle (BinaryIO): Arquivo aberto em modo binário
+        file_format (str): 'csv' ou 'jsonl'
+        offset (int): Posição em bytes de onde continuar (checkpoint)
+
+    Returns:
+        Iterator[Tuple[Optional[Dict[str, Any]], int]]: (registro ou None se ilegível,
+        posição em bytes logo após o registro)
+    """
+    source = _LineSource(handle)
+    if file_format == 'csv':
+        # O csv consome só as linhas de cada registro, então a posição fica exata
+        reader = csv.reader(source)
+        header = next(reader, None)
+        if header is None:
+            return
+        header = [name.strip() for name in header]
+        if offset > source.offset:
+            source.seek(offset)
+        for row in reader:
+            if not any(row):
+                continue
+            yield dict(zip(header, row)), source.offset
+        return
+
+    source.seek(offset)
+    for line in source:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if isinstance(record, str):
+            record = {'original_url': record}
+        yield (record if isinstance(record, dict) else None), source.offset
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+
+
+def _parse_clicks(value: Any) -> int:
+    if value is None or value == '':
+        return 0
+    try:
+        clicks = int(value)
+    except (TypeError, ValueError):
+        clicks = -1
+    if clicks < 0:
+        raise ValueError(f"Quantidade de cliques inválida: {value}")
+    return clicks
+
+
+def parse_record(record: Optional[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Extrai os campos de um registro de importação
+
+    Args:
+        record (Optional[Dict[str, Any]]): Registro lido do arquivo
+
+    Returns:
+        Tuple[Optional[Dict[str, Any]], str]: (campos, mensagem_erro); campos é None se o registro for inválido
+    """
+    if record is None:
+        return None, "Registro ilegível"
+    url = next((record[field] for field in URL_FIELDS if record.get(field)), None)
+    if not isinstance(url, str):
+        return None, ERROR_NO_URL
+    try:
+        expires_at = _parse_datetime(record.get('expires_at'))
+        created_at = _parse_datetime(record.get('created_at'))
+        redirect_status = parse_redirect_status(record.get('redirect_status'))
+        clicks = _parse_clicks(record.get('clicks'))
+    except (TypeError, ValueError) as e:
+        return None, str(e)
+
+    # Mesmas convenções de shorten_url: expiração em UTC, criação em hora local sem fuso
+    if expires_at is not None:
+        expires_at = expires_at.astimezone(timezone.utc)
+    if created_at is not None and created_at.tzinfo is not None:
+        created_at = created_at.astimezone().replace(tzinfo=None)
+    return {
+        'original_url': url,
+        'short_url': str(record.get('short_url') or '').strip() or None,
+        'redirect_status': redirect_status,
+        'expires_at': expires_at,
+        'created_at': created_at,
+        'clicks': clicks,
+    }, ""
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Agrupa os itens em listas de até 'size' elementos"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BulkImporter:
+    """Importação em lote com checkpoint por lote"""
+
+    COUNTERS = ('read', 'imported', 'existing', 'invalid', 'expired', 'failed')
+
+    def __init__(self, shortener, batch_size: int = 1000, checkpoint_path: Optional[str] = None):
+        self.shortener = shortener
+        self.storage: StorageBackend = shortener.storage
+        self.batch_size = max(1, batch_size)
+        self.checkpoint_path = checkpoint_path
+        self.stats = dict.fromkeys(self.COUNTERS, 0)
+
+    def _load_checkpoint(self, source: str) -> int:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        if checkpoint.get('source') != source:
+            logger.warning("Checkpoint '%s' é de outro arquivo; importando desde o início", self.checkpoint_path)
+            return 0
+        self.stats.update({name: checkpoint.get('stats', {}).get(name, 0) for name in self.COUNTERS})
+        return int(checkpoint.get('offset', 0))
+
+    def _save_checkpoint(self, source: str, offset: int):
+        if not self.checkpoint_path:
+            return
+        # Escrita atômica: uma interrupção no meio não corrompe o checkpoint anterior
+        temporary_path = f"{self.checkpoint_path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump({'source': source, 'offset': offset, 'stats': self.stats}, checkpoint_file)
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def _validate(self, records: List[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        # Etapa 2: campos, validação/normalização (validate_many) e expiração
+        parsed = []
+        for record in records:
+            fields, _ = parse_record(record)
+            if fields is None:
+                self.stats['invalid'] += 1
+            else:
+                parsed.append(fields)
+
+        now = datetime.now(timezone.utc)
+        valid = []
+        results = URLValidator.validate_many([fields['original_url'] for fields in parsed])
+        for fields, (is_valid, _, normalized_url) in zip(parsed, results):
+            if not is_valid:
+                self.stats['invalid'] += 1
+            elif fields['expires_at'] is not None and fields['expires_at'] <= now:
+                self.stats['expired'] += 1
+            else:
+                fields['original_url'] = normalized_url
+                fields['url_hash'] = url_digest(normalized_url)
+                valid.append(fields)
+        return valid
+
+    def _dedupe(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Etapa 3: códigos repetidos no lote; URLs repetidas no lote ou já encurtadas no banco
+        codes = set()
+        hashes: Dict[bytes, Dict[str, Any]] = {}
+        unique = []
+        for fields in items:
+            if fields['short_url']:
+                if fields['short_url'] in codes:
+                    self.stats['existing'] += 1
+                    continue
+                codes.add(fields['short_url'])
+            elif fields['expires_at'] is None:
+                if fields['url_hash'] in hashes:
+                    self.stats['existing'] += 1
+                    continue
+                hashes[fields['url_hash']] = fields
+            unique.append(fields)
+
+        if hashes:
+            shortened = {document['url_hash'] for document in self.storage.find_by_url_hashes(list(hashes))}
+            if shortened:
+                self.stats['existing'] += len(shortened)
+                unique = [fields for fields in unique if fields['short_url'] or fields['url_hash'] not in shortened]
+        return unique
+
+    def _document(self, fields: Dict[str, Any], attempt: int, now: datetime) -> Dict[str, Any]:
+        created_at = fields['created_at'] or now
+        document = {
+            'original_url': fields['original_url'],
+            'url_hash': fields['url_hash'],
+            'short_url': fields['short_url'] or self.shortener.generate_short_code(f"{fields['original_url']}-{attempt}"),
+            'created_at': created_at,
+            'created_timestamp': int(created_at.timestamp()),
+        }
+        if fields['redirect_status'] is not None:
+            document['redirect_status'] = fields['redirect_status']
+        if fields['expires_at'] is not None:
+            document['expires_at'] = fields['expires_at']
+        if fields['clicks']:
+            document['clicks'] = fields['clicks']  # Cliques de uma exportação anterior
+        return document
+
+    def _write(self, items: List[Dict[str, Any]]):
+        # Etapa 4: inserção não ordenada; colisões de códigos gerados são refeitas
+        pending = items
+        for attempt in range(self.shortener.max_insert_attempts):
+            if not pending:
+                return
+            now = datetime.now()
+            documents = [self._document(fields, attempt, now) for fields in pending]
+            failures = self.storage.insert_many(documents)
+            retry = []
+            for index, fields in enumerate(pending):
+                error = failures.get(index)
+                if error is None:
+                    self.stats['imported'] += 1
+                elif not isinstance(error, DuplicateCodeError):
+                    self.stats['failed'] += 1
+                elif fields['short_url']:
+                    self.stats['existing'] += 1 # Código já gravado (ex.: lote repetido ao retomar)
+                else:
+                    retry.append(fields)
+            pending = retry
+        self.stats['failed'] += len(pending)
+
+    def run(self, path: str, file_format: Optional[str] = None,
+            progress: Optional[Callable[[Dict[str, int], float], None]] = None) -> Dict[str, Any]:
+        """
+        Importa um arquivo CSV ou JSONL, continuando do checkpoint se houver
+
+        Args:
+            path (str): Arquivo de entrada
+            file_format (Optional[str]): 'csv' ou 'jsonl' (padrão: pela extensão)
+            progress (Optional[Callable]): Chamada após cada lote com (contadores, segundos decorridos)
+
+        Returns:
+            Dict[str, Any]: Contadores finais, 'resumed_from' (bytes) e 'rows_per_second' desta execução
+
+        Raises:
+            StorageError: Se o banco falhar (o checkpoint guarda o último lote gravado)
+        """
+        file_format = file_format or detect_format(path)
+        source = os.path.abspath(path)
+        offset = self._load_checkpoint(source)
+        resumed_from = offset
+        read_before = self.stats['read']
+        started = time.perf_counter()
+
+        with open(path, 'rb') as handle:
+            for batch in batched(read_records(handle, file_format, offset), self.batch_size):
+                self.stats['read'] += len(batch)
+                self._write(self._dedupe(self._validate([record for record, _ in batch])))
+                self._save_checkpoint(source, batch[-1][1])
+                if progress is not None:
+                    progress(self.stats, time.perf_counter() - started)
+
+        elapsed = time.perf_counter() - started
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path) # Concluída: a próxima execução começa do zero
+        rows = self.stats['read'] - read_before
+        return dict(self.stats, resumed_from=resumed_from, seconds=elapsed,
+                    rows_per_second=rows / elapsed if elapsed else 0.0)
+
+
+def _export_row(document: Dict[str, Any]) -> Dict[str, Any]:
+    created_at = document.get('created_at')
+    expires_at = expiry_timestamp(document.get('expires_at'))
+    return {
+        'short_url': document['short_url'],
+        'original_url': document['original_url'],
+        'created_at': created_at.isoformat() if created_at is not None else None,
+        'redirect_status': document.get('redirect_status'),
+        'expires_at': datetime.fromtimestamp(expires_at, timezone.utc).isoformat() if expires_at is not None else None,
+        'clicks': document.get('clicks', 0),
+    }
+
+
+def export_links(storage: StorageBackend, path: str, file_format: Optional[str] = None, batch_size: int = 5000,
+                 progress: Optional[Callable[[int, float], None]] = None) -> int:
+    """
+    Exporta todos os links para CSV ou JSONL, lendo o banco por cursor com projeção
+
+    O arquivo é escrito ao lado do destino e renomeado ao final.
+
+    Args:
+        storage (StorageBackend): Armazenamento de origem (já conectado)
+        path (str): Arquivo de saída
+        file_format (Optional[str]): 'csv' ou 'jsonl' (padrão: pela extensão)
+        batch_size (int): Documentos lidos por ida ao banco
+        progress (Optional[Callable]): Chamada a cada lote com (linhas escritas, segundos decorridos)
+
+    Returns:
+        int: Quantidade de links exportados
+    """
+    file_format = file_format or detect_format(path)
+    started = time.perf_counter()
+    total = 0
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8', newline='') as output:
+        writer = csv.DictWriter(output, EXPORT_FIELDS) if file_format == 'csv' else None
+        if writer is not None:
+            writer.writeheader()
+        for document in storage.iter_documents(batch_size):
+            row = _export_row(document)
+            if writer is not None:
+                writer.writerow(row)
+            else:
+                output.write(json.dumps(row, ensure_ascii=False) + '\n')
+            total += 1
+            if progress is not None and total % batch_size == 0:
+                progress(total, time.perf_counter() - started)
+    os.replace(temporary_path, path)
+    if progress is not None:
+        progress(total, time.perf_counter() - started)
+    return total
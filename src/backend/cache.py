@@ -0,0 +1,371 @@
+"""
+Módulo de cache em memória para consultas de códigos curtos
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .redirects import RedirectTarget
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Cache LRU limitado, com expiração (TTL) por entrada e cache de resultados negativos"""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0, negative_ttl: float = 30.0):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Contadores para dimensionamento do cache
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> Optional['LRUCache']:
+        """
+        Cria o cache a partir das variáveis de ambiente
+
+        Returns:
+            Optional[LRUCache]: Cache configurado ou None se estiver desativado
+        """
+        if os.getenv('CACHE_ENABLED', 'true').strip().lower() not in ('1', 'true', 'yes', 'on'):
+            return None
+        return cls(
+            max_entries=int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+            ttl=float(os.getenv('CACHE_TTL_SECONDS', 300)),
+            negative_ttl=float(os.getenv('CACHE_NEGATIVE_TTL_SECONDS', 30)),
+        )
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Busca uma entrada no cache
+
+        Args:
+            key (str): Chave procurada
+
+        Returns:
+            Tuple[bool, Any]: (encontrada, valor). O valor None indica um resultado negativo em cache
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if value is None:
+                self.negative_hits += 1
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Armazena uma entrada no cache, removendo a menos usada se o limite for atingido
+
+        Args:
+            key (str): Chave da entrada
+            value (Any): Valor a ser armazenado (None para resultado negativo)
+            ttl (Optional[float]): Tempo de vida em segundos; usa o padrão do cache se omitido
+        """
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0:
+            return
+
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (value, expires_at)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: str):
+        """Remove uma entrada do cache, se existir"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna os contadores do cache
+
+        Returns:
+            Dict[str, Any]: Acertos, falhas, remoções e ocupação atual
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': True,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'negative_ttl_seconds': self.negative_ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'negative_hits': self.negative_hits,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+class _Flight:
+    """Consulta ao banco em andamento para um código, aguardada pelas requisições concorrentes"""
+
+    __slots__ = ('done', 'target', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.target: Optional[RedirectTarget] = None
+        self.error: Optional[Exception] = None
+
+
+class CachedURLLookup:
+    """
+    Camada de cache na frente de URLShortener.find_redirect_target
+
+    Duas camadas: o LRUCache do processo (L1) e, opcionalmente, a tabela
+    compartilhada pelos workers do host (L2, SharedCache). Um acerto no L2
+    preenche o L1 pelo tempo que ainda resta à entrada. Falhas simultâneas
+    para o mesmo código fazem uma única consulta ao banco (as demais esperam
+    o resultado dela).
+
+    Uma invalidação feita por qualquer processo descarta o L1 dos demais na
+    consulta seguinte (contador de invalidações do L2). Links removidos ficam
+    marcados para que o resolvedor também ignore as entradas do snapshot.
+    """
+
+    def __init__(self, url_shortener, cache: Optional[LRUCache], shared=None):
+        self.url_shortener = url_shortener
+        self.cache = cache
+        self.shared = shared
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._deleted: Set[str] = set()  # Removidos por este processo (sem L2 para guardar a marca)
+        self._invalidations = shared.invalidations() if shared is not None else 0
+
+        # Consultas que aproveitaram a de outra requisição em vez de ir ao banco
+        self.coalesced = 0
+
+    def find_target(self, short_code: str) -> Optional[RedirectTarget]:
+        """
+        Recupera o destino do redirecionamento consultando o cache antes do banco, propagando erros de banco
+
+        Links com expiração ficam no cache no máximo até expirar.
+
+        Args:
+            short_code (str): Código curto
+
+        Returns:
+            Optional[RedirectTarget]: Destino com os metadados de cache ou None se não encontrado
+
+        Raises:
+            StorageError: Se o banco não estiver disponível (o resultado não é cacheado)
+        """
+        found, target = self.peek(short_code)
+        if found:
+            return target
+
+        with self._flights_lock:
+            flight = self._flights.get(short_code)
+            leader = flight is None
+            if leader:
+                flight = self._flights[short_code] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.target
+
+        try:
+            target = self.url_shortener.find_redirect_target(short_code)
+            self.remember(short_code, target)
+            flight.target = target
+            return target
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[short_code]
+            flight.done.set()
+
+    def peek(self, short_code: str) -> Tuple[bool, Optional[RedirectTarget]]:
+        """
+        Consulta só o cache, descartando destinos que já expiraram
+
+        Args:
+            short_code (str): Código curto
+
+        Returns:
+            Tuple[bool, Optional[RedirectTarget]]: (encontrado no cache, destino ou None para resultado negativo)
+        """
+        if self.cache is not None:
+            if self.shared is not None:
+                self._sync_invalidations()
+            found, target = self.cache.get(short_code)
+            if found:
+                if target is not None and target.is_expired():
+                    self.cache.invalidate(short_code)
+                    return True, None
+                return True, target
+
+        if self.shared is not None:
+            found, entry = self.shared.get(short_code)
+            if found:
+                target, valid_until = entry
+                if target is not None and target.is_expired():
+                    return True, None
+                if self.cache is not None:
+                    ttl = self.cache.negative_ttl if target is None else self.cache.ttl
+                    self.cache.set(short_code, target, min(ttl, valid_until - time.time()))
+                return True, target
+        return False, None
+
+    def _sync_invalidations(self):
+        # Outro processo invalidou um código: a cópia dele no L1 deste processo pode estar velha
+        invalidations = self.shared.invalidations()
+        if invalidations != self._invalidations:
+            self._invalidations = invalidations
+            self.cache.clear()
+
+    def remember(self, short_code: str, target: Optional[RedirectTarget]):
+        """
+        Guarda o resultado de uma consulta ao banco, limitado ao tempo de vida do link
+
+        Args:
+            short_code (str): Código curto
+            target (Optional[RedirectTarget]): Destino encontrado ou None (resultado negativo)
+        """
+        if target is not None:
+            self._deleted.discard(short_code)  # Código recriado depois de removido
+        for cache in (self.cache, self.shared):
+            if cache is None:
+                continue
+            ttl = None
+            if target is not None and target.expires_at is not None:
+                ttl = min(cache.ttl, target.expires_at - time.time())
+            cache.set(short_code, target, ttl)
+
+    def warm(self, short_codes: List[str], batch_size: int = 500) -> int:
+        """
+        Carrega no cache os destinos dos códigos informados, em consultas em lote ao banco
+
+        Args:
+            short_codes (List[str]): Códigos a carregar (ex.: os mais acessados, HotSet.load())
+            batch_size (int): Códigos por consulta
+
+        Returns:
+            int: Quantidade de destinos carregados
+
+        Raises:
+            StorageError: Se o banco não estiver disponível
+        """
+        warmed = 0
+        for start in range(0, len(short_codes), batch_size):
+            targets = self.url_shortener.find_redirect_targets(short_codes[start:start + batch_size])
+            for short_code, target in targets.items():
+                self.remember(short_code, target)
+            warmed += len(targets)
+        return warmed
+
+    def find_original_url(self, short_code: str) -> Optional[str]:
+        """
+        Recupera a URL original consultando o cache antes do banco, propagando erros de banco
+
+        Args:
+            short_code (str): Código curto
+
+        Returns:
+            Optional[str]: URL original ou None se não encontrada
+
+        Raises:
+            StorageError: Se o banco não estiver disponível (o resultado não é cacheado)
+        """
+        target = self.find_target(short_code)
+        return target.original_url if target is not None else None
+
+    def get_original_url(self, short_code: str) -> Optional[str]:
+        """
+        Recupera a URL original consultando o cache antes do banco de dados
+
+        Args:
+            short_code (str): Código curto
+
+        Returns:
+            Optional[str]: URL original ou None se não encontrada
+        """
+        if self.cache is None and self.shared is None:
+            return self.url_shortener.get_original_url(short_code)
+
+        try:
+            return self.find_original_url(short_code)
+        except Exception as e:
+            # Falhas do banco não são cacheadas, para não gerar 404 falsos
+            logger.error("Erro ao consultar URL original para o cache: %s", e)
+            return None
+
+    def invalidate(self, short_code: str, deleted: bool = False):
+        """
+        Descarta o código do cache deste processo e da tabela compartilhada
+
+        Os outros processos que usam a mesma tabela descartam o próprio L1 na
+        próxima consulta.
+
+        Args:
+            short_code (str): Código curto
+            deleted (bool): O link foi removido do banco: marca o código para que nem o snapshot o atenda
+        """
+        if deleted:
+            self._deleted.add(short_code)
+        if self.cache is not None:
+            self.cache.invalidate(short_code)
+        if self.shared is not None:
+            self.shared.invalidate(short_code, deleted)
+
+    def is_deleted(self, short_code: str) -> bool:
+        """
+        Indica se o link foi removido por este processo ou, pela marca no L2, por outro do host
+
+        Args:
+            short_code (str): Código curto (ex.: encontrado no snapshot)
+
+        Returns:
+            bool: True se o código não deve mais ser atendido
+        """
+        if short_code in self._deleted:
+            return True
+        # Sem nenhuma invalidação na tabela não há marca a procurar
+        return self.shared is not None and self.shared.invalidations() > 0 and self.shared.is_deleted(short_code)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna os contadores do cache do processo (L1) e, em 'l2', os da tabela compartilhada"""
+        stats = self.cache.stats() if self.cache is not None else {'enabled': False}
+        stats['coalesced'] = self.coalesced
+        stats['l2'] = self.shared.stats() if self.shared is not None else {'enabled': False}
+        return stats
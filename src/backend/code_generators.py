@@ -0,0 +1,109 @@
+"""
+Módulo de estratégias de geração de códigos curtos
+"""
+import hashlib
+import os
+import threading
+import time
+
+BASE62_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+def base62_encode(number: int) -> str:
+    """
+    Converte um inteiro não negativo para base62
+
+    Args:
+        number (int): Número a ser convertido
+
+    Returns:
+        str: Representação em base62
+    """
+    if number == 0:
+        return BASE62_ALPHABET[0]
+    digits = []
+    while number:
+        number, remainder = divmod(number, 62)
+        digits.append(BASE62_ALPHABET[remainder])
+    return ''.join(reversed(digits))
+
+
+class ShortCodeGenerator:
+    """Interface base para as estratégias de geração de códigos curtos"""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    def generate(self, original_url: str) -> str:
+        """
+        Gera um código curto para a URL
+
+        Args:
+            original_url (str): URL original (ou variação dela, em novas tentativas)
+
+        Returns:
+            str: Código curto com prefixo
+        """
+        raise NotImplementedError
+
+
+class MD5CodeGenerator(ShortCodeGenerator):
+    """Estratégia original: MD5 de URL + timestamp, truncado em 8 caracteres hexadecimais"""
+
+    def generate(self, original_url: str) -> str:
+        # Cria um hash baseado na URL original e timestamp
+        timestamp = str(int(time.time()))
+        hash_input = f"{original_url}{timestamp}"
+
+        # Gera hash MD5 e pega os primeiros 8 caracteres
+        hash_hex = hashlib.md5(hash_input.encode()).hexdigest()[:8]
+        return f"{self.prefix}{hash_hex}"
+
+
+class Base62CounterGenerator(ShortCodeGenerator):
+    """
+    Estratégia por contador: cada processo reserva blocos de IDs no banco com uma
+    única operação atômica (find_one_and_update no MongoDB) e gera os códigos
+    localmente em base62. Códigos gerados por processos diferentes nunca colidem.
+    """
+
+    def __init__(self, prefix: str, storage, block_size: int = 1000, counter_name: str = 'short_code'):
+        super().__init__(prefix)
+        self.storage = storage
+        self.block_size = max(1, block_size)
+        self.counter_name = counter_name
+        self._next_id = 0
+        self._block_end = 0
+        self._lock = threading.Lock()
+
+    def _reserve_block(self):
+        """Reserva o próximo bloco de IDs no contador do banco"""
+        self._next_id = self.storage.allocate_ids(self.counter_name, self.block_size)
+        self._block_end = self._next_id + self.block_size
+
+    def generate(self, original_url: str) -> str:
+        with self._lock:
+            if self._next_id >= self._block_end:
+                self._reserve_block()
+            code_id = self._next_id
+            self._next_id += 1
+        return f"{self.prefix}{base62_encode(code_id)}"
+
+
+def create_code_generator(prefix: str, storage) -> ShortCodeGenerator:
+    """
+    Cria a estratégia de geração configurada em SHORT_CODE_STRATEGY ('md5' ou 'counter')
+
+    Args:
+        prefix (str): Prefixo dos códigos curtos
+        storage (StorageBackend): Armazenamento usado na reserva de blocos do contador
+
+    Returns:
+        ShortCodeGenerator: Estratégia configurada
+    """
+    strategy = os.getenv('SHORT_CODE_STRATEGY', 'md5').strip().lower()
+    if strategy == 'md5':
+        return MD5CodeGenerator(prefix)
+    if strategy == 'counter':
+        return Base62CounterGenerator(prefix, storage, block_size=int(os.getenv('SHORT_CODE_BLOCK_SIZE', 1000)))
+    raise ValueError(f"Estratégia de geração de código desconhecida: {strategy}")
@@ -1,77 +1,337 @@
 """
 Módulo de configuração e conexão com MongoDB
 """
+import logging
 import os
-from typing import Optional
-from pymongo import MongoClient
+import random
+import threading
+from typing import Any, Dict, Optional
+from pymongo import MongoClient, ASCENDING, DESCENDING, HASHED
+from pymongo.errors import OperationFailure
 from pymongo.database import Database
 from pymongo.collection import Collection
-from dotenv import load_dotenv
+from pymongo.monitoring import ConnectionPoolListener
 
-# Carrega variáveis de ambiente
-load_dotenv('config.env')
+logger = logging.getLogger(__name__)
+
+class PoolStatsListener(ConnectionPoolListener):
+    """Contabiliza os eventos do pool de conexões do MongoClient (para /metrics)"""
+
+    def __init__(self):
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checked_out = 0
+        self.checked_in = 0
+        self.checkout_failures = 0
+        self.pool_cleared = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_in += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'open_connections': self.connections_created - self.connections_closed,
+            'in_use_connections': self.checked_out - self.checked_in,
+            'connections_created': self.connections_created,
+            'connections_closed': self.connections_closed,
+            'checkouts': self.checked_out,
+            'checkout_failures': self.checkout_failures,
+            'pool_cleared': self.pool_cleared,
+        }
 
 class DatabaseManager:
-    """Gerenciador de conexão com MongoDB"""
-    
+    """
+    Gerenciador de conexão com MongoDB
+
+    O MongoClient pertence ao processo que o criou: depois de um fork (ex.:
+    workers do gunicorn) o filho descarta o cliente herdado e cria o seu na
+    primeira consulta. Quando o banco fica inacessível o circuito abre:
+    get_collection() passa a retornar None imediatamente (as requisições
+    falham rápido) enquanto uma thread de fundo tenta reconectar com espera
+    exponencial, fechando o circuito quando o 'ping' volta a responder.
+    """
+
+    DISCONNECTED = 'disconnected'
+    CONNECTED = 'connected'
+    RECONNECTING = 'reconnecting'
+
     def __init__(self):
         self.client: Optional[MongoClient] = None
         self.database: Optional[Database] = None
         self.collection: Optional[Collection] = None
-        
+        self.pool_listener = PoolStatsListener()
+        self.state = self.DISCONNECTED
+        self.consecutive_failures = 0
+        self.reconnect_min_delay = float(os.getenv('MONGODB_RECONNECT_MIN_SECONDS', 0.5))
+        self.reconnect_max_delay = float(os.getenv('MONGODB_RECONNECT_MAX_SECONDS', 30))
+        self._indexes_ready = False
+        self._reset_process_state()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _reset_process_state(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reconnect_thread: Optional[threading.Thread] = None
+
+    def _after_fork(self):
+        # O cliente herdado do pai não é usado nem fechado aqui (seus sockets e threads são do pai)
+        self.client = None
+        self.database = None
+        self.collection = None
+        self.pool_listener = PoolStatsListener()
+        self._reset_process_state()
+
+    def _check_process(self):
+        # Alternativa a os.register_at_fork em plataformas sem suporte
+        if self._pid != os.getpid():
+            self._after_fork()
+
+    @staticmethod
+    def client_options() -> Dict[str, Any]:
+        """
+        Opções do pool e dos timeouts do MongoClient, lidas do config.env
+
+        Returns:
+            Dict[str, Any]: Argumentos nomeados para o MongoClient
+        """
+        return {
+            'maxPoolSize': int(os.getenv('MONGODB_MAX_POOL_SIZE', 100)),
+            'minPoolSize': int(os.getenv('MONGODB_MIN_POOL_SIZE', 0)),
+            'maxIdleTimeMS': int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', 60000)),
+            'serverSelectionTimeoutMS': int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 3000)),
+            'connectTimeoutMS': int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', 3000)),
+            'socketTimeoutMS': int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', 10000)),
+            'waitQueueTimeoutMS': int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', 2000)),
+        }
+
+    def _open_client(self):
+        # Cria o cliente deste processo (sem ida ao servidor: a conexão é feita na primeira operação)
+        mongo_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+        database_name = os.getenv('MONGODB_DATABASE', 'url_shortener')
+        collection_name = os.getenv('MONGODB_COLLECTION', 'urls')
+
+        self.client = MongoClient(mongo_uri, event_listeners=[self.pool_listener], **self.client_options())
+        self.database = self.client[database_name]
+        self.collection = self.database[collection_name]
+        self._pid = os.getpid()
+
+    def _close_client(self):
+        if self.client is not None:
+            self.client.close()
+        self.client = None
+        self.database = None
+        self.collection = None
+
+    def _try_connect(self):
+        # Abre o cliente, se preciso, e confirma com um 'ping' (fora do lock: pode levar o timeout inteiro)
+        with self._lock:
+            if self.client is None:
+                self._open_client()
+            client = self.client
+        client.admin.command('ping')
+        if not self._indexes_ready:
+            # Garante os índices usados nas consultas e na unicidade dos códigos
+            self.ensure_indexes()
+            self._indexes_ready = True
+        with self._lock:
+            self.state = self.CONNECTED
+
     def connect(self) -> bool:
         """
-        Estabelece conexão com MongoDB
-        
+        Estabelece conexão com MongoDB (bloqueia até o 'ping' responder ou expirar)
+
+        Em caso de falha, a reconexão continua em segundo plano.
+
         Returns:
             bool: True se conectou com sucesso, False caso contrário
         """
+        self._check_process()
         try:
-            # Obtém configurações do ambiente
-            mongo_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
-            database_name = os.getenv('MONGODB_DATABASE', 'url_shortener')
-            collection_name = os.getenv('MONGODB_COLLECTION', 'urls')
-            
-            # Conecta ao MongoDB
-            self.client = MongoClient(mongo_uri)
-            
-            # Testa a conexão
-            self.client.admin.command('ping')
-            
-            # Configura database e collection
-            self.database = self.client[database_name]
-            self.collection = self.database[collection_name]
-            
-            print(f"Conectado ao MongoDB: {database_name}.{collection_name}")
+            self._try_connect()
+            self.consecutive_failures = 0
+            logger.info("Conectado ao MongoDB: %s.%s", self.database.name, self.collection.name)
             return True
-            
+
         except Exception as e:
-            print(f"Erro ao conectar ao MongoDB: {e}")
+            logger.error("Erro ao conectar ao MongoDB: %s", e)
+            self.report_failure(e)
             return False
-    
+
+    def connect_in_background(self):
+        """Inicia a conexão (ou reconexão) numa thread de fundo, sem bloquear quem chamou"""
+        self._check_process()
+        with self._lock:
+            if self.state == self.CONNECTED:
+                return
+            self.state = self.RECONNECTING
+            self._ensure_reconnect_thread()
+
+    def report_failure(self, error: Exception):
+        """
+        Abre o circuito após uma falha de conexão e agenda a reconexão em segundo plano
+
+        Args:
+            error (Exception): Erro que indicou a falha (ex.: ServerSelectionTimeoutError)
+        """
+        self._check_process()
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state != self.RECONNECTING:
+                logger.warning("MongoDB indisponível, reconectando em segundo plano: %s", error)
+            self.state = self.RECONNECTING
+            self._ensure_reconnect_thread()
+
+    def _ensure_reconnect_thread(self):
+        # Executado com self._lock
+        if self._reconnect_thread is not None and self._reconnect_thread.is_alive():
+            return
+        self._stop.clear()
+        self._reconnect_thread = threading.Thread(target=self._reconnect_loop, name='mongo-reconnect', daemon=True)
+        self._reconnect_thread.start()
+
+    def _reconnect_loop(self):
+        delay = self.reconnect_min_delay
+        while not self._stop.wait(delay):
+            if self.state != self.RECONNECTING:
+                return
+            try:
+                self._try_connect()
+            except Exception:
+                self.consecutive_failures += 1
+            else:
+                logger.info("Reconectado ao MongoDB após %d falha(s)", self.consecutive_failures)
+                self.consecutive_failures = 0
+                return
+            # Espera exponencial com variação aleatória, para os workers não tentarem juntos
+            delay = min(self.reconnect_max_delay, delay * 2) * random.uniform(0.8, 1.2)
+
+    def ensure_indexes(self):
+        """
+        Cria (se ainda não existirem) os índices da collection de URLs:
+        único em 'short_url', hashed em 'url_hash' (deduplicação por resumo
+        de tamanho fixo, em vez de indexar a URL inteira), composto em
+        ('created_at', 'short_url') para a paginação do histórico e TTL em
+        'expires_at' (o próprio MongoDB remove os links expirados; documentos
+        sem o campo nunca expiram).
+
+        Falhas não impedem a conexão (ex.: códigos duplicados já gravados
+        impedem o índice único), apenas são reportadas; cada índice é criado
+        independentemente dos demais.
+        """
+        if self.collection is None:
+            return
+        indexes = (
+            ([('short_url', ASCENDING)], {'unique': True, 'name': 'short_url_unique'}),
+            ([('url_hash', HASHED)], {'name': 'url_hash_hashed'}),
+            ([('created_at', DESCENDING), ('short_url', DESCENDING)], {'name': 'created_at_short_url'}),
+            ([('expires_at', ASCENDING)], {'expireAfterSeconds': 0, 'sparse': True, 'name': 'expires_at_ttl'}),
+        )
+        created = set()
+        for keys, options in indexes:
+            try:
+                self.collection.create_index(keys, **options)
+                created.add(options['name'])
+            except Exception as e:
+                logger.warning("Não foi possível criar o índice '%s' no MongoDB: %s", options['name'], e)
+        if 'url_hash_hashed' not in created:
+            return
+        try:
+            # Substituído pelo índice de 'url_hash'
+            self.collection.drop_index('original_url')
+        except OperationFailure:
+            pass
+
     def disconnect(self):
         """Fecha conexão com MongoDB"""
-        if self.client:
-            self.client.close()
-            print("Conexão com MongoDB fechada")
+        self._check_process()
+        self._stop.set()
+        with self._lock:
+            was_open = self.client is not None
+            self._close_client()
+            self.state = self.DISCONNECTED
+        if was_open:
+            logger.info("Conexão com MongoDB fechada")
     
     def get_collection(self) -> Optional[Collection]:
         """
-        Retorna a collection configurada
+        Retorna a collection configurada (criando o cliente deste processo, se preciso)
         
         Returns:
-            Collection: Collection do MongoDB ou None se não conectado
+            Collection: Collection do MongoDB ou None se não conectado ou com o circuito aberto
         """
+        self._check_process()
+        if self.state != self.CONNECTED:
+            return None
+        if self.collection is None:
+            with self._lock:
+                if self.collection is None:
+                    self._open_client()
         return self.collection
     
+    def get_counters_collection(self) -> Optional[Collection]:
+        """
+        Retorna a collection de contadores (usada na reserva de blocos de IDs)
+
+        Returns:
+            Collection: Collection do MongoDB ou None se não conectado
+        """
+        if self.get_collection() is None:
+            return None
+        return self.database[os.getenv('MONGODB_COUNTERS_COLLECTION', 'counters')]
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Retorna as estatísticas do pool de conexões
+
+        Returns:
+            Dict[str, Any]: Conexões abertas/em uso, checkouts, falhas e estado do circuito
+        """
+        stats = self.pool_listener.stats()
+        stats['max_pool_size'] = self.client_options()['maxPoolSize']
+        stats['circuit_open'] = int(self.state == self.RECONNECTING)
+        stats['consecutive_failures'] = self.consecutive_failures
+        return stats
+
     def is_connected(self) -> bool:
         """
         Verifica se está conectado ao MongoDB
         
         Returns:
-            bool: True se conectado, False caso contrário
+            bool: True se conectado, False caso contrário (inclusive durante a reconexão)
         """
-        return self.client is not None and self.collection is not None
+        return self.state == self.CONNECTED
 
 # Instância global do gerenciador de banco
 db_manager = DatabaseManager() 
\ No newline at end of file
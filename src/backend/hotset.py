@@ -0,0 +1,197 @@
+"""
+Módulo do conjunto de códigos mais acessados (hot set), usado para aquecer o cache
+
+Cada redirecionamento soma um acerto ao código; uma thread de fundo envelhece
+as pontuações (média com decaimento exponencial) e grava periodicamente os N
+códigos mais acessados num arquivo local. Na partida, o servidor lê o arquivo
+e carrega esses códigos no cache com uma consulta em lote, antes de aceitar
+tráfego.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Quantos códigos a mais que 'size' são acompanhados, para um código em ascensão entrar no ranking
+TRACKED_FACTOR = 4
+
+
+class HotSet:
+    """
+    Ranking dos códigos por frequência recente de acessos, persistido em disco
+
+    record() apenas incrementa um contador local. A cada 'save_interval'
+    segundos as pontuações são multiplicadas por 'decay' e somadas aos acessos
+    do período; os 'size' primeiros vão para 'path' (arquivo temporário e troca
+    atômica). Com vários workers, cada um grava o próprio ranking no mesmo
+    arquivo e vale o último, o que basta para uma amostra do tráfego.
+    """
+
+    def __init__(self, path: str, size: int = 1000, save_interval: float = 60.0, decay: float = 0.5,
+                 warmup_batch_size: int = 500):
+        self.path = path
+        self.size = max(1, size)
+        self.save_interval = save_interval
+        self.decay = decay
+        self.warmup_batch_size = max(1, warmup_batch_size)
+        self._window: Counter = Counter()
+        self._scores: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+        self.saves = 0
+        self.save_errors = 0
+        self.last_save: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> Optional['HotSet']:
+        """
+        Cria o ranking a partir das variáveis de ambiente
+
+        Returns:
+            Optional[HotSet]: Ranking configurado ou None se estiver desativado (ou sem HOTSET_PATH)
+        """
+        if os.getenv('HOTSET_ENABLED', 'true').strip().lower() not in ('1', 'true', 'yes', 'on'):
+            return None
+        path = os.getenv('HOTSET_PATH', '').strip()
+        if not path:
+            return None
+        return cls(
+            path,
+            size=int(os.getenv('HOTSET_SIZE', 1000)),
+            save_interval=float(os.getenv('HOTSET_SAVE_INTERVAL_SECONDS', 60)),
+            decay=float(os.getenv('HOTSET_DECAY', 0.5)),
+            warmup_batch_size=int(os.getenv('HOTSET_WARMUP_BATCH_SIZE', 500)),
+        )
+
+    def record(self, short_code: str):
+        """
+        Registra um acesso ao código (sem I/O)
+
+        Args:
+            short_code (str): Código curto acessado
+        """
+        with self._lock:
+            self._window[short_code] += 1
+
+    def _ensure_started(self):
+        # Também reinicia a thread em processos filhos criados por fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # O ranking herdado do processo pai continua valendo; os acessos não
+                self._window = Counter()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='hotset-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+
+    def start(self):
+        """Inicia a gravação periódica do ranking em segundo plano"""
+        self._ensure_started()
+
+    def _run(self):
+        while not self._stop.wait(self.save_interval):
+            self.save()
+
+    def _update(self):
+        with self._lock:
+            window, self._window = self._window, Counter()
+        if not window and not self._scores:
+            return
+        scores = {code: score * self.decay for code, score in self._scores.items()}
+        for code, hits in window.items():
+            scores[code] = scores.get(code, 0.0) + hits
+        tracked = self.size * TRACKED_FACTOR
+        if len(scores) > tracked:
+            scores = dict(sorted(scores.items(), key=lambda item: item[1], reverse=True)[:tracked])
+        self._scores = scores
+
+    def top(self) -> List[str]:
+        """
+        Returns:
+            List[str]: Os 'size' códigos de maior pontuação, do mais acessado para o menos
+        """
+        ranking = sorted(self._scores.items(), key=lambda item: item[1], reverse=True)
+        return [code for code, _ in ranking[:self.size]]
+
+    def save(self):
+        """Atualiza as pontuações com os acessos do período e grava o ranking em disco"""
+        self._update()
+        if not self._scores:
+            return  # Nada acessado ainda: mantém o arquivo de uma execução anterior
+        codes = self.top()
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, 'w', encoding='utf-8') as hotset_file:
+                json.dump({'saved_at': time.time(), 'codes': codes}, hotset_file)
+            os.replace(temporary_path, self.path)
+        except OSError as e:
+            self.save_errors += 1
+            logger.error("Erro ao gravar os códigos mais acessados: %s", e)
+            return
+        self.saves += 1
+        self.last_save = time.time()
+
+    def load(self) -> List[str]:
+        """
+        Lê o ranking gravado por uma execução anterior
+
+        Os códigos lidos entram nas pontuações com peso menor que um acesso, na
+        ordem do arquivo: uma execução curta não apaga o ranking anterior, que
+        perde peso a cada gravação.
+
+        Returns:
+            List[str]: Códigos do arquivo (vazio se não existir ou for inválido)
+        """
+        try:
+            with open(self.path, encoding='utf-8') as hotset_file:
+                codes = json.load(hotset_file)['codes']
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Arquivo de códigos mais acessados ignorado: %s", e)
+            return []
+        if not isinstance(codes, list):
+            return []
+        codes = [code for code in codes if isinstance(code, str)][:self.size]
+        if not self._scores:
+            self._scores = {code: 1 - rank / len(codes) for rank, code in enumerate(codes)}
+        return codes
+
+    def stop(self):
+        """Encerra a thread de fundo e grava o ranking atual"""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna o estado do ranking"""
+        with self._lock:
+            pending_codes = len(self._window)
+        return {
+            'enabled': True,
+            'path': self.path,
+            'size': self.size,
+            'tracked_codes': len(self._scores),
+            'pending_codes': pending_codes,
+            'saves': self.saves,
+            'save_errors': self.save_errors,
+            'last_save': self.last_save,
+            'save_interval_seconds': self.save_interval,
+        }
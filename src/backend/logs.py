@@ -0,0 +1,226 @@
+"""
+Módulo de logs: escrita assíncrona por fila e log de acesso amostrado
+
+Os módulos registram com logging.getLogger(__name__). configure_logging()
+instala no logger raiz um handler que só enfileira o registro; a montagem
+da mensagem e a escrita no stdout acontecem numa thread de fundo
+(QueueListener). Com a fila cheia (stdout lento), os registros são
+descartados e contados, sem bloquear a requisição.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+ACCESS_LOGGER = 'encurtador.access'
+ACCESS_FORMAT = '%s %s %d %.2fms%s'
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+# Atributos padrão do LogRecord; os demais vêm de 'extra' e viram campos no formato JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'taskName'}
+
+_lock = threading.Lock()
+_handler: Optional['DeferredQueueHandler'] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_pid: Optional[int] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Um objeto JSON por linha, com os campos passados em 'extra' (ex.: status, latência)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enfileira o registro sem formatá-lo; a mensagem é montada na thread de escrita
+
+    Os argumentos das mensagens devem ser imutáveis (textos, números, exceções).
+    A fila é uma SimpleQueue (sem locks do lado de quem registra); o limite
+    'max_pending' é aproximado, verificado pelo tamanho atual da fila.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_pending: int = 0):
+        super().__init__(log_queue)
+        self.max_pending = max_pending
+        self.dropped = 0
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # A fila já é segura entre threads: dispensa o lock do handler
+        if not self.filter(record):
+            return False
+        self.enqueue(record)
+        return True
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.max_pending and self.queue.qsize() >= self.max_pending:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+def _enabled(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _stream_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stdout)
+    if os.getenv('LOG_FORMAT', 'text').strip().lower() == 'json':
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+def _start_listener():
+    global _handler, _listener
+    log_queue = queue.SimpleQueue()
+    _handler = DeferredQueueHandler(log_queue, max(0, int(os.getenv('LOG_QUEUE_SIZE', 10000))))
+    _listener = logging.handlers.QueueListener(log_queue, _stream_handler())
+    _listener.start()
+
+
+def configure_logging(asynchronous: Optional[bool] = None):
+    """
+    Configura o logger raiz conforme o config.env (uma vez por processo)
+
+    LOG_LEVEL define o nível mínimo, LOG_FORMAT escolhe 'text' ou 'json' e
+    LOG_ASYNC=false escreve direto no stdout, sem fila. Processos filhos
+    criados por fork recebem uma fila e uma thread de escrita novas.
+
+    Args:
+        asynchronous (Optional[bool]): Força a escrita com ou sem fila (padrão: LOG_ASYNC).
+            As ferramentas de linha de comando usam False, para os logs saírem na ordem dos prints
+    """
+    global _handler, _pid
+    with _lock:
+        if _pid is not None:
+            return
+        if asynchronous is None:
+            asynchronous = _enabled('LOG_ASYNC', 'true')
+        if asynchronous:
+            _start_listener()
+            handler = _handler
+            atexit.register(stop_logging)
+        else:
+            handler = _stream_handler()
+        root = logging.getLogger()
+        root.addHandler(handler)
+        root.setLevel(os.getenv('LOG_LEVEL', 'INFO').strip().upper())
+        _pid = os.getpid()
+
+
+def _after_fork():
+    # A thread de escrita não existe no filho e a fila pode ter ficado travada no fork
+    global _pid
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    previous = _handler
+    _start_listener()
+    root.removeHandler(previous)
+    root.addHandler(_handler)
+    _pid = os.getpid()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def stop_logging():
+    """Escreve os registros que ainda estão na fila e encerra a thread de escrita"""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None and _pid == os.getpid():
+        listener.stop()
+
+
+def logging_stats() -> Dict[str, Any]:
+    """Retorna o estado da fila de logs (registros pendentes e descartados)"""
+    handler = _handler
+    if handler is None:
+        return {'async': False}
+    return {'async': True, 'pending': handler.queue.qsize(), 'dropped': handler.dropped}
+
+
+class AccessLog:
+    """
+    Log de acesso dos servidores de redirecionamento, com amostragem por nível
+
+    2xx/3xx saem em INFO, 4xx em WARNING e 5xx em ERROR. A amostragem é
+    decidida antes de criar o registro, então uma requisição descartada custa
+    só um sorteio. Cada linha leva a taxa usada ('sample_rate').
+    """
+
+    def __init__(self, enabled: bool = True, sample_rates: Optional[Dict[int, float]] = None):
+        self.enabled = enabled
+        self.sample_rates = sample_rates or {}
+        self.logger = logging.getLogger(ACCESS_LOGGER)
+
+    @classmethod
+    def from_env(cls) -> 'AccessLog':
+        """
+        Cria o log de acesso a partir das variáveis de ambiente
+
+        Returns:
+            AccessLog: Log configurado (desativado se ACCESS_LOG_ENABLED=false)
+        """
+        return cls(
+            enabled=_enabled('ACCESS_LOG_ENABLED', 'true'),
+            sample_rates={
+                logging.INFO: float(os.getenv('ACCESS_LOG_SAMPLE_INFO', 0.01)),
+                logging.WARNING: float(os.getenv('ACCESS_LOG_SAMPLE_WARNING', 1.0)),
+                logging.ERROR: float(os.getenv('ACCESS_LOG_SAMPLE_ERROR', 1.0)),
+            },
+        )
+
+    def log(self, method: str, path: str, status: int, latency: float, target: Optional[str] = None):
+        """
+        Registra uma requisição, se o nível estiver ativo e ela for sorteada
+
+        Args:
+            method (str): Método HTTP
+            path (str): Caminho requisitado
+            status (int): Status da resposta
+            latency (float): Duração da requisição em segundos
+            target (Optional[str]): URL de destino, nos redirecionamentos
+        """
+        if not self.enabled:
+            return
+        level = logging.ERROR if status >= 500 else logging.WARNING if status >= 400 else logging.INFO
+        rate = self.sample_rates.get(level, 1.0)
+        if rate < 1.0 and (rate <= 0 or random.random() >= rate):
+            return
+        logger = self.logger
+        if not logger.isEnabledFor(level):
+            return
+        # Registro montado direto, sem logger.log(): dispensa a inspeção da pilha (findCaller)
+        logger.handle(logger.makeRecord(
+            logger.name, level, '', 0, ACCESS_FORMAT,
+            (method, path, status, latency * 1000, f" -> {target}" if target else ''), None,
+            extra={'method': method, 'path': path, 'status': status, 'latency_ms': latency * 1000,
+                   'target': target, 'sample_rate': rate},
+        ))
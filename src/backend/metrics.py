@@ -0,0 +1,163 @@
+"""
+Módulo de métricas no formato texto do Prometheus
+
+As métricas são pré-alocadas (listas de contadores por rótulo e por faixa do
+histograma), então registrar uma observação não aloca objetos nem usa locks:
+é uma busca em dicionário e um incremento inteiro protegido pelo GIL. Em
+disputa extrema, um incremento raro pode se perder, o que é aceitável para
+monitoramento e evita serializar o caminho crítico.
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Faixas padrão (segundos): de 100µs a 2.5s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class CounterVec:
+    """Contador com um rótulo cujos valores possíveis são conhecidos de antemão"""
+
+    def __init__(self, name: str, help_text: str, label: str, values: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._index = {value: position for position, value in enumerate(values)}
+        self._labels = list(values)
+        self._counts = [0] * len(values)
+
+    def inc(self, value: str, amount: int = 1):
+        position = self._index.get(value)
+        if position is not None:
+            self._counts[position] += amount
+
+    def value(self, value: str) -> int:
+        return self._counts[self._index[value]]
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for label_value, count in zip(self._labels, self._counts):
+            lines.append(f'{self.name}{{{self.label}="{label_value}"}} {count}')
+        return lines
+
+
+class Histogram:
+    """Histograma com faixas fixas; opcionalmente com um rótulo de valores conhecidos"""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 label: Optional[str] = None, values: Sequence[str] = ('',)):
+        self.name = name
+        self.help_text = help_text
+        self.bounds = tuple(sorted(buckets))
+        self.label = label
+        self._labels = list(values)
+        self._index = {value: position for position, value in enumerate(values)}
+        # Uma faixa extra para valores acima do último limite (+Inf)
+        self._buckets = [[0] * (len(self.bounds) + 1) for _ in values]
+        self._sums = [0.0] * len(values)
+
+    def observe(self, seconds: float, value: str = ''):
+        position = self._index.get(value)
+        if position is None:
+            return
+        self._buckets[position][bisect_left(self.bounds, seconds)] += 1
+        self._sums[position] += seconds
+
+    def count(self, value: str = '') -> int:
+        return sum(self._buckets[self._index[value]])
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for position, label_value in enumerate(self._labels):
+            label_prefix = f'{self.label}="{label_value}",' if self.label else ''
+            label_only = f'{{{self.label}="{label_value}"}}' if self.label else ''
+            cumulative = 0
+            buckets = list(self._buckets[position])  # Cópia para uma leitura consistente
+            for bound, count in zip(self.bounds + (float('inf'),), buckets):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_prefix}le="{_format_value(bound)}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{label_only} {self._sums[position]!r}')
+            lines.append(f'{self.name}_count{label_only} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de métricas expostas em /metrics"""
+
+    def __init__(self):
+        self._metrics: List = []
+        # Coletores chamados só na renderização: (nome, ajuda, tipo, função -> [(rótulos, valor)])
+        self._collectors: List[Tuple[str, str, str, Callable[[], Iterable[Tuple[Dict[str, str], float]]]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, name: str, help_text: str, metric_type: str,
+                           collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        """
+        Registra uma métrica calculada no momento da coleta (ex.: contadores do cache)
+
+        Args:
+            name (str): Nome da métrica
+            help_text (str): Descrição
+            metric_type (str): 'gauge' ou 'counter'
+            collect (Callable): Função que devolve pares (rótulos, valor)
+        """
+        self._collectors.append((name, help_text, metric_type, collect))
+
+    def render(self) -> str:
+        """Gera o texto no formato de exposição do Prometheus"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help_text, metric_type, collect in self._collectors:
+            try:
+                samples = list(collect())
+            except Exception as e:
+                lines.append(f'# Erro ao coletar {name}: {e}')
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{label_value}"' for key, label_value in labels.items())
+                lines.append(f'{name}{{{label_text}}} {_format_value(value)}' if label_text
+                             else f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Operações do armazenamento instrumentadas por instrument_storage
+STORAGE_OPERATIONS = (
+    'get_by_code', 'get_many_by_code', 'get_by_url_hash', 'find_by_url_hashes', 'insert', 'insert_many', 'increment_clicks',
+)
+
+
+def instrument_storage(storage, histogram: Histogram):
+    """
+    Mede a latência das operações do armazenamento, substituindo os métodos da instância
+
+    Args:
+        storage (StorageBackend): Armazenamento a instrumentar
+        histogram (Histogram): Histograma rotulado por operação
+    """
+    for operation in STORAGE_OPERATIONS:
+        method = getattr(storage, operation, None)
+        if method is None:
+            continue
+
+        def timed(*args, _method=method, _operation=operation, **kwargs):
+            started = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, _operation)
+
+        setattr(storage, operation, timed)
@@ -0,0 +1,343 @@
+"""
+Supervisor de processos de redirecionamento (prefork com SO_REUSEPORT)
+
+O supervisor não importa a aplicação nem abre conexões com o banco: cada
+worker, criado por fork, importa o servidor, abre o próprio socket de escuta
+na mesma porta com SO_REUSEPORT (o kernel distribui as conexões entre eles)
+e o próprio cliente do banco. Os módulos do backend que o supervisor chegou a
+importar (logs, cache compartilhado) são descartados no worker logo após o
+fork, então ele usa o código atual do disco; só este módulo e o script do
+supervisor continuam os da partida. O supervisor:
+
+- verifica a saúde dos workers por batimentos numa memória compartilhada (o
+  worker só bate enquanto o seu laço de atendimento roda; sem batimento
+  dentro do prazo ele é morto e substituído);
+- recria os workers que terminam inesperadamente, com espera crescente se
+  caírem logo depois de subir;
+- no SIGHUP, troca os workers um a um: o novo (com o código atual do disco)
+  precisa ficar pronto antes de o antigo receber SIGTERM;
+- no SIGTERM/SIGINT, pede o encerramento gracioso de todos e espera o prazo.
+"""
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from multiprocessing.sharedctypes import RawArray
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Workers que caem antes disso contam como falha na partida (espera crescente)
+MIN_UPTIME_SECONDS = 5.0
+RESTART_MAX_DELAY_SECONDS = 30.0
+
+
+class Heartbeat:
+    """Batimento de um worker, gravado na memória compartilhada com o supervisor"""
+
+    def __init__(self, board, slot: int, supervisor_pid: int):
+        self.board = board
+        self.slot = slot
+        self.supervisor_pid = supervisor_pid
+
+    def beat(self):
+        """Marca o worker como vivo e pronto (chamado pelo laço de atendimento)"""
+        self.board[self.slot] = time.monotonic()
+        if os.getppid() != self.supervisor_pid:
+            # Supervisor morreu: encerra de forma graciosa em vez de ficar órfão
+            os.kill(os.getpid(), signal.SIGTERM)
+
+
+class _Worker:
+    __slots__ = ('pid', 'slot', 'started', 'stopping_since', 'killed')
+
+    def __init__(self, pid: int, slot: int):
+        self.pid = pid
+        self.slot = slot
+        self.started = time.monotonic()
+        self.stopping_since: Optional[float] = None
+        self.killed = False
+
+
+def _discard_supervisor_modules():
+    # Os handlers de log herdados saem do logger raiz: o worker configura os próprios
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for name in [name for name in sys.modules if name.startswith('backend.') and name != __name__]:
+        del sys.modules[name]
+
+
+def default_workers() -> int:
+    """Quantidade de workers em REDIRECT_WORKERS (vazio ou 0: um por CPU disponível)"""
+    configured = int(os.getenv('REDIRECT_WORKERS') or 0)
+    if configured > 0:
+        return configured
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def check_port(host: str, port: int):
+    """
+    Verifica se a porta pode ser compartilhada por SO_REUSEPORT antes de criar os workers
+
+    Raises:
+        OSError: Se a plataforma não tiver SO_REUSEPORT ou a porta estiver ocupada por outro programa
+    """
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        raise OSError("SO_REUSEPORT não é suportado nesta plataforma")
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        # Só 'bind', sem 'listen': um socket que não aceita conexões não recebe nenhuma do kernel
+        probe.bind((host, port))
+
+
+class Supervisor:
+    """Mantém N workers atendendo na mesma porta"""
+
+    def __init__(self, target: Callable[[Heartbeat], None], workers: int,
+                 health_timeout: float = 10.0, startup_timeout: float = 30.0, graceful_timeout: float = 15.0):
+        """
+        Args:
+            target (Callable[[Heartbeat], None]): Executado em cada worker após o fork; deve
+                importar e servir a aplicação, chamando heartbeat.beat() periodicamente
+            workers (int): Quantidade de workers
+            health_timeout (float): Tempo máximo sem batimento de um worker pronto
+            startup_timeout (float): Tempo máximo até o primeiro batimento
+            graceful_timeout (float): Prazo para um worker terminar após o SIGTERM
+        """
+        self.target = target
+        self.count = workers
+        self.health_timeout = health_timeout
+        self.startup_timeout = startup_timeout
+        self.graceful_timeout = graceful_timeout
+        # Posições de sobra para os workers novos de uma recarga e os que ainda estão saindo
+        self.board = RawArray('d', workers * 2 + 2)
+        self.workers: Dict[int, _Worker] = {}
+        self.pid = os.getpid()
+        self.stopping = False
+        self.reload_requested = False
+        self.restart_failures = 0
+        self.next_spawn = 0.0
+        self.restarts = 0
+        self._wake_r = self._wake_w = -1
+
+    @classmethod
+    def from_env(cls, target: Callable[[Heartbeat], None], workers: Optional[int] = None) -> 'Supervisor':
+        """
+        Cria o supervisor com os prazos do config.env
+
+        Args:
+            target (Callable[[Heartbeat], None]): Função executada em cada worker
+            workers (Optional[int]): Quantidade de workers (padrão: default_workers())
+
+        Returns:
+            Supervisor: Supervisor ainda não iniciado
+        """
+        return cls(
+            target,
+            workers or default_workers(),
+            health_timeout=float(os.getenv('REDIRECT_HEALTH_TIMEOUT_SECONDS', 10)),
+            startup_timeout=float(os.getenv('REDIRECT_STARTUP_TIMEOUT_SECONDS', 30)),
+            graceful_timeout=float(os.getenv('REDIRECT_GRACEFUL_TIMEOUT_SECONDS', 15)),
+        )
+
+    def _free_slot(self) -> int:
+        used = {worker.slot for worker in self.workers.values()}
+        return next(slot for slot in range(len(self.board)) if slot not in used)
+
+    def _spawn(self) -> _Worker:
+        slot = self._free_slot()
+        self.board[slot] = 0.0
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(slot) # Não retorna
+        worker = _Worker(pid, slot)
+        self.workers[pid] = worker
+        return worker
+
+    def _run_worker(self, slot: int):
+        status = 0
+        try:
+            signal.set_wakeup_fd(-1)
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            for signum in (signal.SIGTERM, signal.SIGHUP, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            # Ctrl+C chega a todo o grupo: quem encerra os workers é o supervisor (SIGTERM)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            _discard_supervisor_modules() # A aplicação importa o backend de novo, do disco
+            self.target(Heartbeat(self.board, slot, self.pid))
+        except SystemExit as e:
+            status = 0 if e.code in (None, 0) else 1
+        except BaseException:
+            logger.exception("Erro no worker %d", os.getpid())
+            status = 1
+        finally:
+            # Nunca volta para o laço do supervisor copiado no fork
+            logs = sys.modules.get('backend.logs')
+            if logs is not None:
+                logs.stop_logging() # os._exit não executa o atexit: escreve os logs pendentes
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def _terminate(self, worker: _Worker):
+        if worker.stopping_since is None:
+            worker.stopping_since = time.monotonic()
+            self._signal(worker, signal.SIGTERM)
+
+    def _kill(self, worker: _Worker, reason: str):
+        logger.warning("Worker %d %s; será substituído", worker.pid, reason)
+        worker.killed = True
+        self._signal(worker, signal.SIGKILL)
+
+    @staticmethod
+    def _signal(worker: _Worker, signum: int):
+        try:
+            os.kill(worker.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def is_ready(self, worker: _Worker) -> bool:
+        return worker.pid in self.workers and self.board[worker.slot] > 0
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.workers.pop(pid, None)
+            if worker is None or worker.stopping_since is not None:
+                continue
+            now = time.monotonic()
+            if not worker.killed:
+                logger.error("Worker %d terminou inesperadamente (código %d); será recriado",
+                             pid, os.waitstatus_to_exitcode(status))
+            # Quedas logo após a partida (ex.: erro de importação) não viram um laço de forks
+            if now - worker.started < MIN_UPTIME_SECONDS:
+                self.restart_failures += 1
+            else:
+                self.restart_failures = 0
+            delay = min(RESTART_MAX_DELAY_SECONDS, 0.5 * 2 ** self.restart_failures) if self.restart_failures else 0
+            self.next_spawn = now + delay
+            self.restarts += 1
+
+    def _check_health(self):
+        now = time.monotonic()
+        for worker in list(self.workers.values()):
+            if worker.killed:
+                continue
+            if worker.stopping_since is not None:
+                if now - worker.stopping_since > self.graceful_timeout:
+                    worker.killed = True
+                    self._signal(worker, signal.SIGKILL)
+                continue
+            beat = self.board[worker.slot]
+            if beat == 0:
+                if now - worker.started > self.startup_timeout:
+                    self._kill(worker, f"não ficou pronto em {self.startup_timeout:.0f}s")
+            elif now - beat > self.health_timeout:
+                self._kill(worker, f"sem batimento há {now - beat:.0f}s")
+
+    def _maintain(self):
+        active = sum(1 for worker in self.workers.values() if worker.stopping_since is None)
+        if active < self.count and time.monotonic() >= self.next_spawn:
+            self._spawn()
+
+    def _sleep(self, timeout: float):
+        # Acordado antes do prazo por qualquer sinal (SIGCHLD, SIGHUP, SIGTERM)
+        readable, _, _ = select.select([self._wake_r], [], [], timeout)
+        if readable:
+            try:
+                while os.read(self._wake_r, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def _wait(self, done: Callable[[], bool], timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not done():
+            if self.stopping or time.monotonic() >= deadline:
+                return False
+            self._sleep(0.1)
+            self._reap()
+            self._check_health()
+        return True
+
+    def _reload(self):
+        logger.info("Recarregando os workers um a um...")
+        for old in [worker for worker in self.workers.values() if worker.stopping_since is None]:
+            new = self._spawn()
+            if not self._wait(lambda: self.is_ready(new) or new.pid not in self.workers, self.startup_timeout) \
+                    or not self.is_ready(new):
+                logger.error("Recarga interrompida: o novo worker não ficou pronto (os antigos continuam atendendo)")
+                if new.pid in self.workers:
+                    self._terminate(new)
+                return
+            self._terminate(old)
+            self._wait(lambda: old.pid not in self.workers, self.graceful_timeout + 1)
+        logger.info("Recarga concluída")
+
+    def _stop_all(self):
+        logger.info("Encerrando %d worker(s)...", len(self.workers))
+        for worker in self.workers.values():
+            self._terminate(worker)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self._sleep(0.1)
+            self._reap()
+        for worker in self.workers.values():
+            self._signal(worker, signal.SIGKILL)
+        while self.workers:
+            pid, _ = os.waitpid(-1, 0)
+            self.workers.pop(pid, None)
+
+    def _on_stop(self, signum, frame):
+        self.stopping = True
+
+    def _on_reload(self, signum, frame):
+        self.reload_requested = True
+
+    def run(self):
+        """Cria os workers e os supervisiona até SIGTERM/SIGINT (bloqueante)"""
+        self.pid = os.getpid()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        signal.set_wakeup_fd(self._wake_w)
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None) # Só para acordar o laço
+        signal.signal(signal.SIGHUP, self._on_reload)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+
+        logger.info("Supervisor %d: %d worker(s) (SIGHUP recarrega, SIGTERM encerra)", self.pid, self.count)
+        for _ in range(self.count):
+            self._spawn()
+        try:
+            while not self.stopping:
+                self._sleep(1.0)
+                self._reap()
+                self._check_health()
+                if self.stopping:
+                    break
+                if self.reload_requested:
+                    self.reload_requested = False
+                    self._reload()
+                self._maintain()
+        finally:
+            self._stop_all()
+            signal.set_wakeup_fd(-1)
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+        logger.info("Supervisor encerrado")
@@ -0,0 +1,264 @@
+"""
+Módulo de semântica HTTP dos redirecionamentos
+
+Define o status de cada redirecionamento (global em REDIRECT_STATUS ou por
+link no campo 'redirect_status'), o tempo de vida em cache (Cache-Control),
+os validadores (ETag e Last-Modified) e a resposta 304 a requisições
+condicionais. Assim, navegadores e proxies reversos atendem cliques
+repetidos sem voltar ao servidor.
+
+Não depende do Flask: recebe e devolve cabeçalhos como texto, para ser usado
+por qualquer servidor de redirecionamento.
+"""
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import quote, urlsplit, urlunsplit
+
+# Status aceitos: 301/308 são permanentes, 302/307 temporários (307/308 preservam o método)
+REDIRECT_STATUSES = (301, 302, 307, 308)
+PERMANENT_STATUSES = (301, 308)
+NOT_MODIFIED = 304
+
+# Caracteres mantidos ao converter uma URL com Unicode (IRI) para o cabeçalho Location
+URI_SAFE = "/:?#[]@!$&'()*+,;=%~"
+
+
+def expiry_timestamp(expires_at: Optional[datetime]) -> Optional[float]:
+    """
+    Converte o 'expires_at' de um documento em timestamp
+
+    Args:
+        expires_at (Optional[datetime]): Expiração em UTC (o pymongo devolve datetimes sem fuso, em UTC)
+
+    Returns:
+        Optional[float]: Timestamp da expiração ou None se o link não expira
+    """
+    if expires_at is None:
+        return None
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at.timestamp()
+
+
+def is_expired(document: Dict[str, Any], now: Optional[float] = None) -> bool:
+    """
+    Verifica se o link já expirou (mesmo que o banco ainda não o tenha removido)
+
+    Args:
+        document (Dict[str, Any]): Documento do armazenamento
+        now (Optional[float]): Timestamp atual (padrão: time.time())
+
+    Returns:
+        bool: True se o link tem 'expires_at' no passado
+    """
+    expires_at = expiry_timestamp(document.get('expires_at'))
+    return expires_at is not None and expires_at <= (time.time() if now is None else now)
+
+
+class RedirectTarget(NamedTuple):
+    """Destino de um código curto e os metadados usados nos cabeçalhos de cache"""
+
+    original_url: str
+    status: Optional[int] = None  # None usa o status global
+    last_modified: Optional[float] = None  # Timestamp da criação do link
+    expires_at: Optional[float] = None  # Timestamp de expiração (None: não expira)
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> 'RedirectTarget':
+        """
+        Monta o destino a partir de um documento do armazenamento
+
+        Args:
+            document (Dict[str, Any]): Documento com 'original_url' e, opcionalmente,
+                'redirect_status', 'created_timestamp' e 'expires_at'
+
+        Returns:
+            RedirectTarget: Destino do redirecionamento
+        """
+        return cls(
+            original_url=document['original_url'],
+            status=document.get('redirect_status'),
+            last_modified=document.get('created_timestamp'),
+            expires_at=expiry_timestamp(document.get('expires_at')),
+        )
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """Verifica se o destino já passou da expiração"""
+        return self.expires_at is not None and self.expires_at <= (time.time() if now is None else now)
+
+
+def parse_redirect_status(value: Any) -> Optional[int]:
+    """
+    Valida um status de redirecionamento informado por configuração ou por link
+
+    Args:
+        value (Any): Status (ex.: 301, '308') ou vazio/None
+
+    Returns:
+        Optional[int]: Status validado ou None se não informado
+
+    Raises:
+        ValueError: Se o status não for 301, 302, 307 ou 308
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        status = int(value)
+    except (TypeError, ValueError):
+        status = None
+    if status not in REDIRECT_STATUSES:
+        raise ValueError(f"Status de redirecionamento inválido: {value} (use 301, 302, 307 ou 308)")
+    return status
+
+
+def location_header(url: str) -> str:
+    """
+    Converte a URL de destino para ASCII, como exigido no cabeçalho Location
+
+    Args:
+        url (str): URL de destino (pode conter Unicode no host ou no caminho)
+
+    Returns:
+        str: URL com o host em IDNA e o restante em percent-encoding
+    """
+    if url.isascii():
+        return url
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    auth, at, hostport = netloc.rpartition('@')
+    try:
+        hostport = hostport.encode('idna').decode('ascii')
+    except UnicodeError:
+        hostport = quote(hostport, safe=URI_SAFE)
+    return urlunsplit((
+        scheme, quote(auth, safe=URI_SAFE) + at + hostport,
+        quote(path, safe=URI_SAFE), quote(query, safe=URI_SAFE), quote(fragment, safe=URI_SAFE),
+    ))
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class RedirectPolicy:
+    """Status, cabeçalhos de cache e requisições condicionais dos redirecionamentos"""
+
+    def __init__(self, status: int = 302, max_age: int = 3600):
+        self.status = parse_redirect_status(status) or 302
+        self.max_age = max(0, int(max_age))
+
+    @classmethod
+    def from_env(cls) -> 'RedirectPolicy':
+        """
+        Cria a política a partir das variáveis de ambiente
+
+        Returns:
+            RedirectPolicy: Política com REDIRECT_STATUS e REDIRECT_CACHE_MAX_AGE
+        """
+        return cls(
+            status=parse_redirect_status(os.getenv('REDIRECT_STATUS', '302')) or 302,
+            max_age=int(os.getenv('REDIRECT_CACHE_MAX_AGE', 3600)),
+        )
+
+    def status_for(self, target: RedirectTarget) -> int:
+        """Status do redirecionamento: o do link, se definido, ou o global"""
+        return target.status or self.status
+
+    @staticmethod
+    def etag(short_code: str, original_url: str, status: int) -> str:
+        """
+        Validador forte do redirecionamento (muda se o destino ou o status mudar)
+
+        Args:
+            short_code (str): Código curto
+            original_url (str): URL de destino
+            status (int): Status do redirecionamento
+
+        Returns:
+            str: ETag entre aspas
+        """
+        digest = hashlib.blake2b(f"{short_code}\0{original_url}\0{status}".encode('utf-8'), digest_size=8)
+        return f'"{digest.hexdigest()}"'
+
+    def max_age_for(self, target: RedirectTarget, now: Optional[float] = None) -> int:
+        """
+        Tempo de vida em cache: o configurado, limitado ao que falta para o link expirar
+
+        Args:
+            target (RedirectTarget): Destino do redirecionamento
+            now (Optional[float]): Timestamp atual (padrão: time.time())
+
+        Returns:
+            int: Segundos de cache (0 se o link já expirou ou o cache está desativado)
+        """
+        if target.expires_at is None:
+            return self.max_age
+        remaining = int(target.expires_at - (time.time() if now is None else now))
+        return max(0, min(self.max_age, remaining))
+
+    def cache_control(self, target: RedirectTarget, status: int, now: Optional[float] = None) -> str:
+        """Valor do Cache-Control para o destino"""
+        if target.is_expired(now):
+            return 'no-store'
+        max_age = self.max_age_for(target, now)
+        if max_age <= 0:
+            # Sem cache: o cliente revalida a cada clique (e recebe 304 se nada mudou)
+            return 'no-cache'
+        if status in PERMANENT_STATUSES and target.expires_at is None:
+            # Links sem expiração nunca mudam de destino
+            return f'public, max-age={max_age}, immutable'
+        return f'public, max-age={max_age}'
+
+    def respond(self, short_code: str, target: RedirectTarget, if_none_match: Optional[str] = None,
+                if_modified_since: Optional[str] = None, now: Optional[float] = None) -> Tuple[int, Dict[str, str]]:
+        """
+        Decide o status e os cabeçalhos de cache de uma requisição de redirecionamento
+
+        Args:
+            short_code (str): Código curto
+            target (RedirectTarget): Destino do redirecionamento
+            if_none_match (Optional[str]): Cabeçalho If-None-Match da requisição
+            if_modified_since (Optional[str]): Cabeçalho If-Modified-Since da requisição
+            now (Optional[float]): Timestamp atual (padrão: time.time())
+
+        Returns:
+            Tuple[int, Dict[str, str]]: (status, cabeçalhos). O status é 304 quando
+            a cópia do cliente ainda vale; caso contrário, o do redirecionamento
+            (o cabeçalho Location fica a cargo do servidor)
+        """
+        status = self.status_for(target)
+        etag = self.etag(short_code, target.original_url, status)
+        headers = {'Cache-Control': self.cache_control(target, status, now), 'ETag': etag}
+        if target.last_modified is not None:
+            headers['Last-Modified'] = formatdate(target.last_modified, usegmt=True)
+
+        if if_none_match:
+            # If-None-Match tem precedência sobre If-Modified-Since
+            if _etag_matches(if_none_match, etag):
+                return NOT_MODIFIED, headers
+        elif if_modified_since and target.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                since = None
+            if since is not None:
+                # Datas sem fuso (RFC 850, asctime, -0000) são GMT, não a hora local do servidor
+                if since.tzinfo is None:
+                    since = since.replace(tzinfo=timezone.utc)
+                since = since.timestamp()
+            if since is not None and int(target.last_modified) <= since:
+                return NOT_MODIFIED, headers
+        return status, headers
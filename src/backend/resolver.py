@@ -0,0 +1,308 @@
+"""
+Módulo de resolução de códigos curtos, independente do servidor HTTP
+
+Concentra a ordem das consultas usada pelos servidores de redirecionamento
+(Flask, WSGI mínimo, asyncio): snapshot, filtro de Bloom, estado da conexão, cache em
+memória e banco, e o registro do clique e do ranking de códigos mais acessados.
+Cada servidor só traduz o resultado para a sua resposta HTTP.
+"""
+import asyncio
+import functools
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from .redirects import RedirectTarget, is_expired
+from .storage import StorageError
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND = 404
+UNAVAILABLE = 503
+
+# Mensagens das respostas de erro
+MESSAGES = {
+    NOT_FOUND: "Short URL not found.",
+    UNAVAILABLE: "Service Unavailable: database unavailable.",
+}
+
+
+class RedirectResolver:
+    """Resolve um código curto no destino do redirecionamento"""
+
+    def __init__(self, storage, url_lookup, snapshot=None, code_filter=None, click_counter=None, hot_set=None):
+        self.storage = storage
+        self.url_lookup = url_lookup
+        self.snapshot = snapshot
+        self.code_filter = code_filter
+        self.click_counter = click_counter
+        self.hot_set = hot_set
+
+    @classmethod
+    def from_env(cls, shortener=None) -> 'RedirectResolver':
+        """
+        Monta o resolvedor com os componentes configurados no ambiente
+
+        Args:
+            shortener (Optional[URLShortener]): Encurtador a usar (padrão: um novo, com o backend global)
+
+        Returns:
+            RedirectResolver: Resolvedor com cache, snapshot, filtro de Bloom, contagem de cliques e hot set
+        """
+        from .analytics import ClickCounter
+        from .bloom import ShortCodeFilter
+        from .cache import CachedURLLookup, LRUCache
+        from .hotset import HotSet
+        from .shared_cache import SharedCache
+        from .snapshot import RedirectSnapshot
+        from .url_shortener import URLShortener
+
+        shortener = shortener or URLShortener()
+        storage = shortener.storage
+        return cls(
+            storage,
+            CachedURLLookup(shortener, LRUCache.from_env(), SharedCache.from_env()),
+            snapshot=RedirectSnapshot.from_env(),
+            code_filter=ShortCodeFilter.from_env(storage),
+            click_counter=ClickCounter.from_env(storage),
+            hot_set=HotSet.from_env(),
+        )
+
+    def resolve(self, short_code: str) -> Tuple[Optional[RedirectTarget], int]:
+        """
+        Resolve o código e registra o clique quando encontrado
+
+        Args:
+            short_code (str): Código curto
+
+        Returns:
+            Tuple[Optional[RedirectTarget], int]: (destino, 0) se encontrado; caso contrário
+            (None, NOT_FOUND) ou (None, UNAVAILABLE) se o banco não puder ser consultado
+        """
+        # Links do snapshot são resolvidos sem tocar no banco (exceto os removidos depois de gerá-lo)
+        target = self._from_snapshot(short_code)
+
+        if target is None:
+            error_status = self._precheck(short_code)
+            if error_status:
+                return None, error_status
+            try:
+                target = self.url_lookup.find_target(short_code)
+            except StorageError as e:
+                logger.error("Servidor de Redirecionamento: falha ao consultar o banco de dados: %s", e)
+                return None, UNAVAILABLE
+            if target is None:
+                return None, NOT_FOUND
+
+        return self._found(short_code, target)
+
+    def _from_snapshot(self, short_code: str) -> Optional[RedirectTarget]:
+        if self.snapshot is None:
+            return None
+        target = self.snapshot.get(short_code)
+        if target is not None and self.url_lookup.is_deleted(short_code):
+            return None  # Removido: o banco (e o cache negativo) respondem 404
+        return target
+
+    def _precheck(self, short_code: str) -> int:
+        # Código que com certeza não existe: responde sem tocar no banco
+        if self.code_filter is not None and not self.code_filter.might_exist(short_code):
+            return NOT_FOUND
+        return self._check_connection()
+
+    def _check_connection(self) -> int:
+        # Sem conexão, a reconexão segue em segundo plano e a requisição falha na hora
+        if not self.storage.is_connected():
+            self.storage.connect_in_background() # Backends embutidos conectam na hora
+            if not self.storage.is_connected():
+                return UNAVAILABLE
+        return 0
+
+    def _found(self, short_code: str, target: RedirectTarget) -> Tuple[RedirectTarget, int]:
+        if self.click_counter is not None:
+            self.click_counter.record(short_code)
+        if self.hot_set is not None:
+            self.hot_set.record(short_code)
+        return target, 0
+
+    def _warmup_codes(self) -> List[str]:
+        # Sem cache não há o que aquecer; links do snapshot já são resolvidos sem o banco
+        if self.hot_set is None or (self.url_lookup.cache is None and self.url_lookup.shared is None):
+            return []
+        codes = self.hot_set.load()
+        if self.snapshot is not None:
+            codes = [code for code in codes if self.snapshot.get(code) is None]
+        return codes
+
+    def _report_warm_up(self, warmed: int, total: int, started: float):
+        logger.info("Cache aquecido: %d de %d código(s) mais acessados em %.2fs", warmed, total, time.perf_counter() - started)
+
+    def warm_up(self) -> int:
+        """
+        Carrega no cache os códigos mais acessados na execução anterior (antes de aceitar tráfego)
+
+        Returns:
+            int: Quantidade de destinos carregados (0 se o banco não puder ser consultado)
+        """
+        codes = self._warmup_codes()
+        if not codes:
+            return 0
+        started = time.perf_counter()
+        try:
+            warmed = self.url_lookup.warm(codes, self.hot_set.warmup_batch_size)
+        except StorageError as e:
+            logger.warning("Aquecimento do cache ignorado: %s", e)
+            return 0
+        self._report_warm_up(warmed, len(codes), started)
+        return warmed
+
+    def start(self):
+        """Inicia as tarefas de fundo (filtro de Bloom, gravação do hot set)"""
+        if self.code_filter is not None:
+            self.code_filter.start() # Constrói (ou carrega do disco) o filtro em segundo plano
+        if self.hot_set is not None:
+            self.hot_set.start()
+
+    def stop(self):
+        """Encerra as tarefas de fundo, gravando os cliques pendentes e o hot set (bloqueante)"""
+        if self.click_counter is not None:
+            self.click_counter.stop()
+        if self.code_filter is not None:
+            self.code_filter.stop()
+        if self.hot_set is not None:
+            self.hot_set.stop()
+
+
+class AsyncRedirectResolver(RedirectResolver):
+    """
+    Resolvedor do servidor asyncio: mesma ordem de consultas, com a busca no banco assíncrona
+
+    'storage' é o acesso assíncrono (AsyncStorage); o filtro de Bloom e a
+    contagem de cliques continuam nas suas threads, com o backend síncrono
+    ('sync_storage'). O cache em memória é o mesmo do CachedURLLookup; falhas
+    simultâneas para o mesmo código aguardam a mesma consulta ao banco.
+    """
+
+    def __init__(self, storage, url_lookup, snapshot=None, code_filter=None, click_counter=None, hot_set=None,
+                 sync_storage=None):
+        super().__init__(storage, url_lookup, snapshot, code_filter, click_counter, hot_set)
+        self.sync_storage = sync_storage
+        self._flights: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_env(cls, storage=None) -> 'AsyncRedirectResolver':
+        """
+        Monta o resolvedor com os componentes configurados no ambiente
+
+        Args:
+            storage (Optional[StorageBackend]): Backend síncrono (padrão: o backend global)
+
+        Returns:
+            AsyncRedirectResolver: Resolvedor com acesso assíncrono ao banco
+        """
+        from .analytics import ClickCounter
+        from .bloom import ShortCodeFilter
+        from .cache import CachedURLLookup, LRUCache
+        from .hotset import HotSet
+        from .shared_cache import SharedCache
+        from .snapshot import RedirectSnapshot
+        from .storage import get_storage
+        from .storage.aio import create_async_storage
+        from .url_shortener import URLShortener
+
+        storage = storage or get_storage()
+        return cls(
+            create_async_storage(storage),
+            CachedURLLookup(URLShortener(storage), LRUCache.from_env(), SharedCache.from_env()),
+            snapshot=RedirectSnapshot.from_env(),
+            code_filter=ShortCodeFilter.from_env(storage),
+            click_counter=ClickCounter.from_env(storage),
+            hot_set=HotSet.from_env(),
+            sync_storage=storage,
+        )
+
+    async def resolve(self, short_code: str) -> Tuple[Optional[RedirectTarget], int]:
+        """
+        Resolve o código e registra o clique quando encontrado (corrotina)
+
+        Args:
+            short_code (str): Código curto
+
+        Returns:
+            Tuple[Optional[RedirectTarget], int]: Mesmo resultado de RedirectResolver.resolve
+        """
+        target = self._from_snapshot(short_code)
+
+        if target is None:
+            error_status = await self._precheck_async(short_code)
+            if error_status:
+                return None, error_status
+
+            found, target = self.url_lookup.peek(short_code)
+            if not found:
+                try:
+                    target = await self._fetch(short_code)
+                except StorageError as e:
+                    logger.error("Servidor de Redirecionamento: falha ao consultar o banco de dados: %s", e)
+                    return None, UNAVAILABLE
+            if target is None:
+                return None, NOT_FOUND
+
+        return self._found(short_code, target)
+
+    async def _precheck_async(self, short_code: str) -> int:
+        code_filter = self.code_filter
+        if code_filter is not None and not code_filter.might_exist(short_code, recheck=False):
+            # A atualização antecipada do filtro consulta o banco (ou espera outra): roda numa thread, fora do loop
+            exists = await asyncio.get_running_loop().run_in_executor(None, code_filter.recheck, short_code)
+            if not exists:
+                return NOT_FOUND
+        return self._check_connection()
+
+    async def _fetch(self, short_code: str) -> Optional[RedirectTarget]:
+        flight = self._flights.get(short_code)
+        if flight is None:
+            # A consulta é uma tarefa própria: o cancelamento de uma requisição não afeta as demais
+            flight = self._flights[short_code] = asyncio.ensure_future(self._load(short_code))
+            flight.add_done_callback(functools.partial(self._landed, short_code))
+        else:
+            # Já há uma consulta para este código: espera a mesma resposta
+            self.url_lookup.coalesced += 1
+        return await asyncio.shield(flight)
+
+    async def _load(self, short_code: str) -> Optional[RedirectTarget]:
+        document = await self.storage.get_by_code(short_code)
+        # Mesma regra de URLShortener.find_redirect_target
+        target = RedirectTarget.from_document(document) if document and not is_expired(document) else None
+        self.url_lookup.remember(short_code, target)
+        return target
+
+    def _landed(self, short_code: str, flight: asyncio.Future):
+        if self._flights.get(short_code) is flight:
+            del self._flights[short_code]
+        if not flight.cancelled():
+            flight.exception()  # Marca como lida: pode não haver ninguém esperando
+
+    async def warm_up(self) -> int:
+        """
+        Carrega no cache os códigos mais acessados na execução anterior (corrotina)
+
+        Returns:
+            int: Quantidade de destinos carregados (0 se o banco não puder ser consultado)
+        """
+        codes = self._warmup_codes()
+        if not codes:
+            return 0
+        started = time.perf_counter()
+        batch_size = self.hot_set.warmup_batch_size
+        warmed = 0
+        try:
+            for start in range(0, len(codes), batch_size):
+                for document in await self.storage.get_many_by_code(codes[start:start + batch_size]):
+                    if not is_expired(document):
+                        self.url_lookup.remember(document['short_url'], RedirectTarget.from_document(document))
+                        warmed += 1
+        except StorageError as e:
+            logger.warning("Aquecimento do cache ignorado: %s", e)
+            return warmed
+        self._report_warm_up(warmed, len(codes), started)
+        return warmed
@@ -0,0 +1,462 @@
+"""
+Cache compartilhado entre processos (L2) para consultas de códigos curtos
+
+Tabela de endereçamento aberto num arquivo mapeado em memória (de
+preferência em /dev/shm), usada por todos os workers do host entre o cache
+de cada processo (L1, LRUCache) e o banco. Tamanho fixo: SLOTS posições de
+SLOT_BYTES bytes, divididas em faixas ("stripes").
+
+- Leitura sem lock: cada posição tem um contador de sequência (seqlock); o
+  escritor o torna ímpar antes de gravar e par depois, e o leitor descarta a
+  cópia se o contador mudou ou estava ímpar (tratada como falha do cache).
+- Escrita com lock por faixa: um lock de thread (dentro do processo) mais um
+  lock de byte via fcntl (entre processos). A sondagem de uma chave fica
+  dentro da sua faixa, então dois escritores nunca disputam a mesma posição.
+- Remoção: a chave ocupa a primeira posição livre ou vencida da janela de
+  sondagem; com a janela cheia, sai a entrada que venceria primeiro
+  (resultados negativos, com TTL curto, saem antes).
+- Invalidação: cada invalidate() soma 1 a um contador no cabeçalho; os
+  processos comparam o contador com o último visto para descartar o próprio
+  L1. Um link removido fica marcado (DELETED) por 'tombstone_ttl' segundos,
+  para que os links do snapshot também deixem de ser atendidos.
+
+Formato do arquivo:
+    cabeçalho (HEADER_BYTES): MAGIC, posições, bytes por posição, faixas; contador de invalidações
+    posição: sequência (uint32) | metadados (META) | código (KEY_BYTES) | URL
+"""
+import hashlib
+import logging
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+from mmap import mmap
+from typing import Any, Dict, Optional, Tuple
+from .redirects import RedirectTarget
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos, o cache compartilhado fica desativado
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'LLSHRC01'
+HEADER = struct.Struct('<8sIII')  # magic, posições, bytes por posição, faixas
+HEADER_BYTES = 4096
+COUNTER = struct.Struct('<Q')
+INVALIDATIONS_OFFSET = 64  # Contador de invalidações, no cabeçalho
+
+SEQ = struct.Struct('<I')
+# estado, tamanho do código, tamanho da URL, hash do código, validade no cache, status, criação, expiração
+META = struct.Struct('<BBHQdH6xdd')
+HASH = struct.Struct('<Q')
+HASH_OFFSET = SEQ.size + 4
+KEY_OFFSET = SEQ.size + META.size
+KEY_BYTES = 32
+URL_OFFSET = KEY_OFFSET + KEY_BYTES
+
+EMPTY = 0
+POSITIVE = 1
+NEGATIVE = 2
+DELETED = 3  # Resultado negativo de um link removido (não é sobrescrito por outro negativo)
+
+STRIPES = 64
+PROBE_WINDOW = 8
+READ_RETRIES = 4
+
+
+def default_path(name: str) -> str:
+    """Caminho do arquivo da tabela em /dev/shm (memória), ou no diretório temporário do sistema"""
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, name)
+
+
+def _key_hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+class SharedCache:
+    """Tabela de cache compartilhada pelos processos que abrem o mesmo arquivo"""
+
+    def __init__(self, path: str, slots: int = 32768, slot_bytes: int = 512, ttl: float = 300.0,
+                 negative_ttl: float = 30.0, tombstone_ttl: float = 86400.0, create: bool = False):
+        """
+        Args:
+            path (str): Arquivo da tabela (criado se não existir ou se a geometria mudou)
+            slots (int): Quantidade de posições (arredondada para múltiplo das faixas)
+            slot_bytes (int): Bytes por posição (limita o tamanho da URL guardada)
+            ttl (float): Tempo de vida padrão das entradas positivas
+            negative_ttl (float): Tempo de vida padrão dos resultados negativos
+            tombstone_ttl (float): Tempo de vida da marca de link removido
+            create (bool): Recria a tabela vazia mesmo que o arquivo já exista
+        """
+        if fcntl is None:
+            raise OSError("Cache compartilhado indisponível nesta plataforma (sem fcntl)")
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.tombstone_ttl = tombstone_ttl
+        per_stripe = max(PROBE_WINDOW, -(-slots // STRIPES))
+        self.slots = per_stripe * STRIPES
+        self.slot_bytes = max(URL_OFFSET + 64, slot_bytes)
+        self.per_stripe = per_stripe
+        self.max_url_bytes = self.slot_bytes - URL_OFFSET
+
+        self._fd = self._open(create)
+        self._map = mmap(self._fd, HEADER_BYTES + self.slots * self.slot_bytes)
+        self._locks = [threading.Lock() for _ in range(STRIPES)]
+        self._counter_lock = threading.Lock()
+
+        # Contadores deste processo
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.sets = 0
+        self.evictions = 0
+        self.too_large = 0
+        self.torn_reads = 0
+
+    @classmethod
+    def from_env(cls, create: bool = False) -> Optional['SharedCache']:
+        """
+        Abre a tabela configurada em SHARED_CACHE_PATH
+
+        Args:
+            create (bool): Recria a tabela vazia (supervisor, antes de criar os workers)
+
+        Returns:
+            Optional[SharedCache]: Tabela aberta ou None se estiver desativada ou não puder ser aberta
+        """
+        if os.getenv('SHARED_CACHE_ENABLED', 'true').strip().lower() not in ('1', 'true', 'yes', 'on'):
+            return None
+        path = os.getenv('SHARED_CACHE_PATH', '').strip()
+        if not path:
+            return None
+        try:
+            return cls(
+                path,
+                slots=int(os.getenv('SHARED_CACHE_SLOTS', 32768)),
+                slot_bytes=int(os.getenv('SHARED_CACHE_SLOT_BYTES', 512)),
+                ttl=float(os.getenv('CACHE_TTL_SECONDS', 300)),
+                negative_ttl=float(os.getenv('CACHE_NEGATIVE_TTL_SECONDS', 30)),
+                tombstone_ttl=float(os.getenv('SHARED_CACHE_TOMBSTONE_SECONDS', 86400)),
+                create=create,
+            )
+        except OSError as e:
+            logger.warning("Cache compartilhado desativado: %s", e)
+            return None
+
+    # --- Arquivo ---
+
+    def _header(self) -> bytes:
+        return HEADER.pack(MAGIC, self.slots, self.slot_bytes, STRIPES).ljust(HEADER_BYTES, b'\0')
+
+    def _create_file(self) -> str:
+        # Tabela vazia num arquivo temporário, publicada depois com link/rename (nunca visível pela metade)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix='.shared-cache-', dir=directory)
+        try:
+            os.write(fd, self._header())
+            os.ftruncate(fd, HEADER_BYTES + self.slots * self.slot_bytes)
+        finally:
+            os.close(fd)
+        return temp_path
+
+    def _matches(self, fd: int) -> bool:
+        header = os.pread(fd, HEADER.size, 0)
+        return (len(header) == HEADER.size and HEADER.unpack(header) == (MAGIC, self.slots, self.slot_bytes, STRIPES)
+                and os.fstat(fd).st_size == HEADER_BYTES + self.slots * self.slot_bytes)
+
+    def _open(self, create: bool) -> int:
+        if not create:
+            try:
+                fd = os.open(self.path, os.O_RDWR)
+            except FileNotFoundError:
+                temp_path = self._create_file()
+                try:
+                    os.link(temp_path, self.path) # Falha se outro processo criou antes: usa o dele
+                except FileExistsError:
+                    pass
+                finally:
+                    os.unlink(temp_path)
+                fd = os.open(self.path, os.O_RDWR)
+            if self._matches(fd):
+                return fd
+            os.close(fd)
+            logger.warning("Cache compartilhado '%s' com outro formato; recriando", self.path)
+        temp_path = self._create_file()
+        os.replace(temp_path, self.path)
+        return os.open(self.path, os.O_RDWR)
+
+    def close(self):
+        """Desfaz o mapeamento (o arquivo continua para os outros processos)"""
+        self._map.close()
+        os.close(self._fd)
+
+    def remove(self):
+        """Fecha e apaga o arquivo da tabela (ao encerrar o supervisor)"""
+        self.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    # --- Posições ---
+
+    def _slot_offset(self, key_hash: int, step: int) -> int:
+        stripe = key_hash % STRIPES
+        index = ((key_hash >> 16) + step) % self.per_stripe
+        return HEADER_BYTES + (stripe * self.per_stripe + index) * self.slot_bytes
+
+    def _read_slot(self, offset: int, key_hash: int, key: bytes) -> Tuple[bool, Optional[Tuple]]:
+        # (consistente, (estado, validade, destino)) — None se a posição não é desta chave
+        mapped = self._map
+        for _ in range(READ_RETRIES):
+            sequence = SEQ.unpack_from(mapped, offset)[0]
+            if sequence & 1:
+                continue # Escrita em andamento
+            state, key_len, url_len, stored_hash, valid_until, status, created, expires = \
+                META.unpack_from(mapped, offset + SEQ.size)
+            if state == EMPTY or stored_hash != key_hash:
+                return True, None
+            stored_key = mapped[offset + KEY_OFFSET:offset + KEY_OFFSET + key_len]
+            url = mapped[offset + URL_OFFSET:offset + URL_OFFSET + url_len] if state == POSITIVE else None
+            if SEQ.unpack_from(mapped, offset)[0] != sequence:
+                continue # Sobrescrita durante a cópia
+            if stored_key != key:
+                return True, None
+            target = None
+            if url is not None:
+                target = RedirectTarget(url.decode('utf-8'), status or None, _optional(created), _optional(expires))
+            return True, (state, valid_until, target)
+        self.torn_reads += 1
+        return False, None
+
+    # --- Operações ---
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Busca uma entrada na tabela (sem lock)
+
+        Args:
+            key (str): Código curto
+
+        Returns:
+            Tuple[bool, Any]: (encontrada, (destino ou None para resultado negativo, validade em time.time()))
+        """
+        encoded = key.encode('utf-8')
+        if len(encoded) > KEY_BYTES:
+            self.misses += 1
+            return False, None
+        key_hash = _key_hash(encoded)
+        now = time.time()
+        mapped = self._map
+        per_stripe = self.per_stripe
+        base = HEADER_BYTES + (key_hash % STRIPES) * per_stripe * self.slot_bytes
+        home = key_hash >> 16
+        for step in range(PROBE_WINDOW):
+            offset = base + (home + step) % per_stripe * self.slot_bytes
+            # Filtro rápido pelo hash antes da leitura completa
+            if HASH.unpack_from(mapped, offset + HASH_OFFSET)[0] != key_hash:
+                continue
+            consistent, entry = self._read_slot(offset, key_hash, encoded)
+            if entry is None:
+                continue
+            state, valid_until, target = entry
+            if valid_until <= now:
+                break
+            self.hits += 1
+            if state != POSITIVE:
+                self.negative_hits += 1
+            return True, (target, valid_until)
+        self.misses += 1
+        return False, None
+
+    def _write_slot(self, offset: int, state: int, key_hash: int, key: bytes, url: bytes, valid_until: float,
+                    target: Optional[RedirectTarget]):
+        # Executado com o lock da faixa
+        mapped = self._map
+        sequence = SEQ.unpack_from(mapped, offset)[0]
+        SEQ.pack_into(mapped, offset, sequence + 1)
+        status = created = expires = None
+        if target is not None:
+            status, created, expires = target.status, target.last_modified, target.expires_at
+        META.pack_into(
+            mapped, offset + SEQ.size, state, len(key), len(url), key_hash, valid_until, status or 0,
+            math.nan if created is None else created, math.nan if expires is None else expires,
+        )
+        mapped[offset + KEY_OFFSET:offset + KEY_OFFSET + len(key)] = key
+        if url:
+            mapped[offset + URL_OFFSET:offset + URL_OFFSET + len(url)] = url
+        SEQ.pack_into(mapped, offset, sequence + 2)
+
+    def _locked(self, stripe: int):
+        return _StripeLock(self._locks[stripe], self._fd, stripe)
+
+    def set(self, key: str, value: Optional[RedirectTarget], ttl: Optional[float] = None):
+        """
+        Grava uma entrada, substituindo a mesma chave ou removendo a que venceria primeiro
+
+        Args:
+            key (str): Código curto
+            value (Optional[RedirectTarget]): Destino ou None (resultado negativo)
+            ttl (Optional[float]): Tempo de vida em segundos; usa o padrão da tabela se omitido
+        """
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0:
+            return
+        encoded = key.encode('utf-8')
+        url = value.original_url.encode('utf-8') if value is not None else b''
+        if len(encoded) > KEY_BYTES or len(url) > self.max_url_bytes:
+            self.too_large += 1
+            return
+
+        self._store(encoded, POSITIVE if value is not None else NEGATIVE, url, value, ttl)
+
+    def _store(self, encoded: bytes, state: int, url: bytes, value: Optional[RedirectTarget], ttl: float):
+        key_hash = _key_hash(encoded)
+        now = time.time()
+        mapped = self._map
+        with self._locked(key_hash % STRIPES):
+            chosen = None
+            soonest = None
+            for step in range(PROBE_WINDOW):
+                offset = self._slot_offset(key_hash, step)
+                slot_state, key_len, _, stored_hash, valid_until = META.unpack_from(mapped, offset + SEQ.size)[:5]
+                if slot_state != EMPTY and stored_hash == key_hash and \
+                        mapped[offset + KEY_OFFSET:offset + KEY_OFFSET + key_len] == encoded:
+                    if slot_state == DELETED and state == NEGATIVE and valid_until > now:
+                        return  # A marca de removido vale mais que um negativo comum
+                    chosen = offset
+                    break
+                if chosen is None and (slot_state == EMPTY or valid_until <= now):
+                    chosen = offset
+                if soonest is None or valid_until < soonest[0]:
+                    soonest = (valid_until, offset)
+            if chosen is None:
+                chosen = soonest[1]
+                self.evictions += 1
+            self._write_slot(chosen, state, key_hash, encoded, url, now + ttl, value)
+        self.sets += 1
+
+    def invalidate(self, key: str, deleted: bool = False):
+        """
+        Remove a chave da tabela e avisa os processos para descartarem o próprio L1
+
+        Args:
+            key (str): Código curto
+            deleted (bool): O link foi removido: grava a marca DELETED em vez de só apagar a entrada
+        """
+        encoded = key.encode('utf-8')
+        if len(encoded) > KEY_BYTES:
+            return
+        if deleted:
+            self._store(encoded, DELETED, b'', None, self.tombstone_ttl)
+        else:
+            key_hash = _key_hash(encoded)
+            mapped = self._map
+            with self._locked(key_hash % STRIPES):
+                for step in range(PROBE_WINDOW):
+                    offset = self._slot_offset(key_hash, step)
+                    slot_state, key_len, _, stored_hash = META.unpack_from(mapped, offset + SEQ.size)[:4]
+                    if slot_state != EMPTY and stored_hash == key_hash and \
+                            mapped[offset + KEY_OFFSET:offset + KEY_OFFSET + key_len] == encoded:
+                        self._write_slot(offset, EMPTY, 0, b'', b'', 0.0, None)
+        with _StripeLock(self._counter_lock, self._fd, STRIPES):
+            count = COUNTER.unpack_from(self._map, INVALIDATIONS_OFFSET)[0]
+            COUNTER.pack_into(self._map, INVALIDATIONS_OFFSET, count + 1)
+
+    def invalidations(self) -> int:
+        """Quantidade de invalidações feitas na tabela por todos os processos (leitura sem lock)"""
+        return COUNTER.unpack_from(self._map, INVALIDATIONS_OFFSET)[0]
+
+    def is_deleted(self, key: str) -> bool:
+        """
+        Indica se a chave tem a marca de link removido (não conta como acerto ou falha)
+
+        Args:
+            key (str): Código curto
+
+        Returns:
+            bool: True se o link foi removido há menos de 'tombstone_ttl' segundos
+        """
+        encoded = key.encode('utf-8')
+        if len(encoded) > KEY_BYTES:
+            return False
+        key_hash = _key_hash(encoded)
+        now = time.time()
+        for step in range(PROBE_WINDOW):
+            offset = self._slot_offset(key_hash, step)
+            if HASH.unpack_from(self._map, offset + HASH_OFFSET)[0] != key_hash:
+                continue
+            _, entry = self._read_slot(offset, key_hash, encoded)
+            if entry is not None:
+                return entry[0] == DELETED and entry[1] > now
+        return False
+
+    def size(self) -> int:
+        """Quantidade de entradas válidas na tabela (percorre todas as posições)"""
+        now = time.time()
+        size = 0
+        for index in range(self.slots):
+            offset = HEADER_BYTES + index * self.slot_bytes
+            state, _, _, _, valid_until = META.unpack_from(self._map, offset + SEQ.size)[:5]
+            if state != EMPTY and valid_until > now:
+                size += 1
+        return size
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna os contadores deste processo (a ocupação da tabela está em size())
+
+        Returns:
+            Dict[str, Any]: Acertos, falhas, gravações e remoções
+        """
+        lookups = self.hits + self.misses
+        return {
+            'enabled': True,
+            'path': self.path,
+            'slots': self.slots,
+            'slot_bytes': self.slot_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'negative_hits': self.negative_hits,
+            'sets': self.sets,
+            'evictions': self.evictions,
+            'too_large': self.too_large,
+            'torn_reads': self.torn_reads,
+            'hit_ratio': (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+class _StripeLock:
+    """Lock de uma faixa: thread lock (mesmo processo) + lock de byte via fcntl (entre processos)"""
+
+    __slots__ = ('lock', 'fd', 'stripe')
+
+    def __init__(self, lock: threading.Lock, fd: int, stripe: int):
+        self.lock = lock
+        self.fd = fd
+        self.stripe = stripe
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, self.stripe, os.SEEK_SET)
+        except BaseException:
+            self.lock.release()
+            raise
+
+    def __exit__(self, *exc):
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, self.stripe, os.SEEK_SET)
+        finally:
+            self.lock.release()
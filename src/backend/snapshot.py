@@ -0,0 +1,199 @@
+"""
+Módulo de snapshot somente leitura (mmap) dos redirecionamentos
+
+Formato do arquivo (little-endian):
+    cabeçalho  : magic (8 bytes), largura do código (uint32), quantidade (uint64), gerado em (double)
+    índice     : 'quantidade' entradas ordenadas por código, cada uma com o código
+                 preenchido com zeros até a largura fixa, offset (uint64) e tamanho (uint32)
+                 da URL no heap e status do redirecionamento (uint16; 0 usa o global)
+    heap       : URLs originais em UTF-8, concatenadas
+"""
+import mmap
+import os
+import shutil
+import struct
+import time
+from typing import Any, Dict, Optional
+from .redirects import RedirectTarget
+
+MAGIC = b'LLSNAP02'
+HEADER = struct.Struct('<8sIQd')
+POINTER = struct.Struct('<QIH')
+
+# Registro intermediário da exportação: tamanho do código, seguido do código e do POINTER
+CODE_LENGTH = struct.Struct('<H')
+COPY_BUFFER = 1 << 20
+
+
+def export_snapshot(storage, path: str) -> int:
+    """
+    Compila todos os links (código → URL e status) do armazenamento em um arquivo de snapshot
+
+    Links com expiração ficam de fora: o snapshot não muda até ser gerado de
+    novo, então eles são sempre atendidos pelo banco (e pelo cache em memória,
+    que respeita o tempo restante de cada link).
+
+    Os links chegam já ordenados por código (iter_links) e são gravados em
+    fluxo, com memória constante: códigos e URLs vão para dois arquivos
+    intermediários, e o índice de largura fixa é montado ao final, quando a
+    largura do maior código é conhecida. O arquivo é escrito ao lado do
+    destino e renomeado ao final, para que servidores lendo o snapshot antigo
+    nunca vejam um arquivo incompleto.
+
+    Args:
+        storage (StorageBackend): Armazenamento de origem (já conectado)
+        path (str): Caminho do arquivo de snapshot
+
+    Returns:
+        int: Quantidade de links exportados
+
+    Raises:
+        ValueError: Se o armazenamento não entregar os links em ordem de código
+    """
+    generated_at = time.time()
+    temporary_path = f"{path}.tmp"
+    codes_path = f"{path}.codes.tmp"
+    heap_path = f"{path}.heap.tmp"
+    count = 0
+    code_width = 1
+    offset = 0
+    previous = None
+    try:
+        with open(codes_path, 'wb', buffering=COPY_BUFFER) as codes_file, \
+                open(heap_path, 'wb', buffering=COPY_BUFFER) as heap_file:
+            for code, url, status in storage.iter_links(permanent_only=True):
+                code = code.encode('utf-8')
+                if b'\0' in code:
+                    continue  # Não seria encontrado pela busca (get() recusa o caractere): fica para o banco
+                if previous is not None and code <= previous:
+                    raise ValueError(f"Links fora de ordem de código: {code!r} depois de {previous!r}")
+                url = url.encode('utf-8')
+                codes_file.write(CODE_LENGTH.pack(len(code)))
+                codes_file.write(code)
+                codes_file.write(POINTER.pack(offset, len(url), status or 0))
+                heap_file.write(url)
+                offset += len(url)
+                code_width = max(code_width, len(code))
+                count += 1
+                previous = code
+
+        with open(temporary_path, 'wb', buffering=COPY_BUFFER) as snapshot_file:
+            snapshot_file.write(HEADER.pack(MAGIC, code_width, count, generated_at))
+            with open(codes_path, 'rb', buffering=COPY_BUFFER) as codes_file:
+                for _ in range(count):
+                    length = CODE_LENGTH.unpack(codes_file.read(CODE_LENGTH.size))[0]
+                    snapshot_file.write(codes_file.read(length).ljust(code_width, b'\0'))
+                    snapshot_file.write(codes_file.read(POINTER.size))
+            with open(heap_path, 'rb') as heap_file:
+                shutil.copyfileobj(heap_file, snapshot_file, COPY_BUFFER)
+
+        os.replace(temporary_path, path)
+    finally:
+        for leftover in (codes_path, heap_path, temporary_path):
+            try:
+                os.remove(leftover)
+            except FileNotFoundError:
+                pass
+    return count
+
+
+class RedirectSnapshot:
+    """
+    Leitura de um snapshot via mmap com busca binária
+
+    O arquivo é mapeado somente para leitura, então vários processos
+    compartilham as mesmas páginas pelo page cache do sistema operacional.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Snapshot vazio ou inválido: {path}")
+
+        magic, self.code_width, self.count, self.generated_at = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Arquivo não é um snapshot de redirecionamentos: {path}")
+
+        self._entry_size = self.code_width + POINTER.size
+        self._index_offset = HEADER.size
+        self._heap_offset = self._index_offset + self.count * self._entry_size
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> Optional['RedirectSnapshot']:
+        """
+        Abre o snapshot indicado em REDIRECT_SNAPSHOT_PATH, se configurado
+
+        Returns:
+            Optional[RedirectSnapshot]: Snapshot aberto ou None se não configurado/inexistente
+        """
+        path = os.getenv('REDIRECT_SNAPSHOT_PATH', '').strip()
+        if not path or not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def get(self, short_code: str) -> Optional[RedirectTarget]:
+        """
+        Busca o destino de um código no snapshot
+
+        O Last-Modified dos links do snapshot é a data de geração do arquivo.
+
+        Args:
+            short_code (str): Código curto
+
+        Returns:
+            Optional[RedirectTarget]: Destino ou None se o código não está no snapshot
+        """
+        key = short_code.encode('utf-8')
+        # O preenchimento com zeros tornaria "abc\0" igual a "abc"
+        if len(key) > self.code_width or b'\0' in key:
+            self.misses += 1
+            return None
+        key = key.ljust(self.code_width, b'\0')
+
+        low, high = 0, self.count
+        width = self.code_width
+        while low < high:
+            middle = (low + high) // 2
+            position = self._index_offset + middle * self._entry_size
+            candidate = self._map[position:position + width]
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                offset, length, status = POINTER.unpack_from(self._map, position + width)
+                start = self._heap_offset + offset
+                self.hits += 1
+                return RedirectTarget(
+                    original_url=self._map[start:start + length].decode('utf-8'),
+                    status=status or None,
+                    last_modified=self.generated_at,
+                )
+
+        self.misses += 1
+        return None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna informações e contadores do snapshot"""
+        return {
+            'path': self.path,
+            'links': self.count,
+            'generated_at': self.generated_at,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def close(self):
+        """Libera o mapeamento e o arquivo"""
+        self._map.close()
+        self._file.close()
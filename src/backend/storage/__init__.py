@@ -0,0 +1,57 @@
+"""
+Backends de armazenamento de URLs (MongoDB, SQLite e memória)
+"""
+import os
+from typing import Optional
+from .base import DuplicateCodeError, StorageBackend, StorageError
+from .memory import MemoryStorage
+from .sqlite import SQLiteStorage
+
+_default_storage: Optional[StorageBackend] = None
+
+
+def create_storage(backend: Optional[str] = None) -> StorageBackend:
+    """
+    Cria o backend de armazenamento configurado em STORAGE_BACKEND
+
+    Args:
+        backend (Optional[str]): 'mongo', 'sqlite' ou 'memory' (usa o ambiente se omitido)
+
+    Returns:
+        StorageBackend: Backend de armazenamento
+    """
+    backend = (backend or os.getenv('STORAGE_BACKEND', 'mongo')).strip().lower()
+    if backend == 'mongo':
+        # Importado sob demanda: os modos embutidos não exigem o pymongo
+        from .mongo import MongoStorage
+        return MongoStorage()
+    if backend == 'sqlite':
+        return SQLiteStorage(os.getenv('SQLITE_PATH', 'url_shortener.db'),
+                             pool_size=int(os.getenv('SQLITE_POOL_SIZE', 16)))
+    if backend == 'memory':
+        return MemoryStorage()
+    raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
+
+
+def get_storage() -> StorageBackend:
+    """
+    Retorna o backend de armazenamento compartilhado pelo processo
+
+    Returns:
+        StorageBackend: Backend criado na primeira chamada a partir do ambiente
+    """
+    global _default_storage
+    if _default_storage is None:
+        _default_storage = create_storage()
+    return _default_storage
+
+
+__all__ = [
+    'DuplicateCodeError',
+    'MemoryStorage',
+    'SQLiteStorage',
+    'StorageBackend',
+    'StorageError',
+    'create_storage',
+    'get_storage',
+]
@@ -0,0 +1,116 @@
+"""
+Acesso assíncrono ao armazenamento, usado pelo servidor de redirecionamento asyncio
+
+Só as operações do caminho do redirecionamento são assíncronas (busca por
+código). O MongoDB usa o cliente assíncrono nativo do pymongo; os backends
+embutidos são adaptados: a memória é chamada direto (nunca bloqueia) e o
+SQLite roda no pool de threads padrão do asyncio.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+from .base import StorageBackend
+
+
+class AsyncStorage:
+    """Interface assíncrona mínima do caminho do redirecionamento"""
+
+    name = 'base'
+
+    async def connect(self) -> bool:
+        """
+        Conecta ao armazenamento (em caso de falha, a reconexão continua em segundo plano)
+
+        Returns:
+            bool: True se conectou com sucesso, False caso contrário
+        """
+        raise NotImplementedError
+
+    def connect_in_background(self):
+        """Inicia a conexão (ou reconexão) em segundo plano, sem bloquear o loop"""
+        raise NotImplementedError
+
+    def is_connected(self) -> bool:
+        """
+        Returns:
+            bool: True se o armazenamento pode ser consultado
+        """
+        raise NotImplementedError
+
+    async def get_by_code(self, short_url: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca um documento pelo código curto
+
+        Args:
+            short_url (str): Código curto
+
+        Returns:
+            Optional[Dict[str, Any]]: Documento encontrado ou None
+
+        Raises:
+            StorageError: Se o armazenamento não puder ser consultado
+        """
+        raise NotImplementedError
+
+    async def get_many_by_code(self, short_urls: List[str]) -> List[Dict[str, Any]]:
+        """
+        Busca em lote os documentos de vários códigos curtos (aquecimento do cache)
+
+        Args:
+            short_urls (List[str]): Códigos curtos
+
+        Returns:
+            List[Dict[str, Any]]: Documentos encontrados, em qualquer ordem
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        """Libera as conexões abertas por este objeto"""
+
+
+class ThreadedAsyncStorage(AsyncStorage):
+    """Adapta um backend síncrono (SQLite, memória) à interface assíncrona"""
+
+    def __init__(self, storage: StorageBackend):
+        self.storage = storage
+        self.name = storage.name
+        # A memória responde sem E/S: a ida ao pool de threads custaria mais que a própria busca
+        self.inline = storage.name == 'memory'
+
+    async def connect(self) -> bool:
+        return await asyncio.to_thread(self.storage.connect)
+
+    def connect_in_background(self):
+        self.storage.connect_in_background()
+
+    def is_connected(self) -> bool:
+        return self.storage.is_connected()
+
+    async def get_by_code(self, short_url: str) -> Optional[Dict[str, Any]]:
+        if self.inline:
+            return self.storage.get_by_code(short_url)
+        return await asyncio.to_thread(self.storage.get_by_code, short_url)
+
+    async def get_many_by_code(self, short_urls: List[str]) -> List[Dict[str, Any]]:
+        if self.inline:
+            return self.storage.get_many_by_code(short_urls)
+        return await asyncio.to_thread(self.storage.get_many_by_code, short_urls)
+
+
+def create_async_storage(storage: Optional[StorageBackend] = None) -> AsyncStorage:
+    """
+    Cria o acesso assíncrono correspondente ao backend configurado
+
+    Args:
+        storage (Optional[StorageBackend]): Backend síncrono do processo (padrão: get_storage())
+
+    Returns:
+        AsyncStorage: Cliente assíncrono do MongoDB ou adaptador do backend embutido
+    """
+    from . import get_storage
+
+    storage = storage or get_storage()
+    if storage.name == 'mongo':
+        # Importado sob demanda: os modos embutidos não exigem o pymongo
+        from .mongo_async import AsyncMongoStorage
+        return AsyncMongoStorage.from_env()
+    return ThreadedAsyncStorage(storage)
@@ -0,0 +1,251 @@
+"""
+Interface comum dos backends de armazenamento de URLs
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class StorageError(Exception):
+    """Erro ao acessar o backend de armazenamento"""
+
+
+class DuplicateCodeError(StorageError):
+    """O código curto informado já está em uso"""
+
+
+class StorageBackend:
+    """
+    Interface base dos backends de armazenamento
+
+    Os documentos trafegam como dicionários com as chaves 'original_url',
+    'short_url', 'url_hash' (resumo da URL canônica, em bytes), 'created_at'
+    (datetime), 'created_timestamp' (int) e, opcionalmente, 'redirect_status'
+    (status HTTP do redirecionamento do link) e 'expires_at' (datetime em UTC;
+    links expirados são removidos pelo backend quando ele permite, e rejeitados
+    na consulta pelo URLShortener).
+    Erros de acesso são sinalizados com StorageError.
+    """
+
+    name = 'base'
+
+    def connect(self) -> bool:
+        """
+        Abre a conexão com o armazenamento e garante o esquema/índices
+
+        Returns:
+            bool: True se conectou com sucesso, False caso contrário
+        """
+        raise NotImplementedError
+
+    def connect_in_background(self):
+        """
+        Solicita a conexão sem bloquear quem chamou, quando o backend permite
+
+        Os backends embutidos conectam na hora; o MongoDB reconecta numa thread de fundo.
+        """
+        self.connect()
+
+    def disconnect(self):
+        """Fecha a conexão com o armazenamento"""
+        raise NotImplementedError
+
+    def is_connected(self) -> bool:
+        """
+        Verifica se o armazenamento está pronto para uso
+
+        Returns:
+            bool: True se conectado, False caso contrário
+        """
+        raise NotImplementedError
+
+    def get_by_code(self, short_url: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca um documento pelo código curto
+
+        Args:
+            short_url (str): Código curto
+
+        Returns:
+            Optional[Dict[str, Any]]: Documento ou None se não encontrado
+        """
+        raise NotImplementedError
+
+    def get_many_by_code(self, short_urls: List[str]) -> List[Dict[str, Any]]:
+        """
+        Busca em lote os documentos de vários códigos curtos (ex.: aquecimento do cache)
+
+        Args:
+            short_urls (List[str]): Códigos curtos
+
+        Returns:
+            List[Dict[str, Any]]: Documentos encontrados, em qualquer ordem
+        """
+        raise NotImplementedError
+
+    def get_by_url_hash(self, url_hash: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Busca um documento pelo resumo da URL original canônica (ignora links com expiração)
+
+        Args:
+            url_hash (bytes): Resumo calculado por validators.url_digest
+
+        Returns:
+            Optional[Dict[str, Any]]: Documento ou None se não encontrado
+        """
+        raise NotImplementedError
+
+    def find_by_url_hashes(self, url_hashes: List[bytes]) -> List[Dict[str, Any]]:
+        """
+        Busca em lote os documentos de vários resumos de URL (ignora links com expiração)
+
+        Args:
+            url_hashes (List[bytes]): Resumos das URLs originais canônicas
+
+        Returns:
+            List[Dict[str, Any]]: Documentos encontrados ('url_hash', 'original_url' e 'short_url')
+        """
+        raise NotImplementedError
+
+    def insert(self, document: Dict[str, Any]):
+        """
+        Grava um novo documento
+
+        Args:
+            document (Dict[str, Any]): Documento a ser gravado
+
+        Raises:
+            DuplicateCodeError: Se o código curto já existir
+        """
+        raise NotImplementedError
+
+    def insert_many(self, documents: List[Dict[str, Any]]) -> Dict[int, StorageError]:
+        """
+        Grava vários documentos sem interromper o lote em caso de falha individual
+
+        Args:
+            documents (List[Dict[str, Any]]): Documentos a serem gravados
+
+        Returns:
+            Dict[int, StorageError]: Falhas por posição no lote (DuplicateCodeError para colisões)
+        """
+        raise NotImplementedError
+
+    def list_urls(self, limit: int, after: Optional[Tuple[Any, str]] = None,
+                  search: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Lista uma página de links do mais recente para o mais antigo (paginação por chave)
+
+        A ordem é ('created_at', 'short_url') decrescente e cada página continua a
+        partir da chave do último item da anterior, sem 'skip' no banco.
+
+        Args:
+            limit (int): Quantidade máxima de documentos
+            after (Optional[Tuple[Any, str]]): Chave (created_at, short_url) do último item já lido
+            search (Optional[str]): Só links cuja URL original ou código contém o texto
+                (sem diferenciar maiúsculas)
+
+        Returns:
+            List[Dict[str, Any]]: Documentos com apenas 'original_url', 'short_url' e 'created_at'
+        """
+        raise NotImplementedError
+
+    def allocate_ids(self, counter_name: str, count: int) -> int:
+        """
+        Reserva atomicamente um bloco de IDs sequenciais
+
+        Args:
+            counter_name (str): Nome do contador
+            count (int): Tamanho do bloco
+
+        Returns:
+            int: Primeiro ID do bloco reservado
+        """
+        raise NotImplementedError
+
+    def iter_links(self, batch_size: int = 5000, permanent_only: bool = False) -> Iterator[Tuple[str, str, Optional[int]]]:
+        """
+        Percorre todos os links (código curto, URL original, status) em ordem de código, sem carregar a base inteira
+
+        A ordem é a dos bytes do código em UTF-8 (a mesma da busca binária do
+        snapshot), servida pelo índice único de 'short_url'.
+
+        Args:
+            batch_size (int): Quantidade de registros lidos por ida ao banco
+            permanent_only (bool): Omite os links com expiração
+
+        Returns:
+            Iterator[Tuple[str, str, Optional[int]]]: (short_url, original_url, redirect_status ou None)
+        """
+        raise NotImplementedError
+
+    def iter_documents(self, batch_size: int = 5000) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre todos os documentos com os campos exportáveis, sem carregar a base inteira
+
+        Args:
+            batch_size (int): Quantidade de registros lidos por ida ao banco
+
+        Returns:
+            Iterator[Dict[str, Any]]: Documentos com 'short_url', 'original_url', 'created_at',
+            'created_timestamp', 'clicks' e, quando definidos, 'redirect_status' e 'expires_at'
+        """
+        raise NotImplementedError
+
+    def iter_codes(self, since: Optional[datetime] = None, batch_size: int = 5000) -> Iterator[Tuple[str, datetime]]:
+        """
+        Percorre os códigos curtos (e o momento da gravação), opcionalmente só os gravados a partir de 'since'
+
+        O momento da gravação é o da inserção no armazenamento, não o
+        'created_at' do link: links importados com uma data de criação antiga
+        também aparecem para quem acompanha os códigos novos.
+
+        Args:
+            since (Optional[datetime]): Momento de gravação mínimo (None percorre todos)
+            batch_size (int): Quantidade de registros lidos por ida ao banco
+
+        Returns:
+            Iterator[Tuple[str, datetime]]: Pares (short_url, momento da gravação)
+        """
+        raise NotImplementedError
+
+    def delete(self, short_url: str) -> bool:
+        """
+        Remove um link pelo código curto
+
+        Args:
+            short_url (str): Código curto
+
+        Returns:
+            bool: True se o link existia
+        """
+        raise NotImplementedError
+
+    def increment_clicks(self, counts: Dict[str, int]):
+        """
+        Soma contagens de cliques em vários links de uma vez
+
+        Args:
+            counts (Dict[str, int]): Cliques a somar por código curto
+        """
+        raise NotImplementedError
+
+    def migrate(self) -> int:
+        """
+        Atualiza os dados gravados por versões anteriores (comando único, fora da conexão)
+
+        Returns:
+            int: Quantidade de documentos atualizados
+
+        Raises:
+            StorageError: Se o banco não estiver conectado ou a atualização falhar
+        """
+        return 0
+
+    def pool_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Retorna estatísticas do pool de conexões, quando o backend usa um
+
+        Returns:
+            Optional[Dict[str, Any]]: Estatísticas ou None se não se aplica
+        """
+        return None
@@ -0,0 +1,171 @@
+"""
+Backend de armazenamento puramente em memória (testes e benchmarks)
+"""
+import bisect
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .base import DuplicateCodeError, StorageBackend, StorageError
+
+
+class MemoryStorage(StorageBackend):
+    """Armazenamento em dicionários do processo; os dados se perdem ao encerrar"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._by_code: Dict[str, Dict[str, Any]] = {}
+        self._by_hash: Dict[bytes, Dict[str, Any]] = {}
+        self._ordered: List[Dict[str, Any]] = []  # Ordem de inserção
+        self._timeline: List[Tuple[Any, str]] = []  # Chaves (created_at, short_url) ordenadas
+        self._insertions: List[Tuple[datetime, str]] = []  # (momento da gravação, short_url), em ordem
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._connected = False
+
+    def connect(self) -> bool:
+        self._connected = True
+        return True
+
+    def disconnect(self):
+        self._connected = False
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def _check_connected(self):
+        if not self._connected:
+            raise StorageError('Banco de dados não conectado')
+
+    def get_by_code(self, short_url: str) -> Optional[Dict[str, Any]]:
+        self._check_connected()
+        document = self._by_code.get(short_url)
+        return dict(document) if document else None
+
+    def get_many_by_code(self, short_urls: List[str]) -> List[Dict[str, Any]]:
+        self._check_connected()
+        documents = (self._by_code.get(short_url) for short_url in short_urls)
+        return [dict(document) for document in documents if document]
+
+    def get_by_url_hash(self, url_hash: bytes) -> Optional[Dict[str, Any]]:
+        self._check_connected()
+        document = self._by_hash.get(url_hash)
+        return dict(document) if document else None
+
+    def find_by_url_hashes(self, url_hashes: List[bytes]) -> List[Dict[str, Any]]:
+        self._check_connected()
+        documents = []
+        for url_hash in url_hashes:
+            document = self._by_hash.get(url_hash)
+            if document:
+                documents.append({
+                    'url_hash': url_hash, 'original_url': document['original_url'], 'short_url': document['short_url']
+                })
+        return documents
+
+    def _insert_locked(self, document: Dict[str, Any]):
+        if document['short_url'] in self._by_code:
+            raise DuplicateCodeError(f"Código já existe: {document['short_url']}")
+        stored = dict(document)
+        self._by_code[stored['short_url']] = stored
+        # Links com expiração não entram na deduplicação
+        if stored.get('url_hash') is not None and stored.get('expires_at') is None:
+            self._by_hash.setdefault(stored['url_hash'], stored)
+        self._ordered.append(stored)
+        bisect.insort(self._timeline, (stored['created_at'], stored['short_url']))
+        self._insertions.append((datetime.now(), stored['short_url']))
+
+    def insert(self, document: Dict[str, Any]):
+        self._check_connected()
+        with self._lock:
+            self._insert_locked(document)
+
+    def insert_many(self, documents: List[Dict[str, Any]]) -> Dict[int, StorageError]:
+        self._check_connected()
+        failures: Dict[int, StorageError] = {}
+        with self._lock:
+            for index, document in enumerate(documents):
+                try:
+                    self._insert_locked(document)
+                except DuplicateCodeError as e:
+                    failures[index] = e
+        return failures
+
+    def list_urls(self, limit: int, after: Optional[Tuple[Any, str]] = None,
+                  search: Optional[str] = None) -> List[Dict[str, Any]]:
+        self._check_connected()
+        with self._lock:
+            end = len(self._timeline) if after is None else bisect.bisect_left(self._timeline, tuple(after))
+            if search is None:
+                keys = self._timeline[max(0, end - limit):end]
+                documents = [self._by_code[short_url] for _, short_url in reversed(keys)]
+            else:
+                search = search.lower()
+                documents = []
+                for position in range(end - 1, -1, -1):
+                    document = self._by_code[self._timeline[position][1]]
+                    if search in document['original_url'].lower() or search in document['short_url'].lower():
+                        documents.append(document)
+                        if len(documents) == limit:
+                            break
+        return [
+            {'original_url': document['original_url'], 'short_url': document['short_url'], 'created_at': document['created_at']}
+            for document in documents
+        ]
+
+    def allocate_ids(self, counter_name: str, count: int) -> int:
+        self._check_connected()
+        with self._lock:
+            value = self._counters.get(counter_name, 0) + count
+            self._counters[counter_name] = value
+        return value - count
+
+    def iter_links(self, batch_size: int = 5000, permanent_only: bool = False) -> Iterator[Tuple[str, str, Optional[int]]]:
+        self._check_connected()
+        with self._lock:
+            documents = sorted(self._ordered, key=lambda document: document['short_url'])
+        for document in documents:
+            if permanent_only and document.get('expires_at') is not None:
+                continue
+            yield document['short_url'], document['original_url'], document.get('redirect_status')
+
+    def iter_documents(self, batch_size: int = 5000) -> Iterator[Dict[str, Any]]:
+        self._check_connected()
+        with self._lock:
+            documents = list(self._ordered)
+        for document in documents:
+            exported = {key: value for key, value in document.items() if key != 'url_hash'}
+            exported.setdefault('clicks', 0)
+            yield exported
+
+    def iter_codes(self, since: Optional[datetime] = None, batch_size: int = 5000) -> Iterator[Tuple[str, datetime]]:
+        self._check_connected()
+        with self._lock:
+            start = 0 if since is None else bisect.bisect_left(self._insertions, (since, ''))
+            keys = self._insertions[start:]
+        for inserted_at, short_url in keys:
+            if short_url in self._by_code:  # Removidos continuam na lista de gravações
+                yield short_url, inserted_at
+
+    def delete(self, short_url: str) -> bool:
+        self._check_connected()
+        with self._lock:
+            document = self._by_code.pop(short_url, None)
+            if document is None:
+                return False
+            if self._by_hash.get(document.get('url_hash')) is document:
+                del self._by_hash[document['url_hash']]
+            self._ordered.remove(document)
+            key = (document['created_at'], short_url)
+            position = bisect.bisect_left(self._timeline, key)
+            if position < len(self._timeline) and self._timeline[position] == key:
+                del self._timeline[position]
+        return True
+
+    def increment_clicks(self, counts: Dict[str, int]):
+        self._check_connected()
+        with self._lock:
+            for code, count in counts.items():
+                document = self._by_code.get(code)
+                if document is not None:
+                    document['clicks'] = document.get('clicks', 0) + count
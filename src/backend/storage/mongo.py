@@ -0,0 +1,221 @@
+"""
+Backend de armazenamento em MongoDB
+"""
+import functools
+import inspect
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError, PyMongoError, WaitQueueTimeoutError
+from ..database import DatabaseManager, db_manager
+from ..validators import canonical_url, url_digest
+from .base import DuplicateCodeError, StorageBackend, StorageError
+
+logger = logging.getLogger(__name__)
+
+
+def _translate_errors(method):
+    """Converte exceções do pymongo nas exceções do backend"""
+    if inspect.isgeneratorfunction(method):
+        # Geradores só executam ao serem consumidos: a tradução precisa envolver a iteração
+        @functools.wraps(method)
+        def generator_wrapper(*args, **kwargs):
+            try:
+                yield from method(*args, **kwargs)
+            except PyMongoError as e:
+                raise _storage_error(args[0], e) from e
+        return generator_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except DuplicateKeyError as e:
+            raise DuplicateCodeError(str(e)) from e
+        except PyMongoError as e:
+            raise _storage_error(args[0], e) from e
+    return wrapper
+
+
+def _storage_error(storage: 'MongoStorage', error: PyMongoError) -> StorageError:
+    # Falhas de conexão abrem o circuito; pool esgotado é sobrecarga, não queda do banco
+    if isinstance(error, ConnectionFailure) and not isinstance(error, WaitQueueTimeoutError):
+        storage.manager.report_failure(error)
+    return StorageError(f"{error}. Verifique se o MongoDB está rodando")
+
+
+class MongoStorage(StorageBackend):
+    """Armazenamento na collection configurada do MongoDB (via DatabaseManager)"""
+
+    name = 'mongo'
+
+    def __init__(self, manager: DatabaseManager = db_manager):
+        self.manager = manager
+
+    def _collection(self):
+        collection = self.manager.get_collection()
+        if collection is None:
+            raise StorageError('Banco de dados não conectado')
+        return collection
+
+    def connect(self) -> bool:
+        return self.manager.connect()
+
+    @_translate_errors
+    def migrate(self) -> int:
+        return self.backfill_url_hashes()
+
+    def backfill_url_hashes(self, batch_size: int = 1000) -> int:
+        """
+        Calcula o 'url_hash' dos documentos gravados antes da deduplicação por resumo
+
+        A consulta por 'url_hash' nulo usa o próprio índice, então é barata
+        quando não há nada a migrar. Roda pelo src/migrate_links.py, uma vez,
+        e não a cada conexão.
+
+        Args:
+            batch_size (int): Documentos atualizados por ida ao banco
+
+        Returns:
+            int: Quantidade de documentos atualizados
+        """
+        collection = self._collection()
+        updated = 0
+        operations = []
+        for document in collection.find({'url_hash': None}, {'original_url': 1}).batch_size(batch_size):
+            url_hash = url_digest(canonical_url(document['original_url'].strip()))
+            operations.append(UpdateOne({'_id': document['_id']}, {'$set': {'url_hash': url_hash}}))
+            if len(operations) >= batch_size:
+                updated += collection.bulk_write(operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+        if updated:
+            logger.info("'url_hash' calculado para %d links antigos", updated)
+        return updated
+
+    def connect_in_background(self):
+        self.manager.connect_in_background()
+
+    def disconnect(self):
+        self.manager.disconnect()
+
+    def is_connected(self) -> bool:
+        return self.manager.is_connected()
+
+    def pool_stats(self) -> Optional[Dict[str, Any]]:
+        return self.manager.pool_stats()
+
+    @_translate_errors
+    def get_by_code(self, short_url: str) -> Optional[Dict[str, Any]]:
+        return self._collection().find_one({'short_url': short_url})
+
+    @_translate_errors
+    def get_many_by_code(self, short_urls: List[str]) -> List[Dict[str, Any]]:
+        # Uma ida ao banco por lote ($in sobre o índice único de 'short_url')
+        return list(self._collection().find({'short_url': {'$in': short_urls}}, {'_id': 0, 'url_hash': 0}))
+
+    @_translate_errors
+    def get_by_url_hash(self, url_hash: bytes) -> Optional[Dict[str, Any]]:
+        return self._collection().find_one({'url_hash': url_hash, 'expires_at': None})
+
+    @_translate_errors
+    def find_by_url_hashes(self, url_hashes: List[bytes]) -> List[Dict[str, Any]]:
+        return list(self._collection().find(
+            {'url_hash': {'$in': url_hashes}, 'expires_at': None},
+            {'_id': 0, 'url_hash': 1, 'original_url': 1, 'short_url': 1}
+        ))
+
+    @_translate_errors
+    def insert(self, document: Dict[str, Any]):
+        self._collection().insert_one(document)
+
+    @_translate_errors
+    def insert_many(self, documents: List[Dict[str, Any]]) -> Dict[int, StorageError]:
+        if not documents:
+            return {}
+        try:
+            self._collection().insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            failures: Dict[int, StorageError] = {}
+            for write_error in e.details.get('writeErrors', []):
+                if write_error.get('code') == 11000:
+                    failures[write_error['index']] = DuplicateCodeError(write_error.get('errmsg', ''))
+                else:
+                    failures[write_error['index']] = StorageError(write_error.get('errmsg', ''))
+            return failures
+        return {}
+
+    @_translate_errors
+    def list_urls(self, limit: int, after: Optional[Tuple[Any, str]] = None,
+                  search: Optional[str] = None) -> List[Dict[str, Any]]:
+        conditions: List[Dict[str, Any]] = []
+        if after is not None:
+            created_at, short_url = after
+            conditions.append({'$or': [
+                {'created_at': {'$lt': created_at}},
+                {'created_at': created_at, 'short_url': {'$lt': short_url}},
+            ]})
+        if search:
+            # Sem índice para substring: a varredura segue a ordem de created_at e para ao completar a página
+            pattern = {'$regex': re.escape(search), '$options': 'i'}
+            conditions.append({'$or': [{'original_url': pattern}, {'short_url': pattern}]})
+        query: Dict[str, Any] = {'$and': conditions} if len(conditions) > 1 else conditions[0] if conditions else {}
+        cursor = self._collection().find(
+            query, {'_id': 0, 'original_url': 1, 'short_url': 1, 'created_at': 1}
+        ).sort([('created_at', DESCENDING), ('short_url', DESCENDING)]).limit(limit)
+        return list(cursor)
+
+    @_translate_errors
+    def allocate_ids(self, counter_name: str, count: int) -> int:
+        counters = self.manager.get_counters_collection()
+        if counters is None:
+            raise StorageError('Banco de dados não conectado')
+        document = counters.find_one_and_update(
+            {'_id': counter_name},
+            {'$inc': {'value': count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return document['value'] - count
+
+    @_translate_errors
+    def iter_links(self, batch_size: int = 5000, permanent_only: bool = False) -> Iterator[Tuple[str, str, Optional[int]]]:
+        query = {'expires_at': None} if permanent_only else {}
+        projection = {'_id': 0, 'short_url': 1, 'original_url': 1, 'redirect_status': 1}
+        # Percorre o índice único de 'short_url' (comparação binária, sem collation)
+        cursor = self._collection().find(query, projection).sort('short_url', ASCENDING).batch_size(batch_size)
+        for document in cursor:
+            yield document['short_url'], document['original_url'], document.get('redirect_status')
+
+    @_translate_errors
+    def iter_documents(self, batch_size: int = 5000) -> Iterator[Dict[str, Any]]:
+        projection = {
+            '_id': 0, 'short_url': 1, 'original_url': 1, 'created_at': 1, 'created_timestamp': 1,
+            'clicks': 1, 'redirect_status': 1, 'expires_at': 1,
+        }
+        yield from self._collection().find({}, projection).batch_size(batch_size)
+
+    @_translate_errors
+    def iter_codes(self, since: Optional[datetime] = None, batch_size: int = 5000) -> Iterator[Tuple[str, datetime]]:
+        # O momento da gravação vem do _id (ObjectId gerado na inserção), em segundos
+        query = {}
+        if since is not None:
+            query = {'_id': {'$gte': ObjectId.from_datetime(datetime.fromtimestamp(since.timestamp(), timezone.utc))}}
+        cursor = self._collection().find(query, {'_id': 1, 'short_url': 1}).batch_size(batch_size)
+        for document in cursor:
+            yield document['short_url'], datetime.fromtimestamp(document['_id'].generation_time.timestamp())
+
+    @_translate_errors
+    def delete(self, short_url: str) -> bool:
+        return self._collection().delete_one({'short_url': short_url}).deleted_count > 0
+
+    @_translate_errors
+    def increment_clicks(self, counts: Dict[str, int]):
+        if not counts:
+            return
+        operations = [UpdateOne({'short_url': code}, {'$inc': {'clicks': count}}) for code, count in counts.items()]
+        self._collection().bulk_write(operations, ordered=False)
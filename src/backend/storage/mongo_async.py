@@ -0,0 +1,148 @@
+"""
+Acesso assíncrono ao MongoDB (AsyncMongoClient do pymongo)
+
+Mesmas opções de pool e timeouts do DatabaseManager e o mesmo disjuntor:
+após uma falha de conexão as buscas falham na hora enquanto uma tarefa do
+loop tenta reconectar com espera exponencial. Os índices continuam sendo
+criados pela conexão síncrona (DatabaseManager).
+"""
+import asyncio
+import logging
+import os
+import random
+from typing import Any, Dict, List, Optional
+from pymongo import AsyncMongoClient
+from pymongo.errors import ConnectionFailure, PyMongoError, WaitQueueTimeoutError
+from ..database import DatabaseManager
+from .aio import AsyncStorage
+from .base import StorageError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMongoStorage(AsyncStorage):
+    """Busca de links na collection configurada, sem bloquear o loop de eventos"""
+
+    name = 'mongo'
+
+    def __init__(self, uri: str, database_name: str, collection_name: str,
+                 reconnect_min_delay: float = 0.5, reconnect_max_delay: float = 30):
+        self.uri = uri
+        self.database_name = database_name
+        self.collection_name = collection_name
+        self.reconnect_min_delay = reconnect_min_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.client: Optional[AsyncMongoClient] = None
+        self.collection = None
+        self.connected = False
+        self.consecutive_failures = 0
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> 'AsyncMongoStorage':
+        """
+        Cria o acesso com a mesma configuração do DatabaseManager (config.env)
+
+        Returns:
+            AsyncMongoStorage: Acesso ainda não conectado
+        """
+        return cls(
+            os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'),
+            os.getenv('MONGODB_DATABASE', 'url_shortener'),
+            os.getenv('MONGODB_COLLECTION', 'urls'),
+            reconnect_min_delay=float(os.getenv('MONGODB_RECONNECT_MIN_SECONDS', 0.5)),
+            reconnect_max_delay=float(os.getenv('MONGODB_RECONNECT_MAX_SECONDS', 30)),
+        )
+
+    def _open_client(self):
+        # O cliente é criado dentro do loop que vai usá-lo (conexões sob demanda)
+        self.client = AsyncMongoClient(self.uri, **DatabaseManager.client_options())
+        self.collection = self.client[self.database_name][self.collection_name]
+
+    async def _ping(self):
+        if self.client is None:
+            self._open_client()
+        await self.client.admin.command('ping')
+        self.connected = True
+
+    async def connect(self) -> bool:
+        try:
+            await self._ping()
+        except PyMongoError as e:
+            logger.error("Erro ao conectar ao MongoDB (cliente assíncrono): %s", e)
+            self.report_failure(e)
+            return False
+        self.consecutive_failures = 0
+        logger.info("Conectado ao MongoDB (cliente assíncrono): %s.%s", self.database_name, self.collection_name)
+        return True
+
+    def connect_in_background(self):
+        if not self.connected:
+            self._ensure_reconnect_task()
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def report_failure(self, error: Exception):
+        """
+        Abre o circuito após uma falha de conexão e agenda a reconexão no loop
+
+        Args:
+            error (Exception): Erro que indicou a falha
+        """
+        self.consecutive_failures += 1
+        if self.connected:
+            logger.warning("MongoDB indisponível, reconectando em segundo plano: %s", error)
+        self.connected = False
+        self._ensure_reconnect_task()
+
+    def _ensure_reconnect_task(self):
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self):
+        delay = self.reconnect_min_delay
+        while not self.connected:
+            await asyncio.sleep(delay)
+            try:
+                await self._ping()
+            except PyMongoError:
+                self.consecutive_failures += 1
+            else:
+                logger.info("Reconectado ao MongoDB (cliente assíncrono) após %d falha(s)", self.consecutive_failures)
+                self.consecutive_failures = 0
+                return
+            # Espera exponencial com variação aleatória, para os workers não tentarem juntos
+            delay = min(self.reconnect_max_delay, delay * 2) * random.uniform(0.8, 1.2)
+
+    async def get_by_code(self, short_url: str) -> Optional[Dict[str, Any]]:
+        if not self.connected:
+            raise StorageError('Banco de dados não conectado')
+        try:
+            return await self.collection.find_one({'short_url': short_url}, {'_id': 0, 'url_hash': 0})
+        except PyMongoError as e:
+            # Pool esgotado é sobrecarga, não queda do banco
+            if isinstance(e, ConnectionFailure) and not isinstance(e, WaitQueueTimeoutError):
+                self.report_failure(e)
+            raise StorageError(f"{e}. Verifique se o MongoDB está rodando") from e
+
+    async def get_many_by_code(self, short_urls: List[str]) -> List[Dict[str, Any]]:
+        if not self.connected:
+            raise StorageError('Banco de dados não conectado')
+        try:
+            cursor = self.collection.find({'short_url': {'$in': short_urls}}, {'_id': 0, 'url_hash': 0})
+            return await cursor.to_list(None)
+        except PyMongoError as e:
+            if isinstance(e, ConnectionFailure) and not isinstance(e, WaitQueueTimeoutError):
+                self.report_failure(e)
+            raise StorageError(f"{e}. Verifique se o MongoDB está rodando") from e
+
+    async def close(self):
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+            self.collection = None
+        self.connected = False
@@ -0,0 +1,411 @@
+"""
+Backend de armazenamento embutido em SQLite
+"""
+import contextlib
+import functools
+import inspect
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from ..validators import canonical_url, url_digest
+from .base import DuplicateCodeError, StorageBackend, StorageError
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS urls (
+        id INTEGER PRIMARY KEY,
+        short_url TEXT NOT NULL,
+        original_url TEXT NOT NULL,
+        url_hash BLOB,
+        redirect_status INTEGER,
+        expires_at REAL,
+        created_at REAL NOT NULL,
+        created_timestamp INTEGER NOT NULL,
+        clicks INTEGER NOT NULL DEFAULT 0,
+        inserted_at REAL
+    )''',
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_urls_short_url ON urls (short_url)',
+    'DROP INDEX IF EXISTS idx_urls_original_url',
+    'DROP INDEX IF EXISTS idx_urls_created_at',
+    'CREATE INDEX IF NOT EXISTS idx_urls_created_at_short_url ON urls (created_at DESC, short_url DESC)',
+    '''CREATE TABLE IF NOT EXISTS counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )''',
+)
+
+# Colunas acrescentadas depois da criação da tabela (migradas em connect)
+MIGRATIONS = (
+    ('clicks', 'ALTER TABLE urls ADD COLUMN clicks INTEGER NOT NULL DEFAULT 0'),
+    ('url_hash', 'ALTER TABLE urls ADD COLUMN url_hash BLOB'),
+    ('redirect_status', 'ALTER TABLE urls ADD COLUMN redirect_status INTEGER'),
+    ('expires_at', 'ALTER TABLE urls ADD COLUMN expires_at REAL'),
+    ('inserted_at', 'ALTER TABLE urls ADD COLUMN inserted_at REAL'),
+)
+
+# Índices sobre colunas migradas (criados depois das migrações)
+INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_urls_url_hash ON urls (url_hash)',
+    'CREATE INDEX IF NOT EXISTS idx_urls_expires_at ON urls (expires_at) WHERE expires_at IS NOT NULL',
+    'CREATE INDEX IF NOT EXISTS idx_urls_inserted_at ON urls (inserted_at)',
+)
+
+# Consultas fixas: o módulo sqlite3 mantém as instruções preparadas em cache por conexão
+SELECT_COLUMNS = ('SELECT short_url, original_url, created_at, created_timestamp, clicks, redirect_status, expires_at '
+                  'FROM urls')
+SQL_GET_BY_CODE = f'{SELECT_COLUMNS} WHERE short_url = ?'
+SQL_GET_BY_HASH = f'{SELECT_COLUMNS} WHERE url_hash = ? AND expires_at IS NULL LIMIT 1'
+SQL_INSERT = ('INSERT INTO urls (short_url, original_url, url_hash, redirect_status, expires_at, created_at, '
+              'created_timestamp, clicks, inserted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)')
+SQL_MISSING_HASHES = 'SELECT id, original_url FROM urls WHERE url_hash IS NULL'
+SQL_SET_HASH = 'UPDATE urls SET url_hash = ? WHERE id = ?'
+SQL_BACKFILL_INSERTED_AT = 'UPDATE urls SET inserted_at = created_at WHERE inserted_at IS NULL'
+SQL_LIST_FIRST = ('SELECT original_url, short_url, created_at FROM urls '
+                  'ORDER BY created_at DESC, short_url DESC LIMIT ?')
+SQL_LIST_AFTER = ('SELECT original_url, short_url, created_at FROM urls WHERE (created_at, short_url) < (?, ?) '
+                  'ORDER BY created_at DESC, short_url DESC LIMIT ?')
+SQL_MATCHES = "(original_url LIKE ? ESCAPE '\\' OR short_url LIKE ? ESCAPE '\\')"
+SQL_SEARCH_FIRST = ('SELECT original_url, short_url, created_at FROM urls WHERE ' + SQL_MATCHES +
+                    ' ORDER BY created_at DESC, short_url DESC LIMIT ?')
+SQL_SEARCH_AFTER = ('SELECT original_url, short_url, created_at FROM urls WHERE (created_at, short_url) < (?, ?) '
+                    'AND ' + SQL_MATCHES + ' ORDER BY created_at DESC, short_url DESC LIMIT ?')
+SQL_DOCUMENTS = SELECT_COLUMNS
+SQL_LINKS = 'SELECT short_url, original_url, redirect_status FROM urls ORDER BY short_url'
+SQL_PERMANENT_LINKS = ('SELECT short_url, original_url, redirect_status FROM urls WHERE expires_at IS NULL '
+                       'ORDER BY short_url')
+SQL_CODES = 'SELECT short_url, inserted_at FROM urls'
+SQL_CODES_SINCE = 'SELECT short_url, inserted_at FROM urls WHERE inserted_at >= ?'
+SQL_DELETE = 'DELETE FROM urls WHERE short_url = ?'
+SQL_DELETE_EXPIRED = 'DELETE FROM urls WHERE expires_at <= ?'
+SQL_INCREMENT_CLICKS = 'UPDATE urls SET clicks = clicks + ? WHERE short_url = ?'
+SQL_ALLOCATE = ('INSERT INTO counters (name, value) VALUES (?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value')
+SQL_COUNTER = 'SELECT value FROM counters WHERE name = ?'
+
+# Limite de parâmetros por instrução em versões antigas do SQLite
+MAX_VARIABLES = 900
+
+# Espera máxima por uma conexão livre do pool (em segundos)
+POOL_TIMEOUT = 5.0
+
+
+def _translate_errors(method):
+    """Converte exceções do sqlite3 nas exceções do backend"""
+    if inspect.isgeneratorfunction(method):
+        # Geradores só executam ao serem consumidos: a tradução precisa envolver a iteração
+        @functools.wraps(method)
+        def generator_wrapper(*args, **kwargs):
+            try:
+                yield from method(*args, **kwargs)
+            except sqlite3.Error as e:
+                raise StorageError(str(e)) from e
+        return generator_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except sqlite3.IntegrityError as e:
+            raise DuplicateCodeError(str(e)) from e
+        except sqlite3.Error as e:
+            raise StorageError(str(e)) from e
+    return wrapper
+
+
+def _like_pattern(text: str) -> str:
+    # LIKE já ignora maiúsculas (ASCII); os curingas do próprio texto são escapados
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _row_to_document(row) -> Dict[str, Any]:
+    document = {
+        'short_url': row[0],
+        'original_url': row[1],
+        'created_at': datetime.fromtimestamp(row[2]),
+        'created_timestamp': row[3],
+        'clicks': row[4],
+    }
+    if row[5] is not None:
+        document['redirect_status'] = row[5]
+    if row[6] is not None:
+        document['expires_at'] = datetime.fromtimestamp(row[6], timezone.utc)
+    return document
+
+
+class _PooledConnection(sqlite3.Connection):
+    """Conexão do pool, marcada com a geração (connect/disconnect) em que foi aberta"""
+
+    generation = 0
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Armazenamento em arquivo SQLite (modo WAL), para instalações de uma única máquina
+
+    As conexões ficam num pool limitado a 'pool_size': cada operação pega uma
+    conexão livre e a devolve ao terminar, então servidores que criam uma
+    thread por requisição não acumulam conexões. O modo WAL permite leituras
+    concorrentes enquanto outra conexão grava; as gravações continuam
+    serializadas pelo próprio SQLite (busy_timeout).
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path: str = 'url_shortener.db', pool_size: int = 16):
+        self.path = path
+        self.pool_size = max(1, pool_size)
+        self._idle: List[_PooledConnection] = []
+        self._open = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._connected = False
+
+    def _open_connection(self) -> _PooledConnection:
+        connection = sqlite3.connect(self.path, check_same_thread=False, cached_statements=128,
+                                     factory=_PooledConnection)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA busy_timeout=5000')
+        return connection
+
+    def _acquire(self) -> _PooledConnection:
+        with self._available:
+            while True:
+                if not self._connected:
+                    raise StorageError('Banco de dados não conectado')
+                if self._idle:
+                    return self._idle.pop()
+                if self._open < self.pool_size:
+                    self._open += 1
+                    generation = self._generation
+                    break
+                if not self._available.wait(POOL_TIMEOUT):
+                    raise StorageError('Todas as conexões com o SQLite estão em uso')
+        try:
+            connection = self._open_connection()
+        except BaseException:
+            with self._available:
+                self._open -= 1
+                self._available.notify()
+            raise
+        connection.generation = generation
+        return connection
+
+    def _release(self, connection: _PooledConnection):
+        with self._available:
+            if connection.generation == self._generation and self._connected:
+                self._idle.append(connection)
+                self._available.notify()
+                return
+        # Aberta antes de um disconnect(): não volta para o pool
+        connection.close()
+
+    @contextlib.contextmanager
+    def _connection(self) -> Iterator[_PooledConnection]:
+        connection = self._acquire()
+        try:
+            yield connection
+        finally:
+            self._release(connection)
+
+    def connect(self) -> bool:
+        try:
+            self._connected = True
+            with self._connection() as connection, connection:
+                for statement in SCHEMA:
+                    connection.execute(statement)
+                columns = {row[1] for row in connection.execute('PRAGMA table_info(urls)')}
+                for column, statement in MIGRATIONS:
+                    if column not in columns:
+                        connection.execute(statement)
+                for statement in INDEXES:
+                    connection.execute(statement)
+                self._backfill_url_hashes(connection)
+                # Links gravados antes da coluna: a data de criação é a melhor estimativa
+                connection.execute(SQL_BACKFILL_INSERTED_AT)
+                self._purge_expired(connection)
+            logger.info("Conectado ao SQLite: %s", self.path)
+            return True
+        except sqlite3.Error as e:
+            self._connected = False
+            logger.error("Erro ao abrir o SQLite: %s", e)
+            return False
+
+    @staticmethod
+    def _backfill_url_hashes(connection: sqlite3.Connection):
+        # Links gravados antes da deduplicação por resumo (busca pelo índice de url_hash)
+        rows = connection.execute(SQL_MISSING_HASHES).fetchall()
+        if rows:
+            connection.executemany(SQL_SET_HASH, [
+                (url_digest(canonical_url(original_url.strip())), row_id) for row_id, original_url in rows
+            ])
+            logger.info("'url_hash' calculado para %d links antigos", len(rows))
+
+    @staticmethod
+    def _purge_expired(connection: sqlite3.Connection):
+        # Sem monitor de TTL no SQLite: links expirados são removidos ao abrir a base
+        # (e rejeitados na consulta enquanto isso)
+        removed = connection.execute(SQL_DELETE_EXPIRED, (time.time(),)).rowcount
+        if removed:
+            logger.info("%d links expirados removidos", removed)
+
+    def disconnect(self):
+        with self._available:
+            idle, self._idle = self._idle, []
+            # Conexões em uso são fechadas ao serem devolvidas
+            self._generation += 1
+            self._open = 0
+            was_connected, self._connected = self._connected, False
+            self._available.notify_all()
+        for connection in idle:
+            connection.close()
+        if was_connected:
+            logger.info("Conexão com SQLite fechada")
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    @_translate_errors
+    def get_by_code(self, short_url: str) -> Optional[Dict[str, Any]]:
+        with self._connection() as connection:
+            row = connection.execute(SQL_GET_BY_CODE, (short_url,)).fetchone()
+        return _row_to_document(row) if row else None
+
+    @_translate_errors
+    def get_many_by_code(self, short_urls: List[str]) -> List[Dict[str, Any]]:
+        documents = []
+        with self._connection() as connection:
+            for start in range(0, len(short_urls), MAX_VARIABLES):
+                chunk = short_urls[start:start + MAX_VARIABLES]
+                placeholders = ','.join('?' * len(chunk))
+                rows = connection.execute(f'{SELECT_COLUMNS} WHERE short_url IN ({placeholders})', chunk)
+                documents.extend(_row_to_document(row) for row in rows)
+        return documents
+
+    @_translate_errors
+    def get_by_url_hash(self, url_hash: bytes) -> Optional[Dict[str, Any]]:
+        with self._connection() as connection:
+            row = connection.execute(SQL_GET_BY_HASH, (url_hash,)).fetchone()
+        return _row_to_document(row) if row else None
+
+    @_translate_errors
+    def find_by_url_hashes(self, url_hashes: List[bytes]) -> List[Dict[str, Any]]:
+        documents = []
+        with self._connection() as connection:
+            for start in range(0, len(url_hashes), MAX_VARIABLES):
+                chunk = url_hashes[start:start + MAX_VARIABLES]
+                placeholders = ','.join('?' * len(chunk))
+                rows = connection.execute(
+                    f'SELECT url_hash, original_url, short_url FROM urls '
+                    f'WHERE url_hash IN ({placeholders}) AND expires_at IS NULL', chunk
+                )
+                documents.extend({'url_hash': row[0], 'original_url': row[1], 'short_url': row[2]} for row in rows)
+        return documents
+
+    @staticmethod
+    def _params(document: Dict[str, Any]) -> tuple:
+        return (
+            document['short_url'],
+            document['original_url'],
+            document.get('url_hash'),
+            document.get('redirect_status'),
+            document['expires_at'].timestamp() if document.get('expires_at') is not None else None,
+            document['created_at'].timestamp(),
+            document['created_timestamp'],
+            document.get('clicks', 0),
+            time.time(),
+        )
+
+    @_translate_errors
+    def insert(self, document: Dict[str, Any]):
+        with self._connection() as connection, connection:
+            connection.execute(SQL_INSERT, self._params(document))
+
+    @_translate_errors
+    def insert_many(self, documents: List[Dict[str, Any]]) -> Dict[int, StorageError]:
+        failures: Dict[int, StorageError] = {}
+        # Uma única transação para o lote; falhas individuais não desfazem as demais
+        with self._connection() as connection, connection:
+            for index, document in enumerate(documents):
+                try:
+                    connection.execute(SQL_INSERT, self._params(document))
+                except sqlite3.IntegrityError as e:
+                    failures[index] = DuplicateCodeError(str(e))
+        return failures
+
+    @_translate_errors
+    def list_urls(self, limit: int, after: Optional[Tuple[Any, str]] = None,
+                  search: Optional[str] = None) -> List[Dict[str, Any]]:
+        matches = (_like_pattern(search),) * 2 if search else ()
+        with self._connection() as connection:
+            if after is None:
+                rows = connection.execute(SQL_SEARCH_FIRST if search else SQL_LIST_FIRST, (*matches, limit))
+            else:
+                created_at, short_url = after
+                rows = connection.execute(SQL_SEARCH_AFTER if search else SQL_LIST_AFTER,
+                                          (created_at.timestamp(), short_url, *matches, limit))
+            return [
+                {'original_url': row[0], 'short_url': row[1], 'created_at': datetime.fromtimestamp(row[2])}
+                for row in rows
+            ]
+
+    @_translate_errors
+    def allocate_ids(self, counter_name: str, count: int) -> int:
+        with self._connection() as connection, connection:
+            connection.execute(SQL_ALLOCATE, (counter_name, count))
+            value = connection.execute(SQL_COUNTER, (counter_name,)).fetchone()[0]
+        return value - count
+
+    @_translate_errors
+    def iter_links(self, batch_size: int = 5000, permanent_only: bool = False) -> Iterator[Tuple[str, str, Optional[int]]]:
+        # A conexão fica reservada enquanto o gerador estiver aberto
+        with self._connection() as connection:
+            cursor = connection.execute(SQL_PERMANENT_LINKS if permanent_only else SQL_LINKS)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+
+    @_translate_errors
+    def iter_documents(self, batch_size: int = 5000) -> Iterator[Dict[str, Any]]:
+        with self._connection() as connection:
+            cursor = connection.execute(SQL_DOCUMENTS)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield _row_to_document(row)
+
+    @_translate_errors
+    def iter_codes(self, since: Optional[datetime] = None, batch_size: int = 5000) -> Iterator[Tuple[str, datetime]]:
+        with self._connection() as connection:
+            if since is None:
+                cursor = connection.execute(SQL_CODES)
+            else:
+                cursor = connection.execute(SQL_CODES_SINCE, (since.timestamp(),))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for short_url, inserted_at in rows:
+                    yield short_url, datetime.fromtimestamp(inserted_at)
+
+    @_translate_errors
+    def delete(self, short_url: str) -> bool:
+        with self._connection() as connection, connection:
+            return connection.execute(SQL_DELETE, (short_url,)).rowcount > 0
+
+    @_translate_errors
+    def increment_clicks(self, counts: Dict[str, int]):
+        if not counts:
+            return
+        with self._connection() as connection, connection:
+            connection.executemany(SQL_INCREMENT_CLICKS, [(count, code) for code, count in counts.items()])
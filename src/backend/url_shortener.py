@@ -173,26 +173,31 @@
 #         except Exception as e:
 #             print(f"Erro ao recuperar URLs: {e}")
 #             return [] 
-
-import hashlib
+import logging
 import time
-from typing import Optional, Dict, Any
-from datetime import datetime
-from .database import db_manager
-from .validators import URLValidator
-# Importar exceções específicas do pymongo
-from pymongo.errors import ConnectionFailure, OperationFailure, PyMongoError
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+from datetime import datetime, timezone
+from .validators import URLValidator, url_digest
+from .code_generators import create_code_generator
+from .redirects import RedirectTarget, is_expired, parse_redirect_status
+from .storage import DuplicateCodeError, StorageBackend, StorageError, get_storage
+
+logger = logging.getLogger(__name__)
 
 class URLShortener:
     """Classe principal para encurtamento de URLs"""
 
-    def __init__(self):
+    def __init__(self, storage: Optional[StorageBackend] = None):
         self.url_prefix = "lleria"
         self.validator = URLValidator()
+        self.storage = storage if storage is not None else get_storage()
+        self.code_generator = create_code_generator(self.url_prefix, self.storage)
+        self.max_insert_attempts = 5  # Limita as tentativas em caso de colisão de código
+        self.batch_chunk_size = 1000  # Tamanho dos lotes de consulta/inserção em shorten_many
 
     def generate_short_code(self, original_url: str) -> str:
         """
-        Gera um código único para a URL encurtada
+        Gera um código único para a URL encurtada, usando a estratégia configurada
 
         Args:
             original_url (str): URL original
@@ -200,30 +205,43 @@ class URLShortener:
         Returns:
             str: Código único para a URL encurtada
         """
-        # Cria um hash baseado na URL original e timestamp
-        timestamp = str(int(time.time()))
-        hash_input = f"{original_url}{timestamp}"
-
-        # Gera hash MD5 e pega os primeiros 8 caracteres
-        hash_object = hashlib.md5(hash_input.encode())
-        hash_hex = hash_object.hexdigest()[:8]
+        return self.code_generator.generate(original_url)
 
-        # Retorna o código com prefixo
-        return f"{self.url_prefix}{hash_hex}"
-
-    def shorten_url(self, original_url: str) -> Dict[str, Any]:
+    def shorten_url(self, original_url: str, redirect_status: Optional[int] = None,
+                    expires_at: Optional[datetime] = None) -> Dict[str, Any]:
         """
         Encurta uma URL
 
         Args:
             original_url (str): URL original a ser encurtada
+            redirect_status (Optional[int]): Status do redirecionamento deste link
+                (301, 302, 307 ou 308); sem valor, vale REDIRECT_STATUS. URLs já
+                encurtadas mantêm o status com que foram criadas
+            expires_at (Optional[datetime]): Momento em que o link expira (datetime
+                sem fuso é tratado como hora local). Links com expiração sempre
+                ganham um código novo e não entram na deduplicação
 
         Returns:
             Dict[str, Any]: Dicionário com resultado da operação
         """
         try:
-            # Valida a URL
-            is_valid, error_message = self.validator.validate_url(original_url)
+            try:
+                redirect_status = parse_redirect_status(redirect_status)
+                if expires_at is not None:
+                    # Gravado em UTC: é a referência do índice TTL do MongoDB
+                    expires_at = expires_at.astimezone(timezone.utc)
+                    if expires_at <= datetime.now(timezone.utc):
+                        raise ValueError("A data de expiração deve estar no futuro")
+            except ValueError as e:
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'short_url': None,
+                    'original_url': original_url
+                }
+
+            # Valida e normaliza a URL em uma única passada
+            is_valid, error_message, normalized_url = self.validator.validate_and_normalize(original_url)
             if not is_valid:
                 return {
                     'success': False,
@@ -232,11 +250,17 @@ class URLShortener:
                     'original_url': original_url
                 }
 
-            # Normaliza a URL
-            normalized_url = self.validator.normalize_url(original_url)
+            if not self.storage.is_connected():
+                return {
+                    'success': False,
+                    'error': 'Banco de dados não conectado. Verifique sua conexão.',
+                    'short_url': None,
+                    'original_url': normalized_url
+                }
 
-            # Verifica se a URL já foi encurtada
-            existing_url_doc = self.get_short_url_by_original(normalized_url)
+            # Verifica se a URL já foi encurtada (pelo resumo da forma canônica)
+            url_hash = url_digest(normalized_url)
+            existing_url_doc = self.storage.get_by_url_hash(url_hash) if expires_at is None else None
             if existing_url_doc:
                 return {
                     'success': True,
@@ -245,66 +269,49 @@ class URLShortener:
                     'already_exists': True
                 }
 
-            # --- Início da nova lógica para garantir código único ---
-            short_code = ""
-            max_attempts = 5  # Limita as tentativas
-            base_url_for_hash = normalized_url # Usado para gerar o hash
+            # Insere direto e só tenta outro código se o índice único de 'short_url'
+            # acusar colisão: uma ida ao banco no caso comum e seguro com
+            # vários processos gravando ao mesmo tempo
+            for attempt in range(self.max_insert_attempts):
+                short_code = self.generate_short_code(f"{normalized_url}-{attempt}") # Varia o hash a cada tentativa
 
-            for attempt in range(max_attempts):
-                current_hash_input = f"{base_url_for_hash}-{attempt}" # Adiciona contador para variar o hash
-                short_code = self.generate_short_code(current_hash_input) # Usa generate_short_code com o input variado
-
-                # Verifica se o código gerado já existe no banco de dados
-                if not self.get_original_url(short_code):
-                    break # Se não existir, podemos usar este código
-            else: # Este else é executado se o loop terminar sem um 'break'
-                return {
-                    'success': False,
-                    'error': 'Falha ao gerar um código único após múltiplas tentativas. Tente novamente.',
-                    'short_url': None,
-                    'original_url': original_url
+                # Cria documento para salvar no banco
+                url_document = {
+                    'original_url': normalized_url,
+                    'url_hash': url_hash,
+                    'short_url': short_code,
+                    'created_at': datetime.now(),
+                    'created_timestamp': int(time.time())
                 }
-            # --- Fim da nova lógica ---
-
-            # Cria documento para salvar no MongoDB
-            url_document = {
-                'original_url': normalized_url,
-                'short_url': short_code,
-                'created_at': datetime.now(),
-                'created_timestamp': int(time.time())
-            }
+                if redirect_status is not None:
+                    url_document['redirect_status'] = redirect_status
+                if expires_at is not None:
+                    url_document['expires_at'] = expires_at
+
+                try:
+                    self.storage.insert(url_document)
+                except DuplicateCodeError:
+                    continue # Código já existe, tenta novamente com outra variação
 
-            # Salva no banco de dados
-            collection = db_manager.get_collection()
-            if collection is not None:
-                result = collection.insert_one(url_document)
-                if result.inserted_id:
-                    return {
-                        'success': True,
-                        'short_url': short_code,
-                        'original_url': normalized_url,
-                        'already_exists': False
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'error': 'Erro ao salvar no banco de dados',
-                        'short_url': None,
-                        'original_url': normalized_url
-                    }
-            else:
                 return {
-                    'success': False,
-                    'error': 'Banco de dados não conectado. Verifique sua conexão.',
-                    'short_url': None,
-                    'original_url': normalized_url
+                    'success': True,
+                    'short_url': short_code,
+                    'original_url': normalized_url,
+                    'already_exists': False
                 }
 
-        except (ConnectionFailure, OperationFailure, PyMongoError) as e:
-            # Erros específicos do PyMongo
             return {
                 'success': False,
-                'error': f'Erro de banco de dados: {str(e)}. Verifique se o MongoDB está rodando.',
+                'error': 'Falha ao gerar um código único após múltiplas tentativas. Tente novamente.',
+                'short_url': None,
+                'original_url': original_url
+            }
+
+        except StorageError as e:
+            # Erros do backend de armazenamento
+            return {
+                'success': False,
+                'error': f'Erro de banco de dados: {str(e)}.',
                 'short_url': None,
                 'original_url': original_url
             }
@@ -317,6 +324,197 @@ class URLShortener:
                 'original_url': original_url
             }
 
+    def shorten_many(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """
+        Encurta um lote de URLs com poucas idas ao banco
+
+        Valida e normaliza todo o lote, resolve as URLs já encurtadas com uma
+        consulta em lote por bloco e grava as novas com uma inserção não ordenada.
+        Colisões de código são refeitas apenas para os documentos afetados.
+
+        Args:
+            urls (List[str]): URLs originais a serem encurtadas
+
+        Returns:
+            List[Dict[str, Any]]: Um resultado por URL, na mesma ordem e formato de shorten_url
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(urls)
+
+        # Valida, normaliza e agrupa entradas repetidas dentro do lote
+        positions: Dict[str, List[int]] = {}
+        for index, (url, (is_valid, error_message, normalized_url)) in enumerate(
+                zip(urls, self.validator.validate_many(urls))):
+            if not is_valid:
+                results[index] = {
+                    'success': False,
+                    'error': error_message,
+                    'short_url': None,
+                    'original_url': url
+                }
+                continue
+            positions.setdefault(normalized_url, []).append(index)
+
+        def fill(normalized_url: str, short_code: str, already_exists: bool):
+            indexes = positions[normalized_url]
+            for position, index in enumerate(indexes):
+                results[index] = {
+                    'success': True,
+                    'short_url': short_code,
+                    'original_url': normalized_url,
+                    # Repetições no lote se comportam como chamadas seguidas de shorten_url
+                    'already_exists': already_exists or position > 0
+                }
+
+        def fail(normalized_url: str, error: str):
+            for index in positions[normalized_url]:
+                results[index] = {
+                    'success': False,
+                    'error': error,
+                    'short_url': None,
+                    'original_url': normalized_url
+                }
+
+        normalized_urls = list(positions)
+        try:
+            if not self.storage.is_connected():
+                for normalized_url in normalized_urls:
+                    fail(normalized_url, 'Banco de dados não conectado. Verifique sua conexão.')
+                return results
+
+            for start in range(0, len(normalized_urls), self.batch_chunk_size):
+                chunk = normalized_urls[start:start + self.batch_chunk_size]
+                hashes = {url_digest(url): url for url in chunk}
+
+                # Uma única consulta para todas as URLs do bloco que já existem
+                for document in self.storage.find_by_url_hashes(list(hashes)):
+                    normalized_url = hashes[document['url_hash']]
+                    if results[positions[normalized_url][0]] is None:
+                        fill(normalized_url, document['short_url'], True)
+
+                pending = [url for url in chunk if results[positions[url][0]] is None]
+                for attempt in range(self.max_insert_attempts):
+                    if not pending:
+                        break
+                    now = datetime.now()
+                    documents = [{
+                        'original_url': url,
+                        'url_hash': url_digest(url),
+                        'short_url': self.generate_short_code(f"{url}-{attempt}"),
+                        'created_at': now,
+                        'created_timestamp': int(now.timestamp())
+                    } for url in pending]
+
+                    retry = []
+                    failures = self.storage.insert_many(documents)
+                    for index, document in enumerate(documents):
+                        error = failures.get(index)
+                        if error is None:
+                            fill(document['original_url'], document['short_url'], False)
+                        elif isinstance(error, DuplicateCodeError):
+                            retry.append(document['original_url']) # Colisão de código
+                        else:
+                            fail(document['original_url'], f'Erro ao salvar no banco de dados: {error}')
+                    pending = retry
+
+                for url in pending:
+                    fail(url, 'Falha ao gerar um código único após múltiplas tentativas. Tente novamente.')
+
+        except StorageError as e:
+            for normalized_url in normalized_urls:
+                if results[positions[normalized_url][0]] is None:
+                    fail(normalized_url, f'Erro de banco de dados: {str(e)}.')
+        except Exception as e:
+            for normalized_url in normalized_urls:
+                if results[positions[normalized_url][0]] is None:
+                    fail(normalized_url, f'Erro inesperado: {str(e)}')
+
+        return results
+
+    def find_original_url(self, short_url: str) -> Optional[str]:
+        """
+        Recupera a URL original a partir da URL encurtada, propagando erros de banco
+
+        Diferente de get_original_url, permite distinguir "não encontrada" de
+        "falha ao consultar" (usado pelas camadas de cache).
+
+        Args:
+            short_url (str): URL encurtada
+
+        Returns:
+            Optional[str]: URL original ou None se não encontrada
+
+        Raises:
+            StorageError: Se o banco não estiver conectado ou a consulta falhar
+        """
+        document = self.storage.get_by_code(short_url)
+        # Links expirados são rejeitados mesmo antes de o banco removê-los
+        if document and not is_expired(document):
+            return document['original_url']
+        return None
+
+    def find_redirect_target(self, short_url: str) -> Optional[RedirectTarget]:
+        """
+        Recupera o destino do redirecionamento com os metadados de cache, propagando erros de banco
+
+        Args:
+            short_url (str): URL encurtada
+
+        Returns:
+            Optional[RedirectTarget]: Destino (URL, status, criação e expiração) ou None se não encontrado
+
+        Raises:
+            StorageError: Se o banco não estiver conectado ou a consulta falhar
+        """
+        document = self.storage.get_by_code(short_url)
+        if document and not is_expired(document):
+            return RedirectTarget.from_document(document)
+        return None
+
+    def find_redirect_targets(self, short_urls: List[str]) -> Dict[str, RedirectTarget]:
+        """
+        Recupera em uma consulta os destinos de vários códigos (aquecimento do cache), propagando erros de banco
+
+        Args:
+            short_urls (List[str]): URLs encurtadas
+
+        Returns:
+            Dict[str, RedirectTarget]: Destinos por código; códigos inexistentes ou expirados ficam de fora
+
+        Raises:
+            StorageError: Se o banco não estiver conectado ou a consulta falhar
+        """
+        return {
+            document['short_url']: RedirectTarget.from_document(document)
+            for document in self.storage.get_many_by_code(short_urls)
+            if not is_expired(document)
+        }
+
+    def delete_url(self, short_url: str, url_lookup=None) -> Dict[str, Any]:
+        """
+        Remove um link encurtado e o descarta dos caches do servidor de redirecionamento
+
+        Com 'url_lookup', o código sai do cache deste processo e é marcado como
+        removido na tabela compartilhada: os outros workers do host descartam o
+        próprio cache e deixam de atendê-lo também pelo snapshot. Processos sem
+        acesso à tabela (outro host) param de atendê-lo quando a entrada expira
+        no cache (CACHE_TTL_SECONDS).
+
+        Args:
+            short_url (str): URL encurtada
+            url_lookup (Optional[CachedURLLookup]): Cache do resolvedor de redirecionamentos
+
+        Returns:
+            Dict[str, Any]: Dicionário com resultado da operação ('deleted' indica se o link existia)
+        """
+        try:
+            deleted = self.storage.delete(short_url)
+        except StorageError as e:
+            return {'success': False, 'error': f'Erro de banco de dados: {str(e)}.', 'short_url': short_url}
+        if url_lookup is not None:
+            # Mesmo sem o link no banco: ele ainda pode estar no snapshot ou no cache
+            url_lookup.invalidate(short_url, deleted=True)
+        return {'success': True, 'short_url': short_url, 'deleted': deleted}
+
     def get_original_url(self, short_url: str) -> Optional[str]:
         """
         Recupera a URL original a partir da URL encurtada
@@ -328,17 +526,12 @@ class URLShortener:
             Optional[str]: URL original ou None se não encontrada
         """
         try:
-            collection = db_manager.get_collection()
-            if collection is not None:
-                document = collection.find_one({'short_url': short_url})
-                if document:
-                    return document['original_url']
-            return None
-        except (ConnectionFailure, OperationFailure, PyMongoError) as e:
-            print(f"Erro de banco de dados ao recuperar URL original: {e}")
+            return self.find_original_url(short_url)
+        except StorageError as e:
+            logger.error("Erro de banco de dados ao recuperar URL original: %s", e)
             return None
         except Exception as e:
-            print(f"Erro inesperado ao recuperar URL original: {e}")
+            logger.exception("Erro inesperado ao recuperar URL original: %s", e)
             return None
 
     def get_short_url_by_original(self, original_url: str) -> Optional[Dict[str, Any]]:
@@ -349,38 +542,101 @@ class URLShortener:
             original_url (str): URL original
 
         Returns:
-            Optional[Dict[str, Any]]: Documento do MongoDB ou None se não encontrado
+            Optional[Dict[str, Any]]: Documento armazenado ou None se não encontrado
         """
         try:
-            collection = db_manager.get_collection()
-            if collection is not None:
-                document = collection.find_one({'original_url': original_url})
-                return document
-            return None
-        except (ConnectionFailure, OperationFailure, PyMongoError) as e:
-            print(f"Erro de banco de dados ao recuperar URL encurtada: {e}")
+            return self.storage.get_by_url_hash(url_digest(self.validator.normalize_url(original_url)))
+        except StorageError as e:
+            logger.error("Erro de banco de dados ao recuperar URL encurtada: %s", e)
             return None
         except Exception as e:
-            print(f"Erro inesperado ao recuperar URL encurtada: {e}")
+            logger.exception("Erro inesperado ao recuperar URL encurtada: %s", e)
             return None
 
+    def get_urls_page(self, limit: int = 100, cursor: Optional[Tuple[Any, str]] = None,
+                      search: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[Tuple[Any, str]]]:
+        """
+        Recupera uma página do histórico, das URLs mais recentes para as mais antigas
+
+        Args:
+            limit (int): Quantidade máxima de URLs na página
+            cursor (Optional[Tuple[Any, str]]): Cursor devolvido pela página anterior (None para a primeira)
+            search (Optional[str]): Só URLs cuja URL original ou código contém o texto
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[Tuple[Any, str]]]: (URLs com 'original_url',
+            'short_url' e 'created_at'; cursor da próxima página ou None se não houver mais).
+            Em caso de erro, uma página vazia e sem cursor
+        """
+        try:
+            return self.fetch_urls_page(limit, cursor, search)
+        except StorageError as e:
+            logger.error("Erro de banco de dados ao recuperar URLs: %s", e)
+            return [], None
+        except Exception as e:
+            logger.exception("Erro inesperado ao recuperar URLs: %s", e)
+            return [], None
+
+    def fetch_urls_page(self, limit: int = 100, cursor: Optional[Tuple[Any, str]] = None,
+                        search: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[Tuple[Any, str]]]:
+        """
+        Igual a get_urls_page, mas propaga as falhas: uma página vazia significa fim do histórico
+
+        Args:
+            limit (int): Quantidade máxima de URLs na página
+            cursor (Optional[Tuple[Any, str]]): Cursor devolvido pela página anterior (None para a primeira)
+            search (Optional[str]): Só URLs cuja URL original ou código contém o texto
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[Tuple[Any, str]]]: Mesmo resultado de get_urls_page
+
+        Raises:
+            StorageError: Se a leitura da página falhar
+        """
+        documents = self.storage.list_urls(limit, after=cursor, search=search)
+        if len(documents) < limit:
+            return documents, None
+        last = documents[-1]
+        return documents, (last['created_at'], last['short_url'])
+
+    def iter_urls(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre todo o histórico em páginas, sem manter a base inteira em memória
+
+        Args:
+            batch_size (int): Quantidade de URLs lidas por ida ao banco
+
+        Returns:
+            Iterator[Dict[str, Any]]: URLs das mais recentes para as mais antigas
+
+        Raises:
+            StorageError: Se a leitura de alguma página falhar
+        """
+        cursor = None
+        while True:
+            documents = self.storage.list_urls(batch_size, after=cursor)
+            yield from documents
+            if len(documents) < batch_size:
+                return
+            last = documents[-1]
+            cursor = (last['created_at'], last['short_url'])
+
     def get_all_urls(self) -> list:
         """
         Recupera todas as URLs encurtadas
 
+        Prefira get_urls_page ou iter_urls em bases grandes: esta função
+        materializa o histórico inteiro em memória.
+
         Returns:
             list: Lista de todas as URLs encurtadas
         """
         try:
-            collection = db_manager.get_collection()
-            if collection is not None:
-                # Ordena por data de criação (mais recentes primeiro)
-                documents = collection.find().sort('created_at', -1)
-                return list(documents)
-            return []
-        except (ConnectionFailure, OperationFailure, PyMongoError) as e:
-            print(f"Erro de banco de dados ao recuperar URLs: {e}")
+            # Ordena por data de criação (mais recentes primeiro)
+            return list(self.iter_urls())
+        except StorageError as e:
+            logger.error("Erro de banco de dados ao recuperar URLs: %s", e)
             return []
         except Exception as e:
-            print(f"Erro inesperado ao recuperar URLs: {e}")
-            return []
\ No newline at end of file
+            logger.exception("Erro inesperado ao recuperar URLs: %s", e)
+            return []
@@ -1,55 +1,266 @@
 """
 Módulo de validação de URLs
+
+A validação é feita em uma única passada (padrões pré-compilados +
+urllib.parse), com as mesmas regras de aceitação da biblioteca 'validators'
+para URLs http/https, e devolve a URL já na forma canônica: esquema e host
+em minúsculas, sem a porta padrão, caminho vazio como '/' e, opcionalmente,
+parâmetros da query ordenados. A deduplicação usa um resumo de tamanho fixo
+(url_digest) dessa forma canônica.
 """
-import validators
-from typing import Tuple
+import hashlib
+import ipaddress
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit, urlunsplit
+
+ERROR_EMPTY = "URL não pode estar vazia"
+ERROR_FORMAT = "Formato de URL inválido"
+ERROR_SCHEME = "URL deve começar com http:// ou https://"
+
+# Esquemas que têm formato de URL reconhecido (apenas http/https são aceitos para encurtar)
+KNOWN_SCHEMES = frozenset({
+    'file', 'ftp', 'ftps', 'git', 'http', 'https', 'irc', 'rtmp', 'rtmps', 'rtsp', 'sftp', 'ssh', 'telnet',
+})
+
+WHITESPACE = re.compile(r'\s')
+PORT = re.compile(r'(6553[0-5]|655[0-2][0-9]|65[0-4][0-9]{2}|6[0-4][0-9]{3}|[1-5][0-9]{4}|[1-9][0-9]{0,3})')
+DOMAIN = re.compile(
+    r'(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z0-9][a-z0-9-]{0,61}[a-z]',
+    re.IGNORECASE,
+)
+USERNAME = re.compile(
+    r"(^[\u0100-\u017F\u0180-\u024F]"
+    r"|[-!#$%&'*+/=?^_`{}|~0-9a-z]+(\.[-!#$%&'*+/=?^_`{}|~0-9a-z]+)*$"
+    r"|^([\001-\010\013\014\016-\037!#-\[\]-\177]|\\[\011.])*$)",
+    re.IGNORECASE,
+)
+PATH = re.compile(
+    r"[\/a-z0-9\-\.\_\~\!\$\&\'\(\)\*\+\,\;\=\:\@\%"
+    r"\U0001F300-\U0001F5FF\U0001F600-\U0001F64F"
+    r"\u00A0-\uD7FF\uF900-\uFDCF\uFDF0-\uFFEF]+",
+    re.IGNORECASE,
+)
+FRAGMENT = re.compile(r"[0-9a-z?/:@\-._~%!$&'()*+,;=#]*", re.IGNORECASE)
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+# Ordenar a query muda a URL enviada ao destino, então é opcional
+SORT_QUERY_PARAMS = os.getenv('URL_SORT_QUERY_PARAMS', 'false').strip().lower() in ('1', 'true', 'yes', 'on')
+
+# Tamanho em bytes do resumo usado na deduplicação
+DIGEST_SIZE = 16
+
+# Quantidade de entradas memorizadas (URLs repetidas não são validadas de novo)
+CACHE_SIZE = int(os.getenv('URL_VALIDATION_CACHE_SIZE', 4096))
+
+
+def _valid_domain(host: str) -> bool:
+    try:
+        encoded = host.encode('idna').decode('utf-8')
+    except UnicodeError:
+        return False
+    if len(encoded) > 253 or '__' in host:
+        return False
+    return DOMAIN.fullmatch(encoded) is not None
+
+
+def _valid_ip(host: str, version) -> bool:
+    try:
+        version(host)
+    except ValueError:
+        return False
+    return True
+
+
+def _valid_host(host: str, ipv6: bool = False) -> bool:
+    if ipv6:
+        return _valid_ip(host, ipaddress.IPv6Address)
+    return _valid_domain(host) or _valid_ip(host, ipaddress.IPv4Address)
+
+
+def _valid_hostport(value: str) -> bool:
+    if not value:
+        return False
+    # IPv6 só é aceito entre colchetes, com ou sem porta
+    if value.startswith('[') and value.count(':') >= 2:
+        if ']:' in value:
+            host, port = value.rsplit(':', 1)
+            return PORT.fullmatch(port) is not None and _valid_host(host.lstrip('[').rstrip(']'), ipv6=True)
+        return _valid_host(value.lstrip('[').replace(']', '', 1), ipv6=True)
+    if value.count(':') == 1:
+        host, port = value.rsplit(':', 1)
+        if PORT.fullmatch(port):
+            return _valid_host(host)
+    return _valid_host(value)
+
+
+def _valid_auth(value: str) -> bool:
+    if not value:
+        return True
+    colons = value.count(':')
+    if colons > 1:
+        return USERNAME.match(unquote(value)) is not None
+    if colons < 1:
+        return USERNAME.match(value) is not None
+    username, password = value.rsplit(':', 1)
+    return USERNAME.match(username) is not None and not any(char in password for char in '/?#@')
+
+
+def _valid_query(query: str) -> bool:
+    try:
+        parse_qs(query, strict_parsing=True, separator='&')
+        parse_qs(query, strict_parsing=True, separator=';')
+    except ValueError:
+        return False
+    return True
+
+
+def canonical_url(url: str, sort_query: bool = SORT_QUERY_PARAMS) -> str:
+    """
+    Forma canônica de uma URL http/https já validada
+
+    Args:
+        url (str): URL sem espaços nas pontas
+        sort_query (bool): Ordena os parâmetros da query pelo nome
+
+    Returns:
+        str: URL canônica (ex.: 'HTTPS://Example.com:443' -> 'https://example.com/')
+    """
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    auth, at, hostport = netloc.rpartition('@')
+    if hostport.startswith('['):
+        host, _, port = hostport.partition(']')
+        host, port = host + ']', port[1:]
+    elif hostport.count(':') == 1:
+        host, _, port = hostport.partition(':')
+    else:
+        host, port = hostport, ''
+    if port == DEFAULT_PORTS.get(scheme):
+        port = ''
+    netloc = f"{auth}{at}{host.lower()}{':' + port if port else ''}"
+    if sort_query and query:
+        # Ordenação estável: parâmetros repetidos mantêm a ordem entre si
+        query = '&'.join(sorted(query.split('&'), key=lambda parameter: parameter.split('=', 1)[0]))
+    return urlunsplit((scheme, netloc, path or '/', query, fragment))
+
+
+def url_digest(canonical: str) -> bytes:
+    """
+    Resumo de tamanho fixo da URL canônica, usado como chave de deduplicação
+
+    Args:
+        canonical (str): URL na forma canônica
+
+    Returns:
+        bytes: blake2b com DIGEST_SIZE bytes
+    """
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+
+def _validate(url: str) -> Tuple[bool, str, str]:
+    # Uma passada: espaços, partes da URL, host, caminho, query, fragmento e protocolo
+    url = url.strip()
+    if not url:
+        return False, ERROR_EMPTY, url
+    if WHITESPACE.search(url):
+        return False, ERROR_FORMAT, url
+    try:
+        scheme, netloc, path, query, fragment = urlsplit(url)
+    except ValueError:
+        return False, ERROR_FORMAT, url
+    if scheme not in KNOWN_SCHEMES or netloc.count('@') > 1:
+        return False, ERROR_FORMAT, url
+
+    auth, _, hostport = netloc.rpartition('@')
+    if not (_valid_hostport(hostport) and _valid_auth(auth)):
+        return False, ERROR_FORMAT, url
+    if path and not PATH.fullmatch(path):
+        return False, ERROR_FORMAT, url
+    if query and not _valid_query(query):
+        return False, ERROR_FORMAT, url
+    if fragment and not FRAGMENT.fullmatch(fragment):
+        return False, ERROR_FORMAT, url
+
+    if scheme not in DEFAULT_PORTS or not url[:len(scheme) + 3].endswith('://'):
+        return False, ERROR_SCHEME, url
+    return True, "", canonical_url(url)
+
+
+_validate_cached = lru_cache(maxsize=CACHE_SIZE)(_validate)
+
 
 class URLValidator:
     """Classe para validação de URLs"""
-    
+
+    @staticmethod
+    def validate_and_normalize(url: str) -> Tuple[bool, str, str]:
+        """
+        Valida e normaliza uma URL em uma única passada (com memorização)
+
+        Args:
+            url (str): URL a ser validada
+
+        Returns:
+            Tuple[bool, str, str]: (é_válida, mensagem_erro, url_normalizada)
+        """
+        return _validate_cached(url)
+
+    @staticmethod
+    def validate_many(urls: Iterable[str]) -> List[Tuple[bool, str, str]]:
+        """
+        Valida e normaliza um lote de URLs (repetições no lote são avaliadas uma vez)
+
+        Não usa o cache de memorização, para que importações grandes não
+        expulsem as entradas frequentes.
+
+        Args:
+            urls (Iterable[str]): URLs a serem validadas
+
+        Returns:
+            List[Tuple[bool, str, str]]: (é_válida, mensagem_erro, url_normalizada) na ordem recebida
+        """
+        seen = {}
+        results = []
+        for url in urls:
+            result = seen.get(url)
+            if result is None:
+                result = seen[url] = _validate(url)
+            results.append(result)
+        return results
+
     @staticmethod
     def validate_url(url: str) -> Tuple[bool, str]:
         """
         Valida se uma URL é válida
-        
+
         Args:
             url (str): URL a ser validada
-            
+
         Returns:
             Tuple[bool, str]: (é_válida, mensagem_erro)
         """
-        # Remove espaços em branco
-        url = url.strip()
-        
-        # Verifica se a URL não está vazia
-        if not url:
-            return False, "URL não pode estar vazia"
-        
-        # Verifica se a URL tem um formato válido
-        if not validators.url(url):
-            return False, "Formato de URL inválido"
-        
-        # Verifica se a URL tem um protocolo
-        if not url.startswith(('http://', 'https://')):
-            return False, "URL deve começar com http:// ou https://"
-        
-        return True, ""
-    
+        is_valid, error, _ = _validate_cached(url)
+        return is_valid, error
+
     @staticmethod
     def normalize_url(url: str) -> str:
         """
-        Normaliza uma URL (remove espaços, adiciona protocolo se necessário)
-        
+        Normaliza uma URL (remove espaços, adiciona protocolo se necessário e
+        converte para a forma canônica)
+
         Args:
             url (str): URL a ser normalizada
-            
+
         Returns:
             str: URL normalizada
         """
         url = url.strip()
-        
+
         # Adiciona https:// se não tiver protocolo
-        if not url.startswith(('http://', 'https://')):
+        if not url.lower().startswith(('http://', 'https://')):
             url = 'https://' + url
-            
-        return url 
\ No newline at end of file
+
+        return canonical_url(url)
@@ -0,0 +1,125 @@
+"""
+Importa e exporta links em lote (CSV ou JSONL), em fluxo e com memória constante
+
+Uso (a partir da raiz do projeto):
+    python src/bulk_links.py import arquivo.csv [--format csv|jsonl] [--batch-size 1000]
+                                                [--checkpoint arquivo] [--restart]
+    python src/bulk_links.py export arquivo.jsonl [--format csv|jsonl] [--batch-size 5000]
+
+A importação aceita as colunas/chaves 'original_url' (ou 'url') e, opcionalmente,
+'short_url', 'created_at', 'redirect_status', 'expires_at' e 'clicks' (o mesmo
+formato da exportação). Um checkpoint (padrão: <arquivo>.checkpoint) é salvo após cada lote;
+rodar o mesmo comando de novo continua de onde parou.
+"""
+import argparse
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente do config.env (antes do backend, que lê parte delas na importação)
+load_dotenv('config.env')
+
+from backend.bulk import FORMATS, BulkImporter, export_links  # noqa: E402
+from backend.logs import configure_logging  # noqa: E402
+from backend.storage import StorageError, get_storage  # noqa: E402
+from backend.url_shortener import URLShortener  # noqa: E402
+
+# Intervalo mínimo entre atualizações da linha de progresso (segundos)
+PROGRESS_INTERVAL = 0.5
+
+
+def import_progress():
+    last = [0.0]
+
+    def report(stats, elapsed):
+        now = time.monotonic()
+        if now - last[0] < PROGRESS_INTERVAL:
+            return
+        last[0] = now
+        rate = stats['read'] / elapsed if elapsed else 0.0
+        sys.stderr.write(
+            f"\r   {stats['read']} linhas ({rate:.0f} linhas/s): {stats['imported']} importadas, "
+            f"{stats['existing']} já existentes, {stats['invalid']} inválidas"
+        )
+        sys.stderr.flush()
+    return report
+
+
+def export_progress(total, elapsed):
+    rate = total / elapsed if elapsed else 0.0
+    sys.stderr.write(f"\r   {total} links exportados ({rate:.0f} links/s)")
+    sys.stderr.flush()
+
+
+def run_import(args, shortener: URLShortener) -> int:
+    checkpoint = args.checkpoint or f"{args.path}.checkpoint"
+    if args.restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    importer = BulkImporter(shortener, batch_size=args.batch_size or 1000, checkpoint_path=checkpoint)
+    try:
+        result = importer.run(args.path, args.format, progress=import_progress())
+    except StorageError as e:
+        sys.stderr.write('\n')
+        print(f"❌ Erro de banco de dados: {e}. Rode o mesmo comando para continuar do checkpoint '{checkpoint}'.")
+        return 1
+    sys.stderr.write('\n')
+
+    if result['resumed_from']:
+        print(f"↪️ Retomado do byte {result['resumed_from']} ('{checkpoint}')")
+    print(f"✅ {result['read']} linhas em {result['seconds']:.2f}s ({result['rows_per_second']:.0f} linhas/s): "
+          f"{result['imported']} importadas, {result['existing']} já existentes, {result['invalid']} inválidas, "
+          f"{result['expired']} expiradas, {result['failed']} com falha")
+    return 0
+
+
+def run_export(args, shortener: URLShortener) -> int:
+    started = time.perf_counter()
+    try:
+        total = export_links(shortener.storage, args.path, args.format, batch_size=args.batch_size or 5000,
+                             progress=export_progress)
+    except StorageError as e:
+        sys.stderr.write('\n')
+        print(f"❌ Erro de banco de dados: {e}")
+        return 1
+    sys.stderr.write('\n')
+    elapsed = time.perf_counter() - started
+    print(f"✅ {total} links exportados para '{args.path}' em {elapsed:.2f}s "
+          f"({total / elapsed if elapsed else 0.0:.0f} links/s)")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Importação e exportação de links em lote')
+    parser.add_argument('command', choices=['import', 'export'])
+    parser.add_argument('path', help='Arquivo CSV ou JSONL')
+    parser.add_argument('--format', choices=FORMATS, default=None, help='Padrão: pela extensão do arquivo')
+    parser.add_argument('--batch-size', type=int, default=None, help='Registros por lote')
+    parser.add_argument('--checkpoint', default=None, help='Arquivo de checkpoint da importação')
+    parser.add_argument('--restart', action='store_true', help='Ignora o checkpoint e importa desde o início')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    configure_logging(asynchronous=False)
+    storage = get_storage()
+    if not storage.connect():
+        print("❌ Não foi possível conectar ao banco de dados.")
+        sys.exit(1)
+
+    try:
+        shortener = URLShortener(storage)
+        commands = {'import': run_import, 'export': run_export}
+        status = commands[args.command](args, shortener)
+    except ValueError as e:
+        print(f"❌ {e}")
+        status = 1
+    finally:
+        storage.disconnect()
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Exporta todos os links para um snapshot somente leitura usado pelos nós de redirecionamento
+
+Uso (a partir da raiz do projeto):
+    python src/export_snapshot.py [caminho_do_snapshot]
+
+Sem argumento, usa REDIRECT_SNAPSHOT_PATH do config.env.
+"""
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente do config.env (antes do backend, que lê parte delas na importação)
+load_dotenv('config.env')
+
+from backend.logs import configure_logging  # noqa: E402
+from backend.storage import get_storage  # noqa: E402
+from backend.snapshot import export_snapshot  # noqa: E402
+
+
+def main():
+    configure_logging(asynchronous=False)
+    path = sys.argv[1] if len(sys.argv) > 1 else os.getenv('REDIRECT_SNAPSHOT_PATH', '').strip()
+    if not path:
+        print("❌ Informe o caminho do snapshot ou configure REDIRECT_SNAPSHOT_PATH.")
+        sys.exit(1)
+
+    storage = get_storage()
+    if not storage.connect():
+        print("❌ Não foi possível conectar ao banco de dados.")
+        sys.exit(1)
+
+    try:
+        start = time.perf_counter()
+        total = export_snapshot(storage, path)
+        elapsed = time.perf_counter() - start
+        print(f"✅ Snapshot gerado em '{path}': {total} links em {elapsed:.2f}s")
+    finally:
+        storage.disconnect()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""
+Modelo virtualizado do histórico de links encurtados
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt, QThreadPool, pyqtSignal
+from frontend.workers import Worker
+
+
+class HistoryListModel(QAbstractListModel):
+    """
+    Histórico carregado sob demanda, página a página, conforme a lista é rolada
+
+    As páginas são buscadas em um QThreadPool, sem bloquear a interface. A
+    deduplicação usa um conjunto de códigos (sem percorrer a lista). A busca
+    filtra na hora os links já carregados, por um índice em memória com as
+    chaves já em minúsculas; os mais antigos que eles vêm do banco, em páginas
+    filtradas pelo mesmo texto, conforme a lista é rolada.
+    """
+
+    EntryRole = Qt.ItemDataRole.UserRole  # (url_original, link_encurtado_completo)
+
+    loading_changed = pyqtSignal(bool)  # True enquanto uma página está sendo buscada
+    page_loaded = pyqtSignal(int)  # Total de links carregados após cada página
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, url_shortener, short_url_base: str, page_size: int = 500,
+                 thread_pool: QThreadPool = None, parent=None):
+        super().__init__(parent)
+        self.url_shortener = url_shortener
+        self.short_url_base = short_url_base
+        self.page_size = page_size
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self._worker: Optional[Worker] = None  # Busca de página em andamento
+
+        self._entries: List[Tuple[str, str]] = []  # Mais recentes primeiro
+        self._search_keys: List[str] = []  # Índice de busca, paralelo a _entries
+        self._known: set = set()  # Links já presentes, para deduplicação O(1)
+        self._cursor: Optional[Tuple[Any, str]] = None
+        self._exhausted = False
+
+        self._filter_text = ''
+        self._visible: Optional[List[int]] = None  # Posições em _entries quando há filtro
+        self._found: List[Tuple[str, str]] = []  # Resultados do banco, mais antigos que _entries
+        self._search_cursor: Optional[Tuple[Any, str]] = None
+        self._search_exhausted = False
+
+    # --- Interface do QAbstractListModel ---
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._entries) if self._visible is None else len(self._visible) + len(self._found)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entry_at(index.row())
+        if entry is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f'{entry[0]} → {entry[1]}'
+        if role == self.EntryRole:
+            return entry
+        return None
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        # Durante uma busca, as páginas seguintes vêm do banco já filtradas
+        exhausted = self._exhausted if self._visible is None else self._search_exhausted
+        return not parent.isValid() and not exhausted and self._worker is None
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        if self._visible is None:
+            worker = Worker(self._load_page, self._cursor, None)
+            loaded = self._on_page_loaded
+        else:
+            worker = Worker(self._load_page, self._search_cursor, self._filter_text)
+            loaded = self._on_search_page_loaded
+        worker.signals.result.connect(lambda page, worker=worker: loaded(worker, page))
+        worker.signals.error.connect(lambda message, worker=worker: self._on_page_failed(worker, message))
+        self._worker = worker
+        self.loading_changed.emit(True)
+        self.thread_pool.start(worker)
+
+    def _load_page(self, worker: Worker, cursor, search: Optional[str]):
+        # Executa fora da thread da interface; uma falha chega a _on_page_failed e a página pode ser pedida de novo
+        return self.url_shortener.fetch_urls_page(self.page_size, cursor, search)
+
+    def _on_page_loaded(self, worker: Worker, page):
+        if worker is not self._worker:
+            return  # Resposta de uma busca cancelada por reset()
+        self._worker = None
+        documents, self._cursor = page
+        self._exhausted = self._cursor is None
+        self.append_documents(documents)
+        self.loading_changed.emit(False)
+        self.page_loaded.emit(len(self._entries))
+
+    def _on_search_page_loaded(self, worker: Worker, page):
+        if worker is not self._worker:
+            return  # Resposta de uma busca por outro texto
+        self._worker = None
+        documents, self._search_cursor = page
+        self._search_exhausted = self._search_cursor is None
+        new_entries = [entry for entry in map(self._make_entry, documents) if entry[1] not in self._known]
+        if new_entries:
+            first = self.rowCount()
+            self.beginInsertRows(QModelIndex(), first, first + len(new_entries) - 1)
+            self._found.extend(new_entries)
+            self.endInsertRows()
+        self.loading_changed.emit(False)
+        self.page_loaded.emit(len(self._entries))
+
+    def _on_page_failed(self, worker: Worker, message: str):
+        if worker is not self._worker:
+            return
+        self._worker = None
+        self.loading_changed.emit(False)
+        self.load_failed.emit(message)
+
+    def cancel_loading(self):
+        """Descarta a busca de página em andamento, se houver"""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+            self.loading_changed.emit(False)
+
+    # --- Operações do histórico ---
+
+    def entry_at(self, row: int) -> Optional[Tuple[str, str]]:
+        """Retorna (url_original, link_encurtado_completo) da linha visível informada"""
+        if self._visible is not None:
+            if len(self._visible) <= row < len(self._visible) + len(self._found):
+                return self._found[row - len(self._visible)]
+            if not 0 <= row < len(self._visible):
+                return None
+            row = self._visible[row]
+        if not 0 <= row < len(self._entries):
+            return None
+        return self._entries[row]
+
+    def _make_entry(self, document: Dict[str, Any]) -> Tuple[str, str]:
+        return document['original_url'], f"{self.short_url_base}{document['short_url']}"
+
+    def append_documents(self, documents: List[Dict[str, Any]]):
+        """
+        Acrescenta ao final uma página de documentos (mais antigos que os atuais)
+
+        Args:
+            documents (List[Dict[str, Any]]): Documentos com 'original_url' e 'short_url'
+        """
+        new_entries = []
+        for document in documents:
+            entry = self._make_entry(document)
+            if entry[1] not in self._known:
+                self._known.add(entry[1])
+                new_entries.append(entry)
+        if not new_entries:
+            return
+
+        first = len(self._entries)
+        if self._visible is None:
+            self.beginInsertRows(QModelIndex(), first, first + len(new_entries) - 1)
+        self._entries.extend(new_entries)
+        self._search_keys.extend(f'{original} {short}'.lower() for original, short in new_entries)
+        if self._visible is None:
+            self.endInsertRows()
+        else:
+            self._apply_filter()
+
+    def _remove_entry(self, short_url_with_base: str):
+        # Busca linear apenas quando um link já existente volta ao topo (ação do usuário)
+        row = next(i for i, (_, short) in enumerate(self._entries) if short == short_url_with_base)
+        if self._visible is None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+        del self._entries[row]
+        del self._search_keys[row]
+        if self._visible is None:
+            self.endRemoveRows()
+
+    def add_entry(self, original_url: str, short_url_with_base: str):
+        """
+        Coloca um link no topo do histórico, movendo-o se já estiver presente
+
+        Args:
+            original_url (str): URL original
+            short_url_with_base (str): Link encurtado completo
+        """
+        filtering = self._visible is not None
+        if filtering:
+            # Com filtro ativo as posições visíveis mudam: recalcula tudo de uma vez
+            self.beginResetModel()
+
+        if short_url_with_base in self._known:
+            self._remove_entry(short_url_with_base)
+        self._known.add(short_url_with_base)
+        self._found = [entry for entry in self._found if entry[1] != short_url_with_base]
+
+        if not filtering:
+            self.beginInsertRows(QModelIndex(), 0, 0)
+        self._entries.insert(0, (original_url, short_url_with_base))
+        self._search_keys.insert(0, f'{original_url} {short_url_with_base}'.lower())
+        if filtering:
+            self._visible = self._matching_rows(self._filter_text)
+            self.endResetModel()
+        else:
+            self.endInsertRows()
+
+    def reset(self, documents: Optional[List[Dict[str, Any]]] = None):
+        """
+        Limpa o histórico e reinicia a paginação
+
+        Args:
+            documents (Optional[List[Dict[str, Any]]]): Primeira página já carregada (opcional)
+        """
+        self.cancel_loading()
+        self.beginResetModel()
+        self._entries.clear()
+        self._search_keys.clear()
+        self._known.clear()
+        self._cursor = None
+        self._exhausted = False
+        self._start_search()
+        self.endResetModel()
+        if documents:
+            self.append_documents(documents)
+            # Uma página incompleta já é a última
+            self._exhausted = len(documents) < self.page_size
+            if not self._exhausted:
+                last = documents[-1]
+                self._cursor = (last['created_at'], last['short_url'])
+        self._search_cursor, self._search_exhausted = self._cursor, self._exhausted
+
+    # --- Busca ---
+
+    def _matching_rows(self, text: str) -> List[int]:
+        return [row for row, key in enumerate(self._search_keys) if text in key]
+
+    def _start_search(self):
+        # Os links carregados são filtrados na hora; o banco continua a partir do mais antigo deles
+        self._visible = self._matching_rows(self._filter_text) if self._filter_text else None
+        self._found = []
+        self._search_cursor = self._cursor
+        self._search_exhausted = self._exhausted
+
+    def _apply_filter(self):
+        self.beginResetModel()
+        self._visible = self._matching_rows(self._filter_text) if self._filter_text else None
+        self.endResetModel()
+
+    def set_filter(self, text: str):
+        """
+        Filtra o histórico pelas URLs que contêm o texto (sem diferenciar maiúsculas)
+
+        Os links já carregados aparecem na hora; os mais antigos são buscados
+        no banco conforme a lista é rolada (fetchMore).
+
+        Args:
+            text (str): Texto buscado; vazio remove o filtro
+        """
+        text = text.strip().lower()
+        if text == self._filter_text:
+            return
+        self.cancel_loading()
+        self._filter_text = text
+        self.beginResetModel()
+        self._start_search()
+        self.endResetModel()
+
+    def loaded_count(self) -> int:
+        """Quantidade de links já carregados (independente do filtro)"""
+        return len(self._entries)
@@ -1,20 +1,30 @@
 import os 
-from dotenv import load_dotenv 
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-    QListWidget, QMessageBox, QApplication
+    QListView, QMessageBox, QApplication
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, QThreadPool
 from PyQt6.QtGui import QIcon, QClipboard # QClipboard já estava, mas vale a pena mencionar
-
-load_dotenv('config.env')
+from frontend.history_model import HistoryListModel
+from frontend.workers import Worker
 
 class MainWindow(QWidget):
     def __init__(self, url_shortener):
         super().__init__()
         self.url_shortener = url_shortener
         self.short_url_base = os.getenv('FLASK_BASE_URL', f"http://localhost:{os.getenv('FLASK_PORT', '5000')}/")
+        # Acesso ao banco roda fora da thread da interface
+        self.thread_pool = QThreadPool(self)
+        self.shorten_worker = None # Encurtamento em andamento
+        self.history_model = HistoryListModel(
+            url_shortener, self.short_url_base, page_size=int(os.getenv('HISTORY_PAGE_SIZE', 500)),
+            thread_pool=self.thread_pool
+        )
+        self.history_model.page_loaded.connect(self.handle_history_page_loaded)
+        self.history_model.load_failed.connect(
+            lambda message: self.display_status_message(f'❌ Erro ao carregar histórico: {message}', is_error=True)
+        )
 
         self.setWindowTitle('Encurtador de Links')
         self.setMinimumWidth(550)
@@ -36,6 +46,16 @@ class MainWindow(QWidget):
         self.shorten_btn = QPushButton('Encurtar')
         self.shorten_btn.clicked.connect(self.handle_shorten)
 
+        # Botão de cancelar (visível apenas durante o encurtamento)
+        self.cancel_btn = QPushButton('Cancelar')
+        self.cancel_btn.clicked.connect(self.handle_cancel)
+        self.cancel_btn.hide()
+
+        # Layout para os botões
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(self.shorten_btn)
+        button_layout.addWidget(self.cancel_btn)
+
         # Exibição do link encurtado
         self.result_label = QLabel('Link encurtado:')
         self.result_edit = QLineEdit()
@@ -48,10 +68,16 @@ class MainWindow(QWidget):
         result_layout.addWidget(self.result_edit)
         result_layout.addWidget(self.copy_btn)
 
-        # Histórico
+        # Histórico (carregado sob demanda conforme a lista é rolada)
         self.history_label = QLabel('Histórico de links encurtados:')
-        self.history_list = QListWidget()
-        self.history_list.itemClicked.connect(self.handle_history_click)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText('Buscar no histórico...')
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.history_model.set_filter)
+        self.history_list = QListView()
+        self.history_list.setModel(self.history_model)
+        self.history_list.setUniformItemSizes(True) # Evita medir cada item em listas grandes
+        self.history_list.clicked.connect(self.handle_history_click)
         self.history_list.setMinimumHeight(150) # Garante um tamanho mínimo para o histórico
 
         # Status Label (para feedback temporário)
@@ -62,13 +88,14 @@ class MainWindow(QWidget):
         # Adiciona widgets ao layout
         layout.addWidget(self.input_label)
         layout.addWidget(self.input_edit)
-        layout.addWidget(self.shorten_btn)
+        layout.addLayout(button_layout)
         layout.addSpacing(15) # Espaço extra
         layout.addWidget(self.result_label)
         layout.addLayout(result_layout)
         layout.addWidget(self.status_label) # Adiciona a label de status aqui
         layout.addSpacing(15) # Espaço extra
         layout.addWidget(self.history_label)
+        layout.addWidget(self.search_edit)
         layout.addWidget(self.history_list)
 
         self.setLayout(layout)
@@ -83,14 +110,39 @@ class MainWindow(QWidget):
         self.status_label.setText(message)
         QTimer.singleShot(duration, lambda: self.status_label.setText('')) # Limpa a mensagem após 'duration' ms
 
+    def display_progress_message(self, message: str):
+        """Exibe uma mensagem de andamento (sem prazo para sumir)."""
+        self.status_label.setStyleSheet("color: #007bff; font-weight: bold; margin-top: 5px;") # Azul para andamento
+        self.status_label.setText(message)
+
+    def set_busy(self, busy: bool):
+        """Alterna a interface entre 'encurtando' e 'pronta'."""
+        self.shorten_btn.setEnabled(not busy)
+        self.input_edit.setReadOnly(busy)
+        self.cancel_btn.setVisible(busy)
+
     def handle_shorten(self):
         url = self.input_edit.text().strip()
         if not url:
             self.display_status_message('⚠️ Digite uma URL para encurtar.', is_error=True)
             self.result_edit.clear()
             return
-
-        result = self.url_shortener.shorten_url(url)
+        if self.shorten_worker is not None:
+            return # Já existe um encurtamento em andamento
+
+        # O encurtamento roda no pool de threads; a janela continua respondendo
+        worker = Worker(lambda worker, url: self.url_shortener.shorten_url(url), url)
+        worker.signals.result.connect(lambda result, worker=worker: self.handle_shorten_result(worker, result))
+        worker.signals.error.connect(lambda message, worker=worker: self.handle_shorten_error(worker, message))
+        worker.signals.finished.connect(lambda worker=worker: self.handle_shorten_finished(worker))
+        self.shorten_worker = worker
+        self.set_busy(True)
+        self.display_progress_message('⏳ Encurtando...')
+        self.thread_pool.start(worker)
+
+    def handle_shorten_result(self, worker, result: dict):
+        if worker is not self.shorten_worker or worker.is_cancelled():
+            return # Resultado de uma operação cancelada
         if result['success']:
             # Constrói o link completo com a base do servidor Flask
             full_short_url = f"{self.short_url_base}{result['short_url']}"
@@ -106,6 +158,27 @@ class MainWindow(QWidget):
             self.result_edit.clear()
             self.display_status_message(f'❌ Erro ao encurtar: {result["error"]}', is_error=True)
 
+    def handle_shorten_error(self, worker, message: str):
+        if worker is not self.shorten_worker or worker.is_cancelled():
+            return
+        self.result_edit.clear()
+        self.display_status_message(f'❌ Erro ao encurtar: {message}', is_error=True)
+
+    def handle_shorten_finished(self, worker):
+        if worker is self.shorten_worker:
+            self.shorten_worker = None
+            self.set_busy(False)
+
+    def handle_cancel(self):
+        # A consulta ao banco não é interrompida, mas seu resultado é descartado
+        if self.shorten_worker is not None:
+            self.shorten_worker.cancel()
+            self.shorten_worker = None
+            self.set_busy(False)
+            self.display_status_message('🚫 Encurtamento cancelado.', is_error=True)
+
+    def handle_history_page_loaded(self, total: int):
+        self.history_label.setText(f'Histórico de links encurtados ({total} carregados):')
 
     def handle_copy(self):
         short_url = self.result_edit.text().strip()
@@ -116,12 +189,11 @@ class MainWindow(QWidget):
         else:
             self.display_status_message('🤔 Não há link para copiar.', is_error=True)
 
-    def handle_history_click(self, item):
+    def handle_history_click(self, index):
         # Ao clicar no histórico, preenche o campo de resultado e copia
-        data = item.text().split(' → ')
-        if len(data) == 2:
-            original_url = data[0]
-            short_url = data[1]
+        entry = self.history_model.data(index, HistoryListModel.EntryRole)
+        if entry:
+            original_url, short_url = entry
             self.input_edit.setText(original_url)
             self.result_edit.setText(short_url)
             
@@ -132,19 +204,21 @@ class MainWindow(QWidget):
 
 
     def add_to_history(self, original_url: str, short_url_with_base: str): # Renomeado para clareza
-        item_text = f'{original_url} → {short_url_with_base}'
-        for i in range(self.history_list.count()):
-            if self.history_list.item(i).text() == item_text:
-                self.history_list.takeItem(i)
-                break
-        self.history_list.insertItem(0, item_text)
-
-    def load_history(self, url_list: list):
-        self.history_list.clear()
-        for doc in reversed(url_list):
-             # Ao carregar, garanta que a URL encurtada seja apresentada com a base do servidor
-             full_short_url = f"{self.short_url_base}{doc['short_url']}"
-             self.add_to_history(doc['original_url'], full_short_url)
+        self.history_model.add_entry(original_url, short_url_with_base)
+
+    def load_history(self, url_list: list = None):
+        # Reinicia o histórico; sem lista, a primeira página é buscada em segundo plano
+        self.history_model.reset(url_list)
+        if url_list is None:
+            self.history_model.fetchMore()
+
+    def closeEvent(self, event):
+        # Descarta operações pendentes e aguarda brevemente as threads em execução
+        if self.shorten_worker is not None:
+            self.shorten_worker.cancel()
+        self.history_model.cancel_loading()
+        self.thread_pool.waitForDone(2000)
+        super().closeEvent(event)
 
 
     # Removida a lógica complexa do clipboard, usando QApplication.clipboard() diretamente
@@ -0,0 +1,55 @@
+"""
+Execução de tarefas de I/O fora da thread da interface (QThreadPool)
+"""
+import logging
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerSignals(QObject):
+    """Sinais emitidos por um Worker; entregues na thread da interface"""
+
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+
+class Worker(QRunnable):
+    """
+    Executa uma função em uma thread do QThreadPool
+
+    A função recebe o próprio worker como primeiro argumento, para consultar
+    is_cancelled(). Depois de cancel(), o resultado é descartado e apenas
+    'finished' é emitido.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Solicita o cancelamento; o resultado (se vier) será ignorado"""
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self):
+        try:
+            result = self.fn(self, *self.args, **self.kwargs)
+        except Exception as e:
+            if not self.is_cancelled():
+                logger.exception("Erro na tarefa em segundo plano: %s", e)
+                self.signals.error.emit(str(e))
+        else:
+            if not self.is_cancelled():
+                self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
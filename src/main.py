@@ -4,21 +4,26 @@ Ponto de entrada principal da aplicação Encurtador de Links
 import sys
 import os
 from PyQt6.QtWidgets import QApplication, QMessageBox
-from backend.database import db_manager
-from backend.url_shortener import URLShortener
-from frontend.main_window import MainWindow
-from frontend.styles import STYLE_SHEET
-from pymongo.errors import ConnectionFailure, PyMongoError
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente do config.env (antes do backend, que lê parte delas na importação)
+load_dotenv('config.env')
+
+from backend.logs import configure_logging  # noqa: E402
+from backend.storage import StorageError, get_storage  # noqa: E402
+from backend.url_shortener import URLShortener  # noqa: E402
+from frontend.main_window import MainWindow  # noqa: E402
+from frontend.styles import STYLE_SHEET  # noqa: E402
 
 def test_database_connection():
     """Testa a conexão com o banco de dados"""
-    print("\n=== Teste de Conexão com MongoDB ===")
+    print("\n=== Teste de Conexão com o Banco de Dados ===")
     
-    if db_manager.connect():
-        print("✅ Conexão com MongoDB estabelecida com sucesso!")
+    if get_storage().connect():
+        print(f"✅ Conexão com o banco ({get_storage().name}) estabelecida com sucesso!")
         return True
     else:
-        print("❌ Falha na conexão com MongoDB")
+        print("❌ Falha na conexão com o banco de dados")
         print("Certifique-se de que o MongoDB está rodando localmente e que config.env está correto.")
         return False
 
@@ -65,10 +70,10 @@ def test_url_shortener():
         "https://www.alura.com.br/cursos-online-programacao/" # Testar duplicação
     ]
 
-    if not db_manager.is_connected():
-        print("Conectando ao MongoDB para testes de encurtamento...")
-        if not db_manager.connect():
-            print("Não foi possível conectar ao MongoDB para testes. Pulando testes de encurtamento.")
+    if not shortener.storage.is_connected():
+        print("Conectando ao banco de dados para testes de encurtamento...")
+        if not shortener.storage.connect():
+            print("Não foi possível conectar ao banco de dados para testes. Pulando testes de encurtamento.")
             return
 
     for url_to_shorten in test_urls_for_shortening:
@@ -82,22 +87,24 @@ def test_url_shortener():
         else:
             print(f"   ❌ Erro ao encurtar: {result['error']}")
 
-    db_manager.disconnect() # Desconecta após os testes
+    shortener.storage.disconnect() # Desconecta após os testes
 
 def main():
+    configure_logging(asynchronous=False)
     print("🚀 Iniciando Encurtador de Links (Interface Gráfica)")
 
     # Tenta conectar ao banco de dados
+    storage = get_storage()
     try:
-        if not db_manager.connect():
+        if not storage.connect():
             QMessageBox.critical(None, "Erro de Conexão", 
-                                 "Não foi possível conectar ao MongoDB. "
+                                 "Não foi possível conectar ao banco de dados. "
                                  "Certifique-se de que o MongoDB está rodando e que 'config.env' está correto."
                                  "\n\nA aplicação será encerrada.")
             sys.exit(1)
-    except (ConnectionFailure, PyMongoError) as e:
-        QMessageBox.critical(None, "Erro Crítico de MongoDB",
-                             f"Erro ao conectar ao MongoDB: {e}\n\nA aplicação será encerrada.")
+    except StorageError as e:
+        QMessageBox.critical(None, "Erro Crítico de Banco de Dados",
+                             f"Erro ao conectar ao banco de dados: {e}\n\nA aplicação será encerrada.")
         sys.exit(1)
     except Exception as e:
         QMessageBox.critical(None, "Erro Inesperado",
@@ -109,20 +116,20 @@ def main():
     
     url_shortener = URLShortener()
     window = MainWindow(url_shortener)
-    
-    # Carrega histórico do banco
+
+    # Exibe a janela antes de qualquer leitura do banco
+    window.show()
+
+    # O histórico é carregado em segundo plano (páginas buscadas conforme a lista é rolada)
     try:
-        url_list = url_shortener.get_all_urls()
-        window.load_history(url_list)
+        window.load_history()
     except Exception as e:
         QMessageBox.warning(None, "Erro ao Carregar Histórico",
                             f"Não foi possível carregar o histórico de URLs: {e}")
         # A aplicação continua, mas sem o histórico carregado
-
-    window.show()
     
     exit_code = app.exec()
-    db_manager.disconnect()
+    storage.disconnect()
     sys.exit(exit_code)
 
 if __name__ == "__main__":
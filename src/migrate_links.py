@@ -0,0 +1,41 @@
+"""
+Atualiza os links gravados por versões anteriores (ex.: 'url_hash' dos documentos antigos do MongoDB)
+
+Uso (a partir da raiz do projeto):
+    python src/migrate_links.py
+
+Rode uma vez após atualizar, com os servidores no ar ou não: a migração não
+acontece ao conectar, para não atrasar a partida do aplicativo e dos workers.
+"""
+import sys
+import time
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente do config.env (antes do backend, que lê parte delas na importação)
+load_dotenv('config.env')
+
+from backend.logs import configure_logging  # noqa: E402
+from backend.storage import StorageError, get_storage  # noqa: E402
+
+
+def main():
+    configure_logging(asynchronous=False)
+    storage = get_storage()
+    if not storage.connect():
+        print("❌ Não foi possível conectar ao banco de dados.")
+        sys.exit(1)
+
+    try:
+        start = time.perf_counter()
+        updated = storage.migrate()
+        elapsed = time.perf_counter() - start
+        print(f"✅ Migração concluída: {updated} links atualizados em {elapsed:.2f}s")
+    except StorageError as e:
+        print(f"❌ Erro de banco de dados: {e}")
+        sys.exit(1)
+    finally:
+        storage.disconnect()
+
+
+if __name__ == '__main__':
+    main()
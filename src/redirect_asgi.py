@@ -0,0 +1,148 @@
+"""
+Servidor de redirecionamento asyncio (ASGI), com acesso assíncrono ao banco
+
+Mesma resolução do redirect_server.py e do redirect_wsgi.py (snapshot, filtro
+de Bloom, cache em memória, banco e contagem de cliques, com as regras de
+URLShortener.find_redirect_target) e os mesmos cabeçalhos de cache
+(RedirectPolicy), mas a busca no banco não ocupa uma thread por requisição:
+um processo mantém milhares de conexões keep-alive abertas. Atende só
+/<codigo_curto> (GET e HEAD) e a página inicial.
+
+Uso (a partir da raiz do projeto):
+    python src/redirect_asgi.py              # servidor asyncio embutido (keep-alive, encerramento gracioso)
+    uvicorn --app-dir src redirect_asgi:application
+"""
+import asyncio
+import logging
+import os
+import time
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente do config.env (antes do backend, que lê parte delas na importação)
+load_dotenv('config.env')
+
+from backend.logs import AccessLog, configure_logging  # noqa: E402
+from backend.redirects import RedirectPolicy, location_header  # noqa: E402
+from backend.resolver import MESSAGES, AsyncRedirectResolver  # noqa: E402
+
+# Logs escritos por uma thread de fundo, fora do loop de eventos
+configure_logging()
+logger = logging.getLogger('redirect_asgi')
+
+INDEX_BODY = "Servidor de Encurtamento de Links Rodando. Use /<codigo_curto> para redirecionar.".encode('utf-8')
+TEXT_HEADERS = [(b'content-type', b'text/plain; charset=utf-8')]
+ERROR_BODIES = {status: message.encode('utf-8') for status, message in MESSAGES.items()}
+
+_resolver = None
+_policy = None
+_access_log = None
+_init_lock = None
+
+
+async def startup():
+    """Monta o resolvedor e conecta os bancos (síncrono para as tarefas de fundo, assíncrono para as buscas)"""
+    global _resolver, _policy, _access_log
+    resolver = AsyncRedirectResolver.from_env()
+    if not await resolver.storage.connect():
+        # Sem banco, as requisições respondem 503 enquanto a reconexão segue em segundo plano
+        logger.warning("Servidor asyncio: banco indisponível na inicialização.")
+    else:
+        # Carrega os códigos mais acessados antes de aceitar tráfego
+        await resolver.warm_up()
+    if resolver.storage.name == 'mongo':
+        # Filtro de Bloom e contagem de cliques usam a conexão síncrona, aberta em segundo plano
+        resolver.sync_storage.connect_in_background()
+    resolver.start()
+    _policy = RedirectPolicy.from_env()
+    _access_log = AccessLog.from_env()
+    _resolver = resolver
+
+
+async def shutdown():
+    """Grava os cliques pendentes, para as tarefas de fundo e fecha as conexões"""
+    global _resolver
+    resolver, _resolver = _resolver, None
+    if resolver is None:
+        return
+    await asyncio.to_thread(resolver.stop)
+    await resolver.storage.close()
+    await asyncio.to_thread(resolver.sync_storage.disconnect)
+
+
+async def _components():
+    # Servidores sem 'lifespan' inicializam na primeira requisição
+    global _init_lock
+    if _resolver is None:
+        if _init_lock is None:
+            _init_lock = asyncio.Lock()
+        async with _init_lock:
+            if _resolver is None:
+                await startup()
+    return _resolver, _policy
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await startup()
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def _respond(send, status: int, headers, body: bytes = b''):
+    if status != 304:
+        headers = headers + TEXT_HEADERS
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def application(scope, receive, send):
+    """Aplicação ASGI de redirecionamento."""
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    method = scope['method']
+    short_code = scope['path'][1:]
+
+    if method not in ('GET', 'HEAD'):
+        return await _respond(send, 405, [(b'allow', b'GET, HEAD')])
+    if not short_code:
+        return await _respond(send, 200, [], b'' if method == 'HEAD' else INDEX_BODY)
+
+    started = time.perf_counter()
+    resolver, policy = await _components()
+    target, error_status = await resolver.resolve(short_code) if '/' not in short_code else (None, 404)
+    if target is None:
+        _access_log.log(method, scope['path'], error_status, time.perf_counter() - started)
+        return await _respond(send, error_status, [], b'' if method == 'HEAD' else ERROR_BODIES[error_status])
+
+    if_none_match = if_modified_since = None
+    for name, value in scope['headers']:
+        if name == b'if-none-match':
+            if_none_match = value.decode('latin-1')
+        elif name == b'if-modified-since':
+            if_modified_since = value.decode('latin-1')
+
+    status, cache_headers = policy.respond(short_code, target, if_none_match=if_none_match,
+                                           if_modified_since=if_modified_since)
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in cache_headers.items()]
+    if status != 304:
+        headers.append((b'location', location_header(target.original_url).encode('latin-1')))
+    _access_log.log(method, scope['path'], status, time.perf_counter() - started, target.original_url)
+    await _respond(send, status, headers)
+
+
+if __name__ == '__main__':
+    from backend.asgi_server import run
+
+    run(application, '0.0.0.0', int(os.getenv('FLASK_PORT', 5000)))
@@ -0,0 +1,144 @@
+"""
+Servidor de redirecionamento com vários processos na mesma porta (SO_REUSEPORT)
+
+Um supervisor cria N workers (padrão: um por CPU), cada um com o próprio
+socket de escuta, o próprio cliente do banco e as próprias tarefas de fundo
+(cache, filtro de Bloom, contagem de cliques); o cache compartilhado (L2)
+fica numa tabela em memória criada pelo supervisor. Os workers são verificados
+por batimentos, recriados se caírem e trocados um a um no SIGHUP: os novos
+workers importam a aplicação e o backend do disco, mas as variáveis de
+ambiente (config.env) continuam as lidas na partida do supervisor.
+
+Uso (a partir da raiz do projeto):
+    python src/redirect_prefork.py [--workers N] [--app asgi|wsgi|flask] [--port 5000]
+    kill -HUP <pid do supervisor>    # recarga gradual (código atual do disco)
+    kill -TERM <pid do supervisor>   # encerramento gracioso
+
+Aplicações:
+    asgi   redirect_asgi (asyncio, keep-alive, MongoDB assíncrono) — padrão
+    wsgi   redirect_wsgi (WSGI puro) num servidor wsgiref com threads
+    flask  redirect_server (todas as rotas, inclusive /metrics) no mesmo servidor wsgiref
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente do config.env (antes do backend, que lê parte delas na importação)
+load_dotenv('config.env')
+
+from backend.logs import configure_logging  # noqa: E402
+from backend.prefork import Heartbeat, Supervisor, check_port  # noqa: E402
+
+logger = logging.getLogger('redirect_prefork')
+
+APPS = ('asgi', 'wsgi', 'flask')
+
+
+def serve_asgi(host: str, port: int, heartbeat: Heartbeat):
+    import asyncio
+    import redirect_asgi
+    from backend.asgi_server import HTTPServer
+
+    asyncio.run(HTTPServer(redirect_asgi.application).serve(host, port, reuse_port=True, heartbeat=heartbeat.beat))
+
+
+def serve_wsgi(application, stop, host: str, port: int, heartbeat: Heartbeat):
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+    class ReusePortWSGIServer(ThreadingMixIn, WSGIServer):
+        # server_close() espera as requisições em andamento (encerramento gracioso)
+        daemon_threads = False
+        block_on_close = True
+
+        def server_bind(self):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            super().server_bind()
+
+        def service_actions(self):
+            # Executado a cada volta do laço de accept: um laço travado deixa de bater
+            heartbeat.beat()
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ReusePortWSGIServer((host, port), QuietHandler)
+    server.set_app(application)
+    # serve_forever() precisa ser interrompido por outra thread
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    logger.info("Servidor WSGI de redirecionamento em http://%s:%d (pid %d)", host, port, os.getpid())
+    try:
+        server.serve_forever(poll_interval=0.5)
+    finally:
+        server.server_close()
+        stop()
+
+
+def worker_target(app: str, host: str, port: int):
+    """Função executada em cada worker, após o fork: importa a aplicação e conecta ao banco"""
+    def run(heartbeat: Heartbeat):
+        if app == 'asgi':
+            serve_asgi(host, port, heartbeat)
+        elif app == 'wsgi':
+            import redirect_wsgi
+            redirect_wsgi._components() # Conecta antes do primeiro batimento (worker pronto)
+            serve_wsgi(redirect_wsgi.application, redirect_wsgi.shutdown, host, port, heartbeat)
+        else:
+            import redirect_server
+            if redirect_server.storage.connect():
+                redirect_server.resolver.warm_up()
+            elif redirect_server.snapshot is None:
+                logger.warning("Worker: banco indisponível na inicialização, reconectando em segundo plano.")
+            redirect_server.resolver.start()
+            serve_wsgi(redirect_server.app, redirect_server.resolver.stop, host, port, heartbeat)
+    return run
+
+
+def create_shared_cache(port: int):
+    """
+    Cria vazia a tabela de cache compartilhada pelos workers (L2), uma por porta
+
+    Sem SHARED_CACHE_PATH, usa um arquivo em /dev/shm; a tabela é apagada ao encerrar.
+    Os workers herdam o caminho pelo ambiente e abrem a tabela após o fork.
+    """
+    from backend.shared_cache import SharedCache, default_path
+
+    if not os.getenv('SHARED_CACHE_PATH', '').strip():
+        os.environ['SHARED_CACHE_PATH'] = default_path(f"encurtador-l2-{port}.cache")
+    return SharedCache.from_env(create=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Servidor de redirecionamento com vários processos')
+    parser.add_argument('--workers', type=int, default=None, help='Padrão: REDIRECT_WORKERS ou um por CPU')
+    parser.add_argument('--app', choices=APPS, default=os.getenv('REDIRECT_WORKER_APP', 'asgi'))
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.getenv('FLASK_PORT', 5000)))
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # Escrita direta, sem thread de fundo no supervisor; cada worker configura os próprios logs
+    configure_logging(asynchronous=False)
+    try:
+        check_port(args.host, args.port)
+    except OSError as e:
+        logger.error("Não foi possível usar a porta %d: %s", args.port, e)
+        sys.exit(1)
+    shared_cache = create_shared_cache(args.port)
+    try:
+        Supervisor.from_env(worker_target(args.app, args.host, args.port), args.workers).run()
+    finally:
+        if shared_cache is not None:
+            shared_cache.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,184 @@
 # redirect_server.py
+import functools
+import hmac
+import ipaddress
+import logging
 import os
-from flask import Flask, redirect, abort
-from backend.database import db_manager
-from backend.url_shortener import URLShortener # Importa para usar o get_original_url
+import time
+from flask import Flask, Response, redirect, abort, jsonify, request
+from werkzeug.exceptions import HTTPException
 from dotenv import load_dotenv
 
-# Carrega variáveis de ambiente do config.env
+# Carrega variáveis de ambiente do config.env (antes do backend, que lê parte delas na importação)
 load_dotenv('config.env')
 
+from backend.url_shortener import URLShortener  # noqa: E402
+from backend.resolver import MESSAGES, NOT_FOUND, RedirectResolver  # noqa: E402
+from backend.cache import LRUCache, CachedURLLookup  # noqa: E402
+from backend.shared_cache import SharedCache  # noqa: E402
+from backend.snapshot import RedirectSnapshot  # noqa: E402
+from backend.redirects import NOT_MODIFIED, RedirectPolicy  # noqa: E402
+from backend.analytics import ClickCounter  # noqa: E402
+from backend.bloom import ShortCodeFilter  # noqa: E402
+from backend.hotset import HotSet  # noqa: E402
+from backend.logs import AccessLog, configure_logging, logging_stats  # noqa: E402
+from backend.metrics import CounterVec, Histogram, MetricsRegistry, STORAGE_OPERATIONS, instrument_storage  # noqa: E402
+
+# Logs escritos por uma thread de fundo (LOG_LEVEL, LOG_FORMAT, LOG_ASYNC)
+configure_logging()
+logger = logging.getLogger('redirect_server')
+
 app = Flask(__name__)
 shortener_instance = URLShortener() # Instancia o URLShortener para acesso ao banco
+storage = shortener_instance.storage # Backend configurado em STORAGE_BACKEND
+# Cache em memória (LRU + TTL) na frente do banco; desativado se CACHE_ENABLED=false
+url_lookup = CachedURLLookup(shortener_instance, LRUCache.from_env(), SharedCache.from_env())
+# Snapshot somente leitura (mmap), se REDIRECT_SNAPSHOT_PATH estiver configurado
+snapshot = RedirectSnapshot.from_env()
+# Contagem de cliques agregada em memória e gravada em lote (CLICK_TRACKING_ENABLED)
+click_counter = ClickCounter.from_env(storage)
+# Filtro de Bloom dos códigos existentes: códigos inexistentes recebem 404 sem consulta ao banco (BLOOM_ENABLED)
+code_filter = ShortCodeFilter.from_env(storage)
+# Códigos mais acessados, gravados periodicamente para aquecer o cache na próxima partida (HOTSET_PATH)
+hot_set = HotSet.from_env()
+# Status e cabeçalhos de cache dos redirecionamentos (REDIRECT_STATUS, REDIRECT_CACHE_MAX_AGE)
+redirect_policy = RedirectPolicy.from_env()
+# Log de acesso amostrado por nível (ACCESS_LOG_ENABLED, ACCESS_LOG_SAMPLE_*)
+access_log = AccessLog.from_env()
+# Ordem das consultas (snapshot, filtro, cache, banco) compartilhada com o servidor WSGI mínimo
+resolver = RedirectResolver(storage, url_lookup, snapshot, code_filter, click_counter, hot_set)
+# Token das rotas administrativas (/metrics, /_cache/...); vazio: só conexões do próprio host
+admin_token = os.getenv('ADMIN_TOKEN', '').strip()
+
+def admin_allowed():
+    """
+    Indica se a requisição pode usar as rotas administrativas (token no cabeçalho X-Admin-Token ou loopback).
+    """
+    if admin_token:
+        return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), admin_token)
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    if getattr(address, 'ipv4_mapped', None) is not None:
+        address = address.ipv4_mapped
+    return address.is_loopback
+
+def admin_route(rule, **options):
+    """
+    Registra uma rota administrativa; para os demais clientes o caminho é tratado como um código curto.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def guarded(*args, **kwargs):
+            if admin_allowed():
+                return view(*args, **kwargs)
+            # Não esconde links com códigos como 'metrics' nem revela que a rota existe
+            path = request.path.strip('/')
+            if request.method == 'GET' and '/' not in path:
+                return redirect_to_original(path)
+            abort(NOT_FOUND, MESSAGES[NOT_FOUND])
+        return app.route(rule, **options)(guarded)
+    return decorator
+
+# Métricas expostas em /metrics (pré-alocadas: o caminho crítico só incrementa contadores)
+metrics = MetricsRegistry()
+redirect_requests = metrics.register(CounterVec(
+    'redirect_requests_total', 'Requisições de redirecionamento por status HTTP',
+    'status', ('301', '302', '304', '307', '308', '404', '500', '503')
+))
+redirect_latency = metrics.register(Histogram(
+    'redirect_latency_seconds', 'Latência das requisições de redirecionamento'
+))
+storage_latency = metrics.register(Histogram(
+    'storage_operation_seconds', 'Latência das operações no banco de dados',
+    label='operation', values=STORAGE_OPERATIONS
+))
+instrument_storage(storage, storage_latency)
+
+
+def _cache_tiers():
+    # L1: cache do processo; L2: tabela compartilhada pelos workers (só consultada nas falhas do L1)
+    stats = url_lookup.stats()
+    return [(tier, tier_stats) for tier, tier_stats in (('l1', stats), ('l2', stats['l2'])) if tier_stats.get('enabled')]
+
+
+def _cache_samples():
+    samples = []
+    for tier, stats in _cache_tiers():
+        samples.append(({'tier': tier, 'result': 'hit'}, stats['hits']))
+        samples.append(({'tier': tier, 'result': 'miss'}, stats['misses']))
+    return samples
+
+
+def _snapshot_samples():
+    if snapshot is None:
+        return []
+    return [({'result': 'hit'}, snapshot.hits), ({'result': 'miss'}, snapshot.misses)]
+
+
+def _bloom_samples():
+    if code_filter is None:
+        return []
+    return [({'result': 'rejected'}, code_filter.rejected), ({'result': 'passed'}, code_filter.passed)]
+
+
+def _click_samples():
+    if click_counter is None:
+        return []
+    stats = click_counter.stats()
+    return [({'state': 'pending'}, stats['pending_clicks']), ({'state': 'flushed'}, stats['flushed_clicks'])]
+
+
+def _pool_samples():
+    stats = storage.pool_stats() if storage.is_connected() else None
+    return [({'stat': name}, value) for name, value in (stats or {}).items()]
+
+
+metrics.register_collector('redirect_cache_lookups_total', 'Consultas ao cache de códigos por resultado',
+                           'counter', _cache_samples)
+metrics.register_collector('redirect_cache_hit_ratio', 'Fração de consultas atendidas por camada do cache', 'gauge',
+                           lambda: [({'tier': tier}, stats['hit_ratio']) for tier, stats in _cache_tiers()])
+metrics.register_collector('redirect_cache_evictions_total', 'Entradas removidas do cache por falta de espaço',
+                           'counter', lambda: [({'tier': tier}, stats['evictions']) for tier, stats in _cache_tiers()])
+metrics.register_collector('redirect_cache_coalesced_total',
+                           'Falhas do cache atendidas pela consulta ao banco de outra requisição', 'counter',
+                           lambda: [({}, url_lookup.coalesced)])
+metrics.register_collector('redirect_snapshot_lookups_total', 'Consultas ao snapshot por resultado',
+                           'counter', _snapshot_samples)
+metrics.register_collector('redirect_bloom_lookups_total', 'Consultas ao filtro de códigos por resultado',
+                           'counter', _bloom_samples)
+metrics.register_collector('redirect_clicks', 'Cliques aguardando gravação e já gravados no banco', 'gauge',
+                           _click_samples)
+metrics.register_collector('log_queue', 'Registros de log aguardando escrita e descartados com a fila cheia',
+                           'gauge', lambda: [({'stat': name}, value) for name, value in logging_stats().items()
+                                             if name != 'async'])
+metrics.register_collector('database_pool', 'Estatísticas do pool de conexões do MongoDB', 'gauge', _pool_samples)
+
+def redirect_response(short_code, target):
+    """
+    Monta o redirecionamento com os cabeçalhos de cache, ou 304 se a cópia do cliente ainda vale.
+    """
+    status, headers = redirect_policy.respond(
+        short_code, target,
+        if_none_match=request.headers.get('If-None-Match'),
+        if_modified_since=request.headers.get('If-Modified-Since'),
+    )
+    if status == NOT_MODIFIED:
+        response = Response(status=NOT_MODIFIED)
+    else:
+        response = redirect(target.original_url, code=status)
+    response.headers.update(headers)
+    return response
+
+def resolve_redirect(short_code):
+    """
+    Resolve o short_code e monta a resposta de redirecionamento (ou aborta com 404/503).
+    """
+    target, error_status = resolver.resolve(short_code)
+    if target is None:
+        abort(error_status, MESSAGES[error_status])
+    return redirect_response(short_code, target)
 
 # Endpoint para redirecionamento
 @app.route('/<short_code>')
@@ -17,20 +186,75 @@ def redirect_to_original(short_code):
     """
     Redireciona o usuário para a URL original com base no short_code.
     """
-    if not db_manager.is_connected():
-        print("Servidor de Redirecionamento: Tentando reconectar ao MongoDB...")
-        if not db_manager.connect():
-            print("Servidor de Redirecionamento: Falha na conexão com MongoDB.")
-            abort(500, "Internal Server Error: Database connection failed.")
+    started = time.perf_counter()
+    status = '500'
+    location = None
+    try:
+        response = resolve_redirect(short_code)
+        status = str(response.status_code)
+        location = response.headers.get('Location')
+        return response
+    except HTTPException as e:
+        status = str(e.code)
+        raise
+    finally:
+        latency = time.perf_counter() - started
+        redirect_requests.inc(status)
+        redirect_latency.observe(latency)
+        access_log.log(request.method, request.path, int(status), latency, location)
 
-    original_url = shortener_instance.get_original_url(short_code)
+@admin_route('/metrics')
+def metrics_endpoint():
+    """Métricas no formato texto do Prometheus."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
-    if original_url:
-        print(f"Redirecionando '{short_code}' para '{original_url}'")
-        return redirect(original_url)
-    else:
-        print(f"Código curto '{short_code}' não encontrado.")
-        abort(404, "Short URL not found.")
+@admin_route('/_cache/stats')
+def cache_stats():
+    """Contadores de acertos/falhas/remoções do cache (L1 e L2), para dimensionamento."""
+    stats = url_lookup.stats()
+    if url_lookup.shared is not None:
+        stats['l2']['size'] = url_lookup.shared.size()
+    return jsonify(stats)
+
+@admin_route('/_cache/<short_code>', methods=['DELETE'])
+def cache_invalidate(short_code):
+    """Descarta um código do cache deste processo e do compartilhado (os demais workers descartam o próprio cache)."""
+    url_lookup.invalidate(short_code)
+    return jsonify({'invalidated': short_code})
+
+@admin_route('/_links/<short_code>', methods=['DELETE'])
+def link_delete(short_code):
+    """Remove o link do banco e dos caches; deixa de ser atendido também pelo snapshot."""
+    result = shortener_instance.delete_url(short_code, url_lookup)
+    return jsonify(result), (200 if result['success'] else 503)
+
+@admin_route('/_snapshot/stats')
+def snapshot_stats():
+    """Informações do snapshot em uso (ou indica que não há snapshot carregado)."""
+    if snapshot is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(snapshot.stats(), enabled=True))
+
+@admin_route('/_bloom/stats')
+def bloom_stats():
+    """Estado do filtro de códigos (ocupação, taxa de erro estimada e 404s evitados no banco)."""
+    if code_filter is None:
+        return jsonify({'enabled': False})
+    return jsonify(code_filter.stats())
+
+@admin_route('/_clicks/stats')
+def click_stats():
+    """Situação da contagem de cliques (pendentes em memória e já gravados)."""
+    if click_counter is None:
+        return jsonify({'enabled': False})
+    return jsonify(click_counter.stats())
+
+@admin_route('/_hotset/stats')
+def hotset_stats():
+    """Estado do ranking de códigos mais acessados usado no aquecimento do cache."""
+    if hot_set is None:
+        return jsonify({'enabled': False})
+    return jsonify(hot_set.stats())
 
 @app.route('/')
 def index():
@@ -38,14 +262,25 @@ def index():
     return "Servidor de Encurtamento de Links Rodando. Use /<codigo_curto> para redirecionar."
 
 if __name__ == '__main__':
-    print("🚀 Iniciando Servidor de Redirecionamento...")
+    logger.info("Iniciando Servidor de Redirecionamento...")
     # Conecta ao banco de dados ao iniciar o servidor
-    if not db_manager.connect():
-        print("❌ Servidor de Redirecionamento: Não foi possível conectar ao MongoDB. Por favor, verifique se o MongoDB está rodando.")
-        exit(1) # Sai se não conseguir conectar ao DB
+    if not storage.connect():
+        if snapshot is None:
+            logger.error("Servidor de Redirecionamento: Não foi possível conectar ao banco de dados. Por favor, verifique se o MongoDB está rodando.")
+            exit(1) # Sai se não conseguir conectar ao DB
+        # Com snapshot, o servidor atende os links conhecidos enquanto reconecta em segundo plano
+        logger.warning("Servidor de Redirecionamento: banco indisponível, servindo apenas o snapshot por enquanto.")
+    else:
+        # Carrega os códigos mais acessados antes de aceitar tráfego
+        resolver.warm_up()
+    resolver.start()
+    if snapshot is not None:
+        logger.info("Snapshot carregado: %s (%d links)", snapshot.path, len(snapshot))
 
     # Obtém a porta do ambiente ou usa 5000 como padrão
     port = int(os.getenv('FLASK_PORT', 5000))
+    # As linhas de acesso vêm do access_log (com amostragem), não do servidor de desenvolvimento
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
     # Define o host para 0.0.0.0 para que possa ser acessível de outras máquinas na rede, se necessário
     # Em um ambiente de produção, você usaria um servidor WSGI como Gunicorn/Waitress
     app.run(host='0.0.0.0', port=port, debug=False) # debug=True em desenvolvimento é útil, mas False para "produção"
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Servidor de redirecionamento mínimo em WSGI puro (sem Flask)
+
+Atende só /<codigo_curto> (GET e HEAD) e a página inicial, com a mesma
+resolução (RedirectResolver) e os mesmos cabeçalhos de cache (RedirectPolicy)
+do redirect_server.py. Os módulos do backend só são importados na primeira
+requisição, então um worker novo sobe rápido. As rotas de diagnóstico
+(/metrics, /_cache/stats etc.) continuam no redirect_server.py.
+
+Uso (a partir da raiz do projeto):
+    gunicorn --chdir src redirect_wsgi:application
+    python src/redirect_wsgi.py   # servidor de desenvolvimento (wsgiref)
+"""
+import logging
+import os
+import threading
+import time
+
+STATUS_LINES = {
+    200: '200 OK',
+    301: '301 Moved Permanently',
+    302: '302 Found',
+    304: '304 Not Modified',
+    307: '307 Temporary Redirect',
+    308: '308 Permanent Redirect',
+    404: '404 Not Found',
+    405: '405 Method Not Allowed',
+    503: '503 Service Unavailable',
+}
+
+INDEX_BODY = "Servidor de Encurtamento de Links Rodando. Use /<codigo_curto> para redirecionar.".encode('utf-8')
+
+_resolver = None
+_policy = None
+_messages = {}
+_location_header = None
+_access_log = None
+_init_lock = threading.Lock()
+logger = logging.getLogger('redirect_wsgi')
+
+
+def _components():
+    """Cria o resolvedor e a política na primeira requisição (importações adiadas)"""
+    global _resolver, _policy, _messages, _location_header, _access_log
+    if _resolver is None:
+        with _init_lock:
+            if _resolver is None:
+                from dotenv import load_dotenv
+
+                # Carrega o config.env aqui, e não na importação: o worker sobe sem ler arquivos
+                load_dotenv('config.env')
+                from backend.logs import AccessLog, configure_logging
+                from backend.redirects import RedirectPolicy, location_header
+                from backend.resolver import MESSAGES, RedirectResolver
+
+                configure_logging()
+                resolver = RedirectResolver.from_env()
+                if not resolver.storage.connect():
+                    # Sem banco, as requisições respondem 503 enquanto a reconexão segue em segundo plano
+                    logger.warning("Servidor WSGI: banco indisponível na inicialização.")
+                else:
+                    resolver.warm_up()
+                resolver.start()
+                _policy = RedirectPolicy.from_env()
+                _messages = {status: message.encode('utf-8') for status, message in MESSAGES.items()}
+                _location_header = location_header
+                _access_log = AccessLog.from_env()
+                _resolver = resolver
+    return _resolver, _policy
+
+
+def shutdown():
+    """Grava os cliques pendentes e para as tarefas de fundo (fim do processo)"""
+    if _resolver is not None:
+        _resolver.stop()
+
+
+def _respond(start_response, status: int, headers, body: bytes = b''):
+    if status != 304:
+        headers.append(('Content-Type', 'text/plain; charset=utf-8'))
+        headers.append(('Content-Length', str(len(body))))
+    start_response(STATUS_LINES[status], headers)
+    return [body]
+
+
+def application(environ, start_response):
+    """Aplicação WSGI de redirecionamento."""
+    method = environ.get('REQUEST_METHOD', 'GET')
+    # O WSGI entrega o caminho decodificado como latin-1
+    short_code = environ.get('PATH_INFO', '/')[1:].encode('latin-1').decode('utf-8', 'replace')
+
+    if method not in ('GET', 'HEAD'):
+        return _respond(start_response, 405, [('Allow', 'GET, HEAD')])
+    if not short_code:
+        return _respond(start_response, 200, [], b'' if method == 'HEAD' else INDEX_BODY)
+
+    started = time.perf_counter()
+    resolver, policy = _components()
+    target, error_status = resolver.resolve(short_code) if '/' not in short_code else (None, 404)
+    if target is None:
+        _access_log.log(method, environ.get('PATH_INFO', '/'), error_status, time.perf_counter() - started)
+        return _respond(start_response, error_status, [], b'' if method == 'HEAD' else _messages[error_status])
+
+    status, cache_headers = policy.respond(
+        short_code, target,
+        if_none_match=environ.get('HTTP_IF_NONE_MATCH'),
+        if_modified_since=environ.get('HTTP_IF_MODIFIED_SINCE'),
+    )
+    headers = list(cache_headers.items())
+    if status != 304:
+        headers.append(('Location', _location_header(target.original_url)))
+    _access_log.log(method, environ.get('PATH_INFO', '/'), status, time.perf_counter() - started, target.original_url)
+    return _respond(start_response, status, headers)
+
+
+if __name__ == '__main__':
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+    from dotenv import load_dotenv
+
+    # Carrega variáveis de ambiente do config.env
+    load_dotenv('config.env')
+
+    class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    port = int(os.getenv('FLASK_PORT', 5000))
+    _components()
+    logger.info("Servidor WSGI de redirecionamento em http://0.0.0.0:%d", port)
+    make_server('0.0.0.0', port, application, server_class=ThreadingWSGIServer,
+                handler_class=QuietHandler).serve_forever()
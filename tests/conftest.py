@@ -0,0 +1,41 @@
+"""
+Configuração comum dos testes: backend em 'src' e fábrica de documentos
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from backend.storage.memory import MemoryStorage  # noqa: E402
+from backend.storage.sqlite import SQLiteStorage  # noqa: E402
+from backend.validators import url_digest  # noqa: E402
+
+
+def make_document(short_url: str, original_url: str = None, age: float = 0.0, **extra):
+    """Documento como o gravado por URLShortener.shorten_url, criado há 'age' segundos"""
+    original_url = original_url or f"https://example.com/{short_url}"
+    created_at = datetime.now() - timedelta(seconds=age)
+    document = {
+        'original_url': original_url,
+        'url_hash': url_digest(original_url),
+        'short_url': short_url,
+        'created_at': created_at,
+        'created_timestamp': int(created_at.timestamp()),
+    }
+    document.update(extra)
+    return document
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def storage(request, tmp_path):
+    """Backend embutido conectado (memória e SQLite em arquivo temporário)"""
+    if request.param == 'memory':
+        backend = MemoryStorage()
+    else:
+        backend = SQLiteStorage(str(tmp_path / 'urls.db'), pool_size=4)
+    backend.connect()
+    yield backend
+    backend.disconnect()
@@ -0,0 +1,88 @@
+"""
+Testes do filtro de Bloom dos códigos e da sua atualização incremental
+"""
+import threading
+
+from backend.bloom import BloomFilter, ShortCodeFilter
+from conftest import make_document
+
+
+def test_bloom_filter_membership():
+    bloom = BloomFilter.for_capacity(1000, 0.01)
+    for index in range(1000):
+        bloom.add(f"code{index}")
+
+    assert all(f"code{index}" in bloom for index in range(1000))
+    false_positives = sum(f"other{index}" in bloom for index in range(10000))
+    assert false_positives < 300
+
+
+def test_refresh_picks_up_imported_links(storage):
+    storage.insert(make_document('first'))
+    code_filter = ShortCodeFilter(storage, capacity=100)
+    code_filter.rebuild()
+    assert code_filter.might_exist('first', recheck=False)
+    assert not code_filter.might_exist('imported', recheck=False)
+
+    # Link gravado agora com data de criação anterior à última leitura do filtro
+    storage.insert(make_document('imported', age=86400))
+    code_filter.refresh()
+
+    assert code_filter.might_exist('imported', recheck=False)
+    code_filter.stop()
+
+
+def test_recheck_confirms_new_codes(storage):
+    code_filter = ShortCodeFilter(storage, capacity=100)
+    code_filter.rebuild()
+    # Criado logo depois de uma atualização: ainda assim não pode receber 404
+    storage.insert(make_document('created'))
+
+    assert code_filter.recheck('created')
+    assert not code_filter.recheck('never')
+    assert code_filter.stats()['rejected'] == 1
+    code_filter.stop()
+
+
+def test_concurrent_rechecks_never_reject_new_codes(storage):
+    code_filter = ShortCodeFilter(storage, capacity=100)
+    code_filter.rebuild()
+    results = []
+    # Sem might_exist(): a thread de fundo não é iniciada; as consultas disputam só entre si
+    with code_filter._lock:
+        threads = [threading.Thread(target=lambda: results.append(code_filter.recheck('created'))) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        storage.insert(make_document('created'))
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 20
+
+
+def test_rebuild_grows_past_capacity(storage):
+    storage.insert_many([make_document(f"code{index}") for index in range(50)])
+    code_filter = ShortCodeFilter(storage, capacity=10)
+
+    code_filter.rebuild()
+
+    assert code_filter.capacity >= 50
+    assert all(code_filter.might_exist(f"code{index}", recheck=False) for index in range(50))
+    code_filter.stop()
+
+
+def test_saved_filter_resumes_from_watermark(storage, tmp_path):
+    path = str(tmp_path / 'codes.bloom')
+    storage.insert(make_document('saved'))
+    original = ShortCodeFilter(storage, capacity=100, path=path)
+    original.rebuild()
+    original.stop()
+
+    storage.insert(make_document('later', age=3600))
+    restored = ShortCodeFilter(storage, capacity=100, path=path)
+    assert restored.load()
+    assert restored.might_exist('saved', recheck=False)
+    restored.refresh()
+
+    assert restored.might_exist('later', recheck=False)
+    restored.stop()
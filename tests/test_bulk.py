@@ -0,0 +1,125 @@
+"""
+Testes da importação e exportação em lote (CSV e JSONL, checkpoint e cliques)
+"""
+import io
+import json
+import os
+
+import pytest
+
+from backend.bulk import BulkImporter, export_links, read_records
+from backend.storage.base import StorageError
+from backend.storage.memory import MemoryStorage
+from backend.url_shortener import URLShortener
+
+CSV = (
+    '\ufeffshort_url,original_url,clicks\n'  # BOM do Excel
+    'one,https://example.com/1,3\n'
+    'two,https://example.com/2,\n'
+    ',https://example.com/3,0\n'
+)
+
+
+class FlakyStorage(MemoryStorage):
+    """Memória cuja gravação em lote falha a partir da chamada 'fail_at' (interrupção da importação)"""
+
+    def __init__(self, fail_at: int):
+        super().__init__()
+        self.fail_at = fail_at
+        self.calls = 0
+
+    def insert_many(self, documents):
+        self.calls += 1
+        if self.calls >= self.fail_at:
+            raise StorageError('Banco de dados não conectado')
+        return super().insert_many(documents)
+
+
+def test_csv_offset_resumes_after_header():
+    records = list(read_records(io.BytesIO(CSV.encode('utf-8')), 'csv'))
+    assert [record['short_url'] for record, _ in records] == ['one', 'two', '']
+
+    # Retomar da posição depois do primeiro registro ainda lê o cabeçalho
+    resumed = list(read_records(io.BytesIO(CSV.encode('utf-8')), 'csv', records[0][1]))
+
+    assert [record for record, _ in resumed] == [record for record, _ in records[1:]]
+    assert resumed[-1][1] == len(CSV.encode('utf-8'))
+
+
+def test_jsonl_records():
+    data = b'{"url": "https://example.com/a"}\n\nnot json\n"https://example.com/b"\n[1]\n'
+
+    records = [record for record, _ in read_records(io.BytesIO(data), 'jsonl')]
+
+    assert records == [{'url': 'https://example.com/a'}, None, {'original_url': 'https://example.com/b'}, None]
+
+
+def test_import_counts_and_keeps_codes(storage, tmp_path):
+    path = tmp_path / 'links.jsonl'
+    path.write_text('\n'.join(json.dumps(record) for record in [
+        {'short_url': 'kept', 'original_url': 'https://example.com/kept', 'redirect_status': 308},
+        {'url': 'https://example.com/new'},
+        {'url': 'HTTPS://EXAMPLE.COM/new'},
+        {'url': 'not a url'},
+        {'url': 'https://example.com/old', 'expires_at': '2000-01-01T00:00:00Z'},
+    ]) + '\n', encoding='utf-8')
+
+    result = BulkImporter(URLShortener(storage), batch_size=2).run(str(path))
+
+    assert {name: result[name] for name in BulkImporter.COUNTERS} == {
+        'read': 5, 'imported': 2, 'existing': 1, 'invalid': 1, 'expired': 1, 'failed': 0,
+    }
+    assert storage.get_by_code('kept')['redirect_status'] == 308
+
+
+def test_interrupted_import_resumes_from_checkpoint(tmp_path):
+    path = tmp_path / 'links.csv'
+    path.write_text('original_url\n' + ''.join(f"https://example.com/{index}\n" for index in range(10)),
+                    encoding='utf-8')
+    checkpoint = str(tmp_path / 'links.checkpoint')
+    storage = FlakyStorage(fail_at=3)
+    storage.connect()
+
+    with pytest.raises(StorageError):
+        BulkImporter(URLShortener(storage), batch_size=4, checkpoint_path=checkpoint).run(str(path))
+    with open(checkpoint, encoding='utf-8') as checkpoint_file:
+        saved = json.load(checkpoint_file)
+    assert saved['stats']['imported'] == 8
+
+    storage.fail_at = float('inf')
+    result = BulkImporter(URLShortener(storage), batch_size=4, checkpoint_path=checkpoint).run(str(path))
+
+    assert result['resumed_from'] == saved['offset']
+    assert (result['read'], result['imported'], result['existing']) == (10, 10, 0)
+    assert len(list(storage.iter_links())) == 10
+    assert not os.path.exists(checkpoint)
+
+
+def test_checkpoint_of_another_file_is_ignored(storage, tmp_path):
+    path = tmp_path / 'links.csv'
+    path.write_text('original_url\nhttps://example.com/a\n', encoding='utf-8')
+    checkpoint = tmp_path / 'links.checkpoint'
+    checkpoint.write_text(json.dumps({'source': '/other.csv', 'offset': 999, 'stats': {}}), encoding='utf-8')
+
+    result = BulkImporter(URLShortener(storage), checkpoint_path=str(checkpoint)).run(str(path))
+
+    assert (result['resumed_from'], result['imported']) == (0, 1)
+
+
+@pytest.mark.parametrize('extension', ['csv', 'jsonl'])
+def test_clicks_round_trip(storage, tmp_path, extension):
+    source = tmp_path / 'source.csv'
+    source.write_text(CSV, encoding='utf-8')
+    BulkImporter(URLShortener(storage)).run(str(source))
+    storage.increment_clicks({'two': 2})
+    exported = str(tmp_path / f"links.{extension}")
+
+    assert export_links(storage, exported) == 3
+
+    target = MemoryStorage()
+    target.connect()
+    BulkImporter(URLShortener(target)).run(exported)
+    clicks = {document['short_url']: document['clicks'] for document in target.iter_documents()}
+    original = {document['short_url']: document['clicks'] for document in storage.iter_documents()}
+    assert clicks == original
+    assert clicks['one'] == 3 and clicks['two'] == 2
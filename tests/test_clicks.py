@@ -0,0 +1,84 @@
+"""
+Testes da contagem de cliques agregada em memória e gravada em lote
+"""
+import time
+
+from backend.analytics import ClickCounter
+from backend.storage.base import StorageError
+from conftest import make_document
+
+
+class FailingStorage:
+    """Armazenamento que recusa as gravações de cliques enquanto 'available' for False"""
+
+    def __init__(self):
+        self.available = False
+        self.counts = {}
+
+    def increment_clicks(self, counts):
+        if not self.available:
+            raise StorageError('Banco de dados não conectado')
+        self.counts.update(counts)
+
+
+def clicks(storage):
+    return {document['short_url']: document['clicks'] for document in storage.iter_documents()}
+
+
+def test_flush_writes_pending_clicks(storage):
+    storage.insert_many([make_document(code) for code in ('a', 'b', 'c')])
+    counter = ClickCounter(storage, flush_interval=3600)
+
+    for code in ('a', 'a', 'b', 'c', 'a'):
+        counter.record(code)
+    assert clicks(storage) == {'a': 0, 'b': 0, 'c': 0}
+    assert counter.stats()['pending_clicks'] == 5
+
+    counter.flush()
+
+    assert clicks(storage) == {'a': 3, 'b': 1, 'c': 1}
+    assert counter.stats()['pending_clicks'] == 0
+    assert counter.flushed_clicks == 5
+    counter.stop()
+
+
+def test_full_batch_wakes_the_flusher(storage):
+    storage.insert_many([make_document(code) for code in ('a', 'b', 'c')])
+    counter = ClickCounter(storage, flush_interval=3600, batch_size=2)
+
+    for code in ('a', 'b', 'c'):
+        counter.record(code)
+    deadline = time.monotonic() + 5
+    while counter.flushed_clicks < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # Gravado pela thread de fundo bem antes do intervalo, em lotes de até 2 códigos
+    assert clicks(storage) == {'a': 1, 'b': 1, 'c': 1}
+    counter.stop()
+
+
+def test_stop_flushes_pending_clicks(storage):
+    storage.insert(make_document('a'))
+    counter = ClickCounter(storage, flush_interval=3600)
+
+    counter.record('a')
+    counter.record('a')
+    counter.stop()
+
+    assert clicks(storage) == {'a': 2}
+
+
+def test_failed_flush_keeps_counts():
+    storage = FailingStorage()
+    counter = ClickCounter(storage, flush_interval=3600)
+
+    counter.record('a')
+    counter.flush()
+
+    stats = counter.stats()
+    assert stats['flush_errors'] == 1
+    assert stats['pending_clicks'] == 1
+
+    storage.available = True
+    counter.stop()
+    assert storage.counts == {'a': 1}
@@ -0,0 +1,131 @@
+"""
+Testes da consulta única ao banco para falhas de cache simultâneas (síncrono e asyncio)
+"""
+import asyncio
+import threading
+
+import pytest
+
+from backend.cache import CachedURLLookup, LRUCache
+from backend.resolver import NOT_FOUND, AsyncRedirectResolver
+from backend.storage.aio import ThreadedAsyncStorage
+from backend.storage.base import StorageError
+from backend.storage.memory import MemoryStorage
+from backend.url_shortener import URLShortener
+from conftest import make_document
+
+
+class SlowStorage(MemoryStorage):
+    """Memória com consultas por código que esperam 'release' e são contadas"""
+
+    def __init__(self, error: Exception = None):
+        super().__init__()
+        self.error = error
+        self.lookups = 0
+        self.release = threading.Event()
+
+    def get_by_code(self, short_url):
+        self.lookups += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return super().get_by_code(short_url)
+
+
+def slow_storage(error: Exception = None) -> SlowStorage:
+    storage = SlowStorage(error)
+    storage.connect()
+    storage.insert(make_document('hot'))
+    return storage
+
+
+def run_threads(lookup: CachedURLLookup, storage: SlowStorage, count: int):
+    results = []
+
+    def find():
+        try:
+            results.append(lookup.find_target('hot'))
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=find) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    while lookup.coalesced < count - 1:
+        threading.Event().wait(0.01)
+    storage.release.set()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_misses_share_one_query():
+    storage = slow_storage()
+    lookup = CachedURLLookup(URLShortener(storage), LRUCache(max_entries=100))
+
+    results = run_threads(lookup, storage, 20)
+
+    assert storage.lookups == 1
+    assert lookup.coalesced == 19
+    assert {target.original_url for target in results} == {'https://example.com/hot'}
+
+
+def test_error_reaches_every_waiter():
+    storage = slow_storage(StorageError('Banco de dados não conectado'))
+    lookup = CachedURLLookup(URLShortener(storage), None)
+
+    results = run_threads(lookup, storage, 5)
+
+    assert storage.lookups == 1
+    assert all(isinstance(result, StorageError) for result in results)
+    # O erro não fica no cache: a próxima consulta vai ao banco
+    storage.error = None
+    assert lookup.find_target('hot').original_url == 'https://example.com/hot'
+
+
+def async_resolver(storage: SlowStorage) -> AsyncRedirectResolver:
+    async_storage = ThreadedAsyncStorage(storage)
+    async_storage.inline = False  # A consulta lenta vai para o pool de threads, como no SQLite
+    return AsyncRedirectResolver(async_storage, CachedURLLookup(URLShortener(storage), LRUCache(max_entries=100)))
+
+
+def test_async_misses_share_one_query():
+    storage = slow_storage()
+    resolver = async_resolver(storage)
+
+    async def main():
+        requests = [asyncio.ensure_future(resolver.resolve(code)) for code in ['hot'] * 10 + ['none']]
+        while storage.lookups < 2:
+            await asyncio.sleep(0.01)
+        storage.release.set()
+        return await asyncio.gather(*requests)
+
+    results = asyncio.run(main())
+
+    assert storage.lookups == 2
+    assert resolver.url_lookup.coalesced == 9
+    assert {target.original_url for target, _ in results[:10]} == {'https://example.com/hot'}
+    assert results[10] == (None, NOT_FOUND)
+
+
+def test_cancelled_owner_does_not_fail_waiters():
+    storage = slow_storage()
+    resolver = async_resolver(storage)
+
+    async def main():
+        owner = asyncio.ensure_future(resolver.resolve('hot'))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(resolver.resolve('hot')) for _ in range(3)]
+        while resolver.url_lookup.coalesced < 3:
+            await asyncio.sleep(0.01)
+        owner.cancel()
+        await asyncio.sleep(0)
+        storage.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(main())
+
+    assert storage.lookups == 1
+    assert [status for _, status in results] == [0, 0, 0]
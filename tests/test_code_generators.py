@@ -0,0 +1,80 @@
+"""
+Testes das estratégias de geração de códigos curtos
+"""
+import threading
+
+import pytest
+
+from backend.code_generators import (
+    BASE62_ALPHABET, Base62CounterGenerator, MD5CodeGenerator, base62_encode, create_code_generator,
+)
+
+
+def base62_decode(code: str) -> int:
+    number = 0
+    for char in code:
+        number = number * 62 + BASE62_ALPHABET.index(char)
+    return number
+
+
+@pytest.mark.parametrize('number, expected', [(0, '0'), (9, '9'), (10, 'A'), (61, 'z'), (62, '10'), (3843, 'zz')])
+def test_base62_encode(number, expected):
+    assert base62_encode(number) == expected
+
+
+def test_base62_round_trip():
+    for number in (1, 62 ** 5 - 1, 62 ** 5, 2 ** 63):
+        assert base62_decode(base62_encode(number)) == number
+
+
+def test_md5_codes():
+    generator = MD5CodeGenerator('lleria')
+
+    code = generator.generate('https://example.com/')
+
+    assert code.startswith('lleria') and len(code) == len('lleria') + 8
+    assert generator.generate('https://example.com/-1') != code
+
+
+def test_counter_reserves_blocks(storage):
+    generator = Base62CounterGenerator('p', storage, block_size=10)
+
+    codes = [generator.generate('https://example.com/') for _ in range(25)]
+
+    assert [base62_decode(code[1:]) for code in codes] == list(range(25))
+    # 3 blocos usados: o próximo bloco começa depois deles
+    assert storage.allocate_ids('short_code', 1) == 30
+
+
+def test_counters_never_collide_across_generators(storage):
+    generators = [Base62CounterGenerator('p', storage, block_size=7) for _ in range(4)]
+    codes = []
+    lock = threading.Lock()
+
+    def generate(generator):
+        for _ in range(100):
+            code = generator.generate('https://example.com/')
+            with lock:
+                codes.append(code)
+
+    threads = [threading.Thread(target=generate, args=(generator,)) for generator in generators for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(codes) == len(set(codes)) == 800
+
+
+def test_create_code_generator(storage, monkeypatch):
+    monkeypatch.setenv('SHORT_CODE_STRATEGY', 'counter')
+    monkeypatch.setenv('SHORT_CODE_BLOCK_SIZE', '50')
+    generator = create_code_generator('lleria', storage)
+    assert isinstance(generator, Base62CounterGenerator) and generator.block_size == 50
+
+    monkeypatch.setenv('SHORT_CODE_STRATEGY', 'MD5')
+    assert isinstance(create_code_generator('lleria', storage), MD5CodeGenerator)
+
+    monkeypatch.setenv('SHORT_CODE_STRATEGY', 'random')
+    with pytest.raises(ValueError):
+        create_code_generator('lleria', storage)
@@ -0,0 +1,79 @@
+"""
+Testes da remoção de links: caches (L1 de cada worker, L2) e snapshot deixam de atendê-los
+"""
+from backend.cache import CachedURLLookup, LRUCache
+from backend.resolver import NOT_FOUND, RedirectResolver
+from backend.shared_cache import SharedCache
+from backend.snapshot import RedirectSnapshot, export_snapshot
+from backend.storage.memory import MemoryStorage
+from backend.url_shortener import URLShortener
+from conftest import make_document
+
+
+def worker(storage, shared_path=None, snapshot=None) -> RedirectResolver:
+    """Resolvedor como o de um worker: L1 próprio e, opcionalmente, a tabela compartilhada e o snapshot"""
+    shared = SharedCache(shared_path, slots=256) if shared_path else None
+    lookup = CachedURLLookup(URLShortener(storage), LRUCache(max_entries=100), shared)
+    return RedirectResolver(storage, lookup, snapshot=snapshot)
+
+
+def connected_storage() -> MemoryStorage:
+    storage = MemoryStorage()
+    storage.connect()
+    storage.insert(make_document('gone'))
+    storage.insert(make_document('kept'))
+    return storage
+
+
+def test_deleted_code_returns_404():
+    storage = connected_storage()
+    resolver = worker(storage)
+    assert resolver.resolve('gone')[1] == 0  # Fica no L1
+
+    result = URLShortener(storage).delete_url('gone', resolver.url_lookup)
+
+    assert result == {'success': True, 'short_url': 'gone', 'deleted': True}
+    assert resolver.resolve('gone') == (None, NOT_FOUND)
+    assert resolver.resolve('kept')[1] == 0
+
+
+def test_deletion_reaches_other_workers(tmp_path):
+    storage = connected_storage()
+    path = str(tmp_path / 'shared.cache')
+    SharedCache(path, slots=256, create=True).close()
+    first, second = worker(storage, path), worker(storage, path)
+    assert second.resolve('gone')[1] == 0
+    assert second.resolve('kept')[1] == 0
+
+    URLShortener(storage).delete_url('gone', first.url_lookup)
+
+    assert second.resolve('gone') == (None, NOT_FOUND)
+    assert second.resolve('kept')[1] == 0
+
+
+def test_deleted_snapshot_link_returns_404(tmp_path):
+    storage = connected_storage()
+    snapshot_path = str(tmp_path / 'links.snapshot')
+    export_snapshot(storage, snapshot_path)
+    cache_path = str(tmp_path / 'shared.cache')
+    SharedCache(cache_path, slots=256, create=True).close()
+    first = worker(storage, cache_path, RedirectSnapshot(snapshot_path))
+    second = worker(storage, cache_path, RedirectSnapshot(snapshot_path))
+
+    URLShortener(storage).delete_url('gone', first.url_lookup)
+
+    for resolver in (first, second):
+        assert resolver.resolve('gone') == (None, NOT_FOUND)
+        assert resolver.resolve('kept')[0].original_url == 'https://example.com/kept'
+
+
+def test_tombstone_survives_negative_results(tmp_path):
+    cache = SharedCache(str(tmp_path / 'shared.cache'), slots=256, create=True)
+
+    cache.invalidate('gone', deleted=True)
+    cache.set('gone', None)  # Consulta ao banco de outro worker
+
+    assert cache.is_deleted('gone')
+    assert cache.get('gone')[0]
+    assert cache.invalidations() == 1
+    cache.remove()
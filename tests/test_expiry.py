@@ -0,0 +1,75 @@
+"""
+Testes dos links com expiração: criação, recusa de links vencidos e tempo de vida em cache
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend.cache import CachedURLLookup, LRUCache
+from backend.redirects import RedirectPolicy, RedirectTarget, is_expired
+from backend.resolver import NOT_FOUND, RedirectResolver
+from backend.url_shortener import URLShortener
+from conftest import make_document
+
+
+def in_seconds(seconds: float) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+def test_past_expiry_is_rejected(storage):
+    result = URLShortener(storage).shorten_url('https://example.com/', expires_at=in_seconds(-1))
+
+    assert not result['success']
+    assert 'futuro' in result['error']
+
+
+def test_expiring_links_are_not_deduplicated(storage):
+    shortener = URLShortener(storage)
+
+    permanent = shortener.shorten_url('https://example.com/')
+    first = shortener.shorten_url('https://example.com/', expires_at=in_seconds(3600))
+    second = shortener.shorten_url('https://example.com/', expires_at=in_seconds(3600))
+
+    assert len({permanent['short_url'], first['short_url'], second['short_url']}) == 3
+    assert not first['already_exists'] and not second['already_exists']
+    assert shortener.shorten_url('https://example.com/')['short_url'] == permanent['short_url']
+
+
+def test_expired_links_are_not_resolved(storage):
+    storage.insert(make_document('old', expires_at=in_seconds(-60)))
+    storage.insert(make_document('live', expires_at=in_seconds(3600)))
+    shortener = URLShortener(storage)
+    resolver = RedirectResolver(storage, CachedURLLookup(shortener, LRUCache()))
+
+    assert is_expired(storage.get_by_code('old'))
+    assert shortener.find_redirect_target('old') is None
+    assert resolver.resolve('old') == (None, NOT_FOUND)
+    assert resolver.resolve('live')[0].expires_at is not None
+
+
+def test_cache_entry_ends_with_the_link():
+    lookup = CachedURLLookup(None, LRUCache(ttl=300))
+    target = RedirectTarget('https://example.com/', expires_at=time.time() + 0.05)
+
+    lookup.remember('soon', target)
+    assert lookup.peek('soon') == (True, target)
+    time.sleep(0.1)
+
+    assert lookup.peek('soon') == (False, None)
+
+
+def test_expired_target_in_cache_is_negative():
+    cache = LRUCache(ttl=300)
+    lookup = CachedURLLookup(None, cache)
+    cache.set('stale', RedirectTarget('https://example.com/', expires_at=time.time() - 1))
+
+    assert lookup.peek('stale') == (True, None)
+
+
+def test_max_age_for():
+    policy = RedirectPolicy(max_age=3600)
+    now = time.time()
+
+    assert policy.max_age_for(RedirectTarget('https://example.com/'), now) == 3600
+    assert policy.max_age_for(RedirectTarget('https://example.com/', expires_at=now + 90.5), now) == 90
+    assert policy.max_age_for(RedirectTarget('https://example.com/', expires_at=now + 7200), now) == 3600
+    assert policy.max_age_for(RedirectTarget('https://example.com/', expires_at=now - 5), now) == 0
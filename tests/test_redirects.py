@@ -0,0 +1,105 @@
+"""
+Testes da semântica HTTP dos redirecionamentos (status, cabeçalhos de cache e 304)
+"""
+import time
+from email.utils import formatdate
+
+import pytest
+
+from backend.redirects import NOT_MODIFIED, RedirectPolicy, RedirectTarget, location_header, parse_redirect_status
+
+CREATED = 1_700_000_000.0  # 2023-11-14 22:13:20 GMT
+
+
+@pytest.fixture
+def policy():
+    return RedirectPolicy(status=302, max_age=3600)
+
+
+def test_status_per_link_overrides_global(policy):
+    assert policy.respond('abc', RedirectTarget('https://example.com/'))[0] == 302
+    assert policy.respond('abc', RedirectTarget('https://example.com/', status=308))[0] == 308
+    assert parse_redirect_status('') is None
+    with pytest.raises(ValueError):
+        parse_redirect_status(304)
+
+
+def test_cache_headers(policy):
+    status, headers = policy.respond('abc', RedirectTarget('https://example.com/', status=301, last_modified=CREATED))
+
+    assert status == 301
+    assert headers['Cache-Control'] == 'public, max-age=3600, immutable'
+    assert headers['Last-Modified'] == 'Tue, 14 Nov 2023 22:13:20 GMT'
+    assert headers['ETag'] == RedirectPolicy.etag('abc', 'https://example.com/', 301)
+
+
+def test_etag_changes_with_destination():
+    assert RedirectPolicy.etag('abc', 'https://a.example/', 302) != RedirectPolicy.etag('abc', 'https://b.example/', 302)
+    assert RedirectPolicy.etag('abc', 'https://a.example/', 302) != RedirectPolicy.etag('abc', 'https://a.example/', 301)
+
+
+def test_if_none_match(policy):
+    target = RedirectTarget('https://example.com/', last_modified=CREATED)
+    etag = policy.respond('abc', target)[1]['ETag']
+
+    assert policy.respond('abc', target, if_none_match=etag)[0] == NOT_MODIFIED
+    assert policy.respond('abc', target, if_none_match=f'"other", W/{etag}')[0] == NOT_MODIFIED
+    assert policy.respond('abc', target, if_none_match='*')[0] == NOT_MODIFIED
+    assert policy.respond('abc', target, if_none_match='"other"')[0] == 302
+    # If-None-Match tem precedência: a data não é considerada
+    assert policy.respond('abc', target, if_none_match='"other"',
+                          if_modified_since=formatdate(CREATED + 60, usegmt=True))[0] == 302
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('Tue, 14 Nov 2023 22:13:20 GMT', NOT_MODIFIED),
+    ('Tue, 14 Nov 2023 22:13:19 GMT', 302),
+    ('Tuesday, 14-Nov-23 22:13:20 GMT', NOT_MODIFIED),  # RFC 850
+    ('Tue Nov 14 22:13:20 2023', NOT_MODIFIED),  # asctime
+    ('Tue, 14 Nov 2023 22:13:19 -0000', 302),
+    ('not a date', 302),
+])
+def test_if_modified_since(policy, header, expected):
+    target = RedirectTarget('https://example.com/', last_modified=CREATED)
+
+    assert policy.respond('abc', target, if_modified_since=header)[0] == expected
+
+
+def test_if_modified_since_ignores_server_timezone(policy, monkeypatch):
+    if not hasattr(time, 'tzset'):
+        pytest.skip('tzset indisponível nesta plataforma')
+    monkeypatch.setenv('TZ', 'America/Sao_Paulo')
+    time.tzset()
+    try:
+        target = RedirectTarget('https://example.com/', last_modified=CREATED)
+        # Uma hora antes da criação, sem fuso: não pode virar 304 por causa do fuso local
+        assert policy.respond('abc', target, if_modified_since='Tue Nov 14 21:13:20 2023')[0] == 302
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_expiring_links_limit_cache(policy):
+    now = time.time()
+    soon = RedirectTarget('https://example.com/', status=301, expires_at=now + 120)
+    expired = RedirectTarget('https://example.com/', expires_at=now - 1)
+
+    assert policy.max_age_for(soon, now) == 120
+    assert policy.respond('abc', soon, now=now)[1]['Cache-Control'] == 'public, max-age=120'
+    assert policy.max_age_for(expired, now) == 0
+    assert policy.respond('abc', expired, now=now)[1]['Cache-Control'] == 'no-store'
+    assert RedirectPolicy(max_age=0).respond('abc', soon, now=now)[1]['Cache-Control'] == 'no-cache'
+
+
+def test_location_header_is_ascii():
+    assert location_header('https://example.com/a?b=1') == 'https://example.com/a?b=1'
+    assert location_header('https://bücher.example/café') == 'https://xn--bcher-kva.example/caf%C3%A9'
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv('REDIRECT_STATUS', '308')
+    monkeypatch.setenv('REDIRECT_CACHE_MAX_AGE', '60')
+
+    policy = RedirectPolicy.from_env()
+
+    assert (policy.status, policy.max_age) == (308, 60)
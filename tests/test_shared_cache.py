@@ -0,0 +1,86 @@
+"""
+Testes da tabela de cache compartilhada (seqlock sobre mmap)
+"""
+import threading
+import time
+
+import pytest
+
+from backend.redirects import RedirectTarget
+from backend.shared_cache import SharedCache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'shared.cache')
+
+
+def test_positive_and_negative_entries(cache_path):
+    cache = SharedCache(cache_path, slots=256, create=True)
+    target = RedirectTarget('https://example.com/a', status=301, last_modified=1000.0, expires_at=None)
+
+    cache.set('abc', target)
+    cache.set('gone', None)
+
+    assert cache.get('abc') == (True, (target, pytest.approx(time.time() + cache.ttl, abs=1)))
+    found, (negative, _) = cache.get('gone')
+    assert found and negative is None
+    assert cache.get('missing') == (False, None)
+    assert cache.stats()['negative_hits'] == 1
+    cache.remove()
+
+
+def test_invalidate_and_expiry(cache_path):
+    cache = SharedCache(cache_path, slots=256, create=True)
+    cache.set('abc', RedirectTarget('https://example.com/a'))
+    cache.set('short', RedirectTarget('https://example.com/b'), ttl=0.05)
+
+    cache.invalidate('abc')
+    time.sleep(0.1)
+
+    assert cache.get('abc') == (False, None)
+    assert cache.get('short') == (False, None)
+    assert cache.size() == 0
+    cache.remove()
+
+
+def test_entries_shared_between_instances(cache_path):
+    writer = SharedCache(cache_path, slots=256, create=True)
+    reader = SharedCache(cache_path, slots=256)
+
+    writer.set('abc', RedirectTarget('https://example.com/a'))
+    assert reader.get('abc')[1][0].original_url == 'https://example.com/a'
+
+    reader.invalidate('abc')
+    assert writer.get('abc') == (False, None)
+    reader.close()
+    writer.remove()
+
+
+def test_concurrent_writes_never_return_torn_values(cache_path):
+    cache = SharedCache(cache_path, slots=256, create=True)
+    targets = [RedirectTarget(f"https://example.com/{'x' * length}", status=300 + length % 8)
+               for length in (1, 50, 200)]
+    stop = threading.Event()
+
+    def write():
+        while not stop.is_set():
+            for target in targets:
+                cache.set('hot', target)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    seen = set()
+    try:
+        deadline = time.monotonic() + 0.5
+        while time.monotonic() < deadline:
+            found, entry = cache.get('hot')
+            if found:
+                seen.add(entry[0])
+    finally:
+        stop.set()
+        writer.join()
+
+    # Toda leitura devolve um dos destinos gravados por inteiro
+    assert seen and seen <= set(targets)
+    cache.remove()
@@ -0,0 +1,89 @@
+"""
+Testes do snapshot somente leitura dos redirecionamentos (exportação em fluxo e busca binária)
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.snapshot import RedirectSnapshot, export_snapshot
+from backend.storage.memory import MemoryStorage
+from conftest import make_document
+
+
+class UnorderedStorage(MemoryStorage):
+    """Backend que não respeita a ordem de código de iter_links"""
+
+    def iter_links(self, batch_size=5000, permanent_only=False):
+        return reversed(list(super().iter_links(batch_size, permanent_only)))
+
+
+def test_export_and_lookup(storage, tmp_path):
+    codes = ['b', 'ab', 'abc', 'Zz', 'çã', '0001']
+    for code in codes:
+        storage.insert(make_document(code))
+    storage.insert(make_document('perm', redirect_status=308))
+    storage.insert(make_document('temp', expires_at=datetime.now(timezone.utc) + timedelta(days=1)))
+    path = str(tmp_path / 'links.snapshot')
+
+    assert export_snapshot(storage, path) == len(codes) + 1
+
+    snapshot = RedirectSnapshot(path)
+    for code in codes:
+        assert snapshot.get(code).original_url == f"https://example.com/{code}"
+    assert snapshot.get('perm').status == 308
+    assert snapshot.get('temp') is None  # Links com expiração ficam para o banco
+    assert snapshot.get('a') is None
+    assert snapshot.get('abcd') is None
+    assert snapshot.get('x' * 100) is None
+    assert snapshot.stats()['hits'] == len(codes) + 1
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+    snapshot.close()
+
+
+def test_padded_code_is_not_a_match(storage, tmp_path):
+    storage.insert(make_document('abc'))
+    path = str(tmp_path / 'links.snapshot')
+    export_snapshot(storage, path)
+
+    snapshot = RedirectSnapshot(path)
+    assert snapshot.code_width == 3
+    storage.insert(make_document('abcdef'))
+    export_snapshot(storage, path)
+    snapshot.close()
+
+    snapshot = RedirectSnapshot(path)
+    assert snapshot.get('abc') is not None
+    assert snapshot.get('abc\0') is None
+    assert snapshot.get('abc\0\0\0') is None
+    snapshot.close()
+
+
+def test_empty_snapshot(storage, tmp_path):
+    path = str(tmp_path / 'links.snapshot')
+
+    assert export_snapshot(storage, path) == 0
+
+    snapshot = RedirectSnapshot(path)
+    assert len(snapshot) == 0
+    assert snapshot.get('abc') is None
+    snapshot.close()
+
+
+def test_unordered_links_are_rejected(tmp_path):
+    storage = UnorderedStorage()
+    storage.connect()
+    storage.insert_many([make_document('a'), make_document('b')])
+    path = str(tmp_path / 'links.snapshot')
+
+    with pytest.raises(ValueError):
+        export_snapshot(storage, path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_invalid_file(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'not a snapshot' * 10)
+
+    with pytest.raises(ValueError):
+        RedirectSnapshot(str(path))
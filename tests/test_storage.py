@@ -0,0 +1,126 @@
+"""
+Testes dos backends embutidos de armazenamento (memória e SQLite)
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.storage.base import DuplicateCodeError, StorageError
+from backend.storage.sqlite import SQLiteStorage
+from conftest import make_document
+
+
+def test_insert_and_get(storage):
+    storage.insert(make_document('abc123'))
+
+    document = storage.get_by_code('abc123')
+    assert document['original_url'] == 'https://example.com/abc123'
+    assert storage.get_by_code('missing') is None
+
+    with pytest.raises(DuplicateCodeError):
+        storage.insert(make_document('abc123', 'https://example.com/other'))
+
+
+def test_insert_many_reports_duplicates(storage):
+    storage.insert(make_document('dup'))
+
+    failures = storage.insert_many([make_document('one'), make_document('dup'), make_document('two')])
+
+    assert list(failures) == [1]
+    assert isinstance(failures[1], DuplicateCodeError)
+    codes = {document['short_url'] for document in storage.get_many_by_code(['one', 'two', 'dup', 'none'])}
+    assert codes == {'one', 'two', 'dup'}
+
+
+def test_list_urls_pages_newest_first(storage):
+    for index in range(5):
+        storage.insert(make_document(f"code{index}", age=10 - index))
+
+    first = storage.list_urls(2)
+    assert [document['short_url'] for document in first] == ['code4', 'code3']
+
+    last = first[-1]
+    second = storage.list_urls(10, after=(last['created_at'], last['short_url']))
+    assert [document['short_url'] for document in second] == ['code2', 'code1', 'code0']
+
+
+def test_list_urls_search(storage):
+    storage.insert(make_document('aaa', 'https://docs.python.org/3/', age=3))
+    storage.insert(make_document('bbb', 'https://example.com/100%', age=2))
+    storage.insert(make_document('ccc', 'https://example.com/1000', age=1))
+
+    assert [document['short_url'] for document in storage.list_urls(10, search='PYTHON')] == ['aaa']
+    # Curingas do LIKE são procurados literalmente
+    assert [document['short_url'] for document in storage.list_urls(10, search='100%')] == ['bbb']
+    assert [document['short_url'] for document in storage.list_urls(10, search='bb')] == ['bbb']
+
+
+def test_iter_codes_by_insertion_time(storage):
+    storage.insert(make_document('old', age=3600))
+    time.sleep(0.01)
+    watermark = datetime.now()
+    time.sleep(0.01)
+    # Importado agora com uma data de criação antiga
+    storage.insert(make_document('imported', age=86400))
+
+    assert {code for code, _ in storage.iter_codes()} == {'old', 'imported'}
+    assert [code for code, _ in storage.iter_codes(watermark)] == ['imported']
+
+
+def test_increment_clicks_and_delete(storage):
+    storage.insert(make_document('clicked'))
+
+    storage.increment_clicks({'clicked': 3, 'missing': 1})
+    storage.increment_clicks({'clicked': 2})
+
+    exported = {document['short_url']: document for document in storage.iter_documents()}
+    assert exported['clicked']['clicks'] == 5
+    assert storage.delete('clicked')
+    assert not storage.delete('clicked')
+    assert storage.get_by_code('clicked') is None
+
+
+def test_disconnected_storage_raises(storage):
+    storage.disconnect()
+
+    with pytest.raises(StorageError):
+        storage.get_by_code('abc')
+
+
+def test_sqlite_pool_is_bounded(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / 'pool.db'), pool_size=2)
+    storage.connect()
+    storage.insert(make_document('shared'))
+    errors = []
+
+    def read():
+        try:
+            for _ in range(20):
+                assert storage.get_by_code('shared') is not None
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read) for _ in range(200)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert storage._open <= 2
+    storage.disconnect()
+
+
+def test_sqlite_keeps_links_after_reconnect(tmp_path):
+    path = str(tmp_path / 'persist.db')
+    storage = SQLiteStorage(path)
+    storage.connect()
+    storage.insert(make_document('kept', age=timedelta(days=1).total_seconds()))
+    storage.disconnect()
+
+    reopened = SQLiteStorage(path)
+    reopened.connect()
+    assert reopened.get_by_code('kept')['short_url'] == 'kept'
+    reopened.disconnect()